@@ -1,21 +1,44 @@
 import os
+import sys
+from pathlib import Path
 
-import anthropic
 import json
 from aci import ACI
 from aci.types.functions import FunctionDefinitionFormat
-from anthropic.types.content_block import TextBlock, ToolUseBlock
 from dotenv import load_dotenv
-from rich import print as rprint
-from rich.panel import Panel
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from token_accounting import RunAccount  # noqa: E402
 
 load_dotenv()
 LINKED_ACCOUNT_OWNER_ID = os.getenv("LINKED_ACCOUNT_OWNER_ID", "")
 if not LINKED_ACCOUNT_OWNER_ID:
     raise ValueError("LINKED_ACCOUNT_OWNER_ID is not set")
 
+SYSTEM_PROMPT = "You are a helpful assistant with access to a variety of tools."
+
+# Prompt caching: the tools, the system prompt and the previous turns are identical on every request of the loop,
+# so they are marked with cache breakpoints and read from Anthropic's prompt cache on every turn after the first.
+# Note that prompts shorter than the model's minimum cacheable length (e.g. 1024 tokens) are not cached.
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def with_cache_breakpoint(messages: list[dict]) -> list[dict]:
+    """Copy of the messages with a cache breakpoint on the last content block only (at most 4 breakpoints are allowed)"""
+    *previous_messages, last_message = messages
+    *previous_blocks, last_block = last_message["content"]
+    return previous_messages + [
+        {**last_message, "content": previous_blocks + [{**last_block, "cache_control": CACHE_CONTROL}]}
+    ]
+
 
 def main() -> None:
+    import anthropic
+    from anthropic.types.content_block import TextBlock, ToolUseBlock
+    from rich import print as rprint
+    from rich.panel import Panel
+
     aci = ACI()
     github_star_repository_function_definition = aci.functions.get_definition(
         "GITHUB__STAR_REPOSITORY", format=FunctionDefinitionFormat.ANTHROPIC
@@ -29,6 +52,14 @@ def main() -> None:
     rprint(Panel("Github get user function definition", style="bold blue"))
     rprint(github_get_user_function_definition)
 
+    # sorted by name so the tools prefix is byte-identical across runs, and cached from the last tool
+    tools = sorted(
+        [github_star_repository_function_definition, github_get_user_function_definition],
+        key=lambda tool: tool["name"],
+    )
+    tools[-1] = {**tools[-1], "cache_control": CACHE_CONTROL}
+    system = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": CACHE_CONTROL}]
+
     client = anthropic.Anthropic()
 
     # Initialize message list
@@ -44,6 +75,10 @@ def main() -> None:
     # Set maximum iterations to prevent infinite loops
     max_iterations = 10
     iteration_count = 0
+    # input tokens read from the prompt cache, written to it, and not cached
+    cache_read_tokens = cache_creation_tokens = uncached_tokens = 0
+    # input tokens per part of the request, output tokens per tool call, see ../common/token_accounting.py
+    account = RunAccount("anthropic_with_pre_planned_tool", "pre_planned")
 
     while iteration_count < max_iterations:
         iteration_count += 1
@@ -55,14 +90,35 @@ def main() -> None:
                 model="claude-3-7-sonnet-20250219",
                 max_tokens=1000,
                 temperature=1,
-                system="You are a helpful assistant with access to a variety of tools.",
-                messages=messages,
-                tools=[github_star_repository_function_definition,github_get_user_function_definition],
+                system=system,
+                messages=with_cache_breakpoint(messages),
+                tools=tools,
             )
         except Exception as e:
             rprint(Panel(f"Error calling LLM: {e}", style="bold red"))
             break
 
+        usage = response.usage
+        cache_read_tokens += usage.cache_read_input_tokens or 0
+        cache_creation_tokens += usage.cache_creation_input_tokens or 0
+        uncached_tokens += usage.input_tokens
+        rprint(
+            f"input tokens: {usage.cache_read_input_tokens or 0} from cache, "
+            f"{usage.cache_creation_input_tokens or 0} written to cache, {usage.input_tokens} uncached"
+        )
+        turn = account.record_turn(
+            # the system prompt is sent apart from the messages
+            [{"role": "system", "content": system}] + messages,
+            tools,
+            usage,
+            "".join(block.text for block in response.content if isinstance(block, TextBlock)),
+            [(block.name, block.input) for block in response.content if isinstance(block, ToolUseBlock)],
+        )
+        rprint(
+            f"turn {turn.turn}: {turn.input_tokens} input tokens, {turn.output_tokens} output tokens "
+            f"({turn.tool_call_tokens} on tool calls)"
+        )
+
         # Process response content
         has_tool_call = False
         for content_block in response.content:
@@ -126,6 +182,18 @@ def main() -> None:
                 if content["type"] == "text":
                     rprint(content["text"])
 
+    total_input_tokens = cache_read_tokens + cache_creation_tokens + uncached_tokens
+    if total_input_tokens:
+        rprint(Panel("Prompt Cache", style="bold blue"))
+        rprint(
+            f"hit rate: {100 * cache_read_tokens / total_input_tokens:.0f}% of {total_input_tokens} input tokens "
+            f"({cache_creation_tokens} written to cache, {uncached_tokens} uncached)"
+        )
+
+    rprint(Panel("Token Usage", style="bold blue"))
+    rprint(account.summary())
+    rprint(f"output tokens per tool: {account.tool_calls}")
+
 
 if __name__ == "__main__":
     main()
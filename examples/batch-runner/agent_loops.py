@@ -0,0 +1,315 @@
+"""
+The agent loops of the OpenAI examples as reusable async functions, for running many tasks at once.
+
+- pre_planned: agent_with_pre_planned_tools.py, the task names the functions it needs
+- discovery: agent_with_dynamic_tool_discovery_pattern_1.py, the model searches functions with
+  ACI_SEARCH_FUNCTIONS and calls the retrieved ones directly
+- discovery_execute: agent_with_dynamic_tool_discovery_pattern_2.py, the model searches functions
+  with ACI_SEARCH_FUNCTIONS and executes them through ACI_EXECUTE_FUNCTION
+
+The loops talk to the model through a Model and to ACI through a FunctionExecutor, which are shared
+by all the tasks of a batch and apply the per-provider rate limits.
+"""
+
+import asyncio
+import json
+import sys
+import time
+import types
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from aci.meta_functions import ACIExecuteFunction, ACISearchFunctions
+from aci.types.functions import FunctionDefinitionFormat
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from token_accounting import RunAccount  # noqa: E402
+from token_bucket import TokenBucket  # noqa: E402
+
+# records nothing until a tracer provider is set up, see ../common/tracing.py
+tracer = trace.get_tracer(__name__)
+
+PATTERNS = ("pre_planned", "discovery", "discovery_execute")
+
+PROMPTS = {
+    "pre_planned": "You are a helpful assistant with access to a variety of tools.",
+    "discovery": (
+        "You are a helpful assistant with access to a unlimited number of tools via a meta function: "
+        "ACI_SEARCH_FUNCTIONS. "
+        "You can use ACI_SEARCH_FUNCTIONS to find relevant functions across all apps. "
+        "Once you have identified the functions you need to use, they are added to your tools and you can use "
+        "them in future tool calls."
+    ),
+    "discovery_execute": (
+        "You are a helpful assistant with access to a unlimited number of tools via some meta functions: "
+        "ACI_SEARCH_FUNCTIONS, and ACI_EXECUTE_FUNCTION. "
+        "You can use ACI_SEARCH_FUNCTIONS to find relevant functions across all apps. Try to limit the number of "
+        "results per request to 1. "
+        "Once you have identified the function you need to use, you can use ACI_EXECUTE_FUNCTION to execute the "
+        "function provided you have the correct input arguments. "
+        "IMPORTANT: When calling any function, carefully read the function definition and ensure you provide ALL "
+        "required parameters with correct names and types."
+    ),
+}
+
+
+class AbortRun(Exception):
+    """Raised by a tool execution to end the run, instead of reporting the error to the model"""
+
+
+class Model:
+    """The OpenAI chat completions client, rate limited when given a bucket"""
+
+    def __init__(self, client=None, bucket: TokenBucket | None = None):
+        if client is None:
+            # imported here so a stubbed client (e.g. in benchmarks) does not load the OpenAI SDK
+            from openai import AsyncOpenAI
+
+            # gets OPENAI_API_KEY from your environment variables
+            client = AsyncOpenAI()
+        self.client = client
+        self.bucket = bucket
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        if self.bucket is not None:
+            await self.bucket.acquire()
+        self.calls += 1
+        with tracer.start_as_current_span(
+            f"chat {kwargs.get('model')}",
+            attributes={
+                "gen_ai.operation.name": "chat",
+                "gen_ai.system": "openai",
+                "gen_ai.request.model": kwargs.get("model"),
+            },
+        ) as span:
+            response = await self.client.chat.completions.create(**kwargs)
+            if response.usage is not None:
+                details = getattr(response.usage, "prompt_tokens_details", None)
+                span.set_attributes(
+                    {
+                        "gen_ai.usage.input_tokens": response.usage.prompt_tokens,
+                        "gen_ai.usage.output_tokens": response.usage.completion_tokens,
+                        "gen_ai.usage.cache_read_input_tokens": getattr(details, "cached_tokens", None) or 0,
+                    }
+                )
+            return response
+
+
+class FunctionExecutor:
+    """Fetches function definitions from and executes functions on ACI, rate limited when given a bucket"""
+
+    def __init__(self, aci=None, bucket: TokenBucket | None = None, sdk_retries: bool = True):
+        if aci is None:
+            from aci import ACI
+
+            # gets ACI_API_KEY from your environment variables
+            aci = ACI()
+        self.aci = aci
+        self.bucket = bucket
+        # the SDK retries every request on 429, 5xx, timeouts and network errors (tenacity), turned off
+        # by callers that retry themselves, see resilience.py
+        self.sdk_retries = sdk_retries
+        self.calls = 0
+
+    async def _acquire(self) -> None:
+        if self.bucket is not None:
+            await self.bucket.acquire()
+        self.calls += 1
+
+    def _sdk_method(self, method: Callable) -> Callable:
+        """The ACI client method, without the tenacity retry wrapper of the SDK unless sdk_retries"""
+        if self.sdk_retries or not hasattr(method, "__wrapped__"):
+            return method
+        return types.MethodType(method.__wrapped__, method.__self__)
+
+    def _handle_function_call(self, function_name: str, function_arguments: dict, linked_account_owner_id: str):
+        """aci.handle_function_call, routing the meta functions the same way when the SDK retries are off"""
+        if self.sdk_retries:
+            return self.aci.handle_function_call(
+                function_name,
+                function_arguments,
+                linked_account_owner_id=linked_account_owner_id,
+                allowed_apps_only=True,
+                format=FunctionDefinitionFormat.OPENAI,
+            )
+        functions = self.aci.functions
+        if function_name == ACISearchFunctions.get_name():
+            return self._sdk_method(functions.search)(
+                **function_arguments, allowed_apps_only=True, format=FunctionDefinitionFormat.OPENAI
+            )
+        if function_name == ACIExecuteFunction.get_name():
+            function_arguments = ACIExecuteFunction.wrap_function_arguments_if_not_present(function_arguments)
+            result = self._sdk_method(functions.execute)(
+                **function_arguments, linked_account_owner_id=linked_account_owner_id
+            )
+        else:
+            result = self._sdk_method(functions.execute)(function_name, function_arguments, linked_account_owner_id)
+        return result.model_dump(exclude_none=True)
+
+    async def get_definition(self, function_name: str) -> dict:
+        await self._acquire()
+        with tracer.start_as_current_span("aci.get_definition", attributes={"aci.function_name": function_name}):
+            get_definition = self._sdk_method(self.aci.functions.get_definition)
+            return await asyncio.to_thread(get_definition, function_name, format=FunctionDefinitionFormat.OPENAI)
+
+    async def execute(self, function_name: str, function_arguments: dict, linked_account_owner_id: str) -> Any:
+        # the ACI client is synchronous, run it in a thread so the other tasks keep going
+        await self._acquire()
+        attributes = {"aci.function_name": function_name}
+        if function_name == ACIExecuteFunction.get_name():
+            attributes["aci.executed_function"] = function_arguments.get("function_name", "")
+        with tracer.start_as_current_span("aci.handle_function_call", attributes=attributes):
+            return await asyncio.to_thread(
+                self._handle_function_call, function_name, function_arguments, linked_account_owner_id
+            )
+
+
+@dataclass
+class Task:
+    id: str
+    prompt: str
+    pattern: str = "discovery"
+    # the functions given to the model up front, required by the pre_planned pattern
+    functions: list[str] = field(default_factory=list)
+    model: str = "gpt-4o"
+    linked_account_owner_id: str = ""
+    max_turns: int = 10
+
+    @classmethod
+    def from_dict(cls, data: dict, default_linked_account_owner_id: str = "") -> "Task":
+        task = cls(**{"linked_account_owner_id": default_linked_account_owner_id, **data})
+        task.id = str(task.id)
+        if task.pattern not in PATTERNS:
+            raise ValueError(f"task {task.id}: unknown pattern {task.pattern!r}, expected one of {PATTERNS}")
+        if task.pattern == "pre_planned" and not task.functions:
+            raise ValueError(f"task {task.id}: the pre_planned pattern needs the list of functions")
+        if not task.linked_account_owner_id:
+            raise ValueError(f"task {task.id}: no linked_account_owner_id")
+        return task
+
+
+@dataclass
+class RunResult:
+    id: str
+    pattern: str
+    answer: str | None = None
+    error: str | None = None
+    turns: int = 0
+    tool_calls: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+async def _execute_tool_call(executor: FunctionExecutor, task: Task, tool_call) -> Any:
+    try:
+        return await executor.execute(
+            tool_call.function.name, json.loads(tool_call.function.arguments), task.linked_account_owner_id
+        )
+    except AbortRun:
+        raise
+    except Exception as e:
+        return f"Error executing tool {tool_call.function.name}: {e}"
+
+
+async def _run_loop(
+    model: Model, executor: FunctionExecutor, task: Task, result: RunResult, account: RunAccount | None
+) -> None:
+    # OpenAI caches the longest previously seen prefix of a request (tools, then messages) automatically,
+    # so the tools are always sent in the same order: sorted, then the retrieved ones in discovery order
+    if task.pattern == "pre_planned":
+        tools = list(await asyncio.gather(*(executor.get_definition(name) for name in sorted(task.functions))))
+    elif task.pattern == "discovery":
+        tools = [ACISearchFunctions.to_json_schema(FunctionDefinitionFormat.OPENAI)]
+    else:
+        tools = [
+            ACISearchFunctions.to_json_schema(FunctionDefinitionFormat.OPENAI),
+            ACIExecuteFunction.to_json_schema(FunctionDefinitionFormat.OPENAI),
+        ]
+    # functions retrieved by ACI_SEARCH_FUNCTIONS in the discovery pattern
+    tools_retrieved: list[dict] = []
+
+    messages: list[dict] = [
+        {"role": "system", "content": PROMPTS[task.pattern]},
+        {"role": "user", "content": task.prompt},
+    ]
+    while result.turns < task.max_turns:
+        result.turns += 1
+        with tracer.start_as_current_span("agent.turn", attributes={"agent.turn": result.turns}):
+            response = await model.create(
+                model=task.model,
+                messages=messages,
+                tools=tools + tools_retrieved,
+                # the discovery patterns need the search result before the next call
+                parallel_tool_calls=task.pattern == "pre_planned",
+            )
+            if response.usage is not None:
+                result.input_tokens += response.usage.prompt_tokens
+                result.output_tokens += response.usage.completion_tokens
+            message = response.choices[0].message
+            if account is not None:
+                account.record_turn(
+                    messages,
+                    tools + tools_retrieved,
+                    response.usage,
+                    message.content,
+                    [(tool_call.function.name, tool_call.function.arguments) for tool_call in message.tool_calls or []],
+                )
+            assistant_message: dict = {"role": "assistant", "content": message.content}
+            if message.tool_calls:
+                assistant_message["tool_calls"] = [tool_call.model_dump() for tool_call in message.tool_calls]
+            messages.append(assistant_message)
+
+            if not message.tool_calls:
+                result.answer = message.content
+                return
+
+            outputs = await asyncio.gather(
+                *(_execute_tool_call(executor, task, tool_call) for tool_call in message.tool_calls)
+            )
+        for tool_call, output in zip(message.tool_calls, outputs):
+            result.tool_calls.append(tool_call.function.name)
+            if (
+                task.pattern == "discovery"
+                and tool_call.function.name == ACISearchFunctions.get_name()
+                and isinstance(output, list)
+            ):
+                known = {tool["function"]["name"] for tool in tools_retrieved}
+                tools_retrieved.extend(tool for tool in output if tool["function"]["name"] not in known)
+            messages.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "content": output if isinstance(output, str) else json.dumps(output),
+                }
+            )
+    result.error = f"no final answer after {task.max_turns} turns"
+
+
+async def run_task(
+    model: Model, executor: FunctionExecutor, task: Task, account: RunAccount | None = None
+) -> RunResult:
+    """
+    Run the agent loop of the task's pattern until the model stops calling tools, attributing the
+    tokens of every model request to the parts of the request in `account` when given
+    """
+    result = RunResult(id=task.id, pattern=task.pattern)
+    started_at = time.perf_counter()
+    with tracer.start_as_current_span(
+        "agent.run", attributes={"task.id": task.id, "agent.pattern": task.pattern}
+    ) as span:
+        try:
+            await _run_loop(model, executor, task, result, account)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            span.record_exception(e)
+        if result.error:
+            span.set_status(Status(StatusCode.ERROR, result.error))
+        span.set_attributes({"agent.turns": result.turns, "agent.tool_calls": len(result.tool_calls)})
+    result.seconds = round(time.perf_counter() - started_at, 3)
+    return result
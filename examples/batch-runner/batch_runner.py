@@ -0,0 +1,227 @@
+"""
+Batch runner executing many agent tasks concurrently, e.g. a nightly job queue.
+
+Reads tasks from a JSONL file, one per line:
+
+    {"id": "1", "prompt": "Find the top 5 results about ACI.dev", "pattern": "discovery"}
+    {"id": "2", "prompt": "Star the repo https://github.com/aipotheosis-labs/aci",
+     "pattern": "pre_planned", "functions": ["GITHUB__STAR_REPOSITORY"]}
+
+(optional fields: "model", "linked_account_owner_id", "max_turns", see agent_loops.Task) and runs them
+with the agent loops of agent_loops.py:
+
+- at most --concurrency tasks run at once, tasks are read from the file only as workers free up
+- the model and ACI requests of all tasks share one rate limit per provider (--rate-limit)
+- identical concurrent executions of idempotent functions share one request, and their results
+  can be reused for --cache-ttl seconds (see single_flight.py)
+- transient ACI errors are retried with backoff, failing functions are short-circuited, each ACI
+  call is limited in time, and a task past its wall-clock budget fails at its next ACI call (see
+  resilience.py)
+- every result is appended to the output file as soon as its task finishes, so a crash loses
+  nothing and --resume skips the tasks already in the output
+- the tokens of every model request are attributed to the system prompt, tool definitions, history
+  and tool results, their output tokens to the text and each tool call, and exported per turn, per
+  run and per tool with --usage (see ../common/token_accounting.py)
+- with --trace, every run is traced (model requests, ACI calls) to a JSONL file, see
+  ../common/tracing.py
+- progress, and at the end the throughput and latency percentiles, are printed
+
+Usage:
+    python batch_runner.py tasks.jsonl --output results.jsonl --concurrency 8 --rate-limit openai=5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from agent_loops import FunctionExecutor, Model, RunResult, Task, TokenBucket, run_task
+from resilience import ResilientExecutor, run_budget
+from single_flight import SingleFlightExecutor
+from token_accounting import TokenLedger
+
+load_dotenv()
+
+# requests per second per provider, overridden with --rate-limit
+DEFAULT_RATE_LIMITS = {"openai": 5.0, "aci": 10.0}
+
+
+def parse_rate_limits(values: list[str]) -> dict[str, float]:
+    rate_limits = dict(DEFAULT_RATE_LIMITS)
+    for value in values:
+        provider, _, rate = value.partition("=")
+        if provider not in rate_limits or not rate:
+            raise argparse.ArgumentTypeError(f"invalid rate limit {value!r}, expected e.g. openai=5 or aci=10")
+        rate_limits[provider] = float(rate)
+    return rate_limits
+
+
+def completed_task_ids(output_path: Path) -> set[str]:
+    if not output_path.exists():
+        return set()
+    with open(output_path, encoding="utf-8") as output_file:
+        return {str(json.loads(line)["id"]) for line in output_file if line.strip()}
+
+
+async def read_tasks(
+    tasks_path: Path, queue: asyncio.Queue, skip: set[str], default_owner: str, output_file, workers: int
+) -> None:
+    try:
+        with open(tasks_path, encoding="utf-8") as tasks_file:
+            for line_number, line in enumerate(tasks_file, start=1):
+                if not line.strip():
+                    continue
+                data: dict = {}
+                try:
+                    parsed = json.loads(line)
+                    if not isinstance(parsed, dict):
+                        raise ValueError(f"expected a JSON object, got {type(parsed).__name__}")
+                    data = parsed
+                    data.setdefault("id", str(line_number))
+                    if str(data["id"]) in skip:
+                        continue
+                    task = Task.from_dict(data, default_owner)
+                except (TypeError, ValueError) as e:
+                    # an invalid task is reported like a failed one instead of stopping the batch,
+                    # a line that is not a task object is reported under its line number
+                    task_id = str(data.get("id", line_number))
+                    if task_id in skip:
+                        continue
+                    invalid = RunResult(id=task_id, pattern=str(data.get("pattern")), error=f"line {line_number}: {e}")
+                    write_result(output_file, invalid)
+                    continue
+                # blocks while all the workers are busy, so the file is never read far ahead
+                await queue.put(task)
+    finally:
+        for _ in range(workers):
+            await queue.put(None)
+
+
+def write_result(output_file, result: RunResult) -> None:
+    output_file.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+    output_file.flush()
+
+
+async def run_batch(args: argparse.Namespace) -> list[RunResult]:
+    from rich import print as rprint
+
+    tracer_provider = None
+    if args.trace or args.trace_console:
+        # the OpenTelemetry SDK is only loaded when tracing is on, from examples/common (put on sys.path by agent_loops)
+        from tracing import setup_tracing
+
+        tracer_provider = setup_tracing(args.trace, console=args.trace_console)
+    rate_limits = parse_rate_limits(args.rate_limit)
+    model = Model(bucket=TokenBucket(rate_limits["openai"]))
+    resilient_executor = ResilientExecutor(
+        FunctionExecutor(bucket=TokenBucket(rate_limits["aci"])),
+        max_retries=args.max_retries,
+        call_timeout=args.call_timeout,
+    )
+    executor = SingleFlightExecutor(resilient_executor, ttl_seconds=args.cache_ttl)
+
+    output_path = Path(args.output)
+    skip = completed_task_ids(output_path) if args.resume else set()
+    if skip:
+        rprint(f"Skipping {len(skip)} tasks already in {output_path}")
+
+    results: list[RunResult] = []
+    ledger = TokenLedger()
+    started_at = time.perf_counter()
+
+    async def worker(queue: asyncio.Queue, output_file) -> None:
+        while (task := await queue.get()) is not None:
+            with run_budget(args.run_timeout):
+                result = await run_task(model, executor, task, ledger.new_run(task.id, task.pattern))
+            write_result(output_file, result)
+            results.append(result)
+            status = "[red]failed[/red]" if result.error else "[green]done[/green]"
+            elapsed = time.perf_counter() - started_at
+            rprint(
+                f"[{len(results)}] task {result.id} {status} in {result.seconds:.1f}s "
+                f"({result.turns} turns, {len(result.tool_calls)} tool calls), "
+                f"{len(results) / elapsed:.2f} tasks/s"
+            )
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency)
+    with open(output_path, "a", encoding="utf-8") as output_file:
+        reader = asyncio.create_task(
+            read_tasks(Path(args.tasks), queue, skip, args.linked_account_owner_id, output_file, args.concurrency)
+        )
+        workers = [asyncio.create_task(worker(queue, output_file)) for _ in range(args.concurrency)]
+        try:
+            await asyncio.gather(reader, *workers)
+        finally:
+            for task in [reader, *workers]:
+                task.cancel()
+
+    report(results, time.perf_counter() - started_at, model, executor, resilient_executor, ledger)
+    if args.usage:
+        ledger.write(args.usage)
+        rprint(f"Token usage written to {args.usage}")
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
+        if args.trace:
+            rprint(f"Traces written to {args.trace}, show the timelines with: python ../common/tracing.py {args.trace}")
+    return results
+
+
+def report(
+    results: list[RunResult],
+    elapsed: float,
+    model: Model,
+    executor: SingleFlightExecutor,
+    resilient_executor: ResilientExecutor,
+    ledger: TokenLedger,
+) -> None:
+    from rich import print as rprint
+    from rich.panel import Panel
+
+    failed = sum(1 for result in results if result.error)
+    lines = [
+        f"tasks: {len(results)} ({len(results) - failed} succeeded, {failed} failed) in {elapsed:.1f}s",
+        f"throughput: {len(results) / elapsed if elapsed else 0:.2f} tasks/s",
+        ledger.summary(),
+        f"model requests: {model.calls}, ACI requests: {executor.calls} "
+        f"({executor.coalesced} calls coalesced, {executor.cache_hits} served from cache)",
+        "ACI call outcomes: "
+        + (", ".join(f"{outcome} {count}" for outcome, count in sorted(resilient_executor.outcomes.items())) or "none"),
+    ]
+    if len(results) >= 2:
+        seconds = sorted(result.seconds for result in results)
+        quantiles = statistics.quantiles(seconds, n=20, method="inclusive")
+        lines.append(f"task latency: p50 {statistics.median(seconds):.1f}s, p95 {quantiles[18]:.1f}s, max {seconds[-1]:.1f}s")
+    rprint(Panel("\n".join(lines), title="Batch Completed", style="bold green"))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the agent tasks of a JSONL file concurrently")
+    parser.add_argument("tasks", help="JSONL file with one task per line")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file the results are appended to")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of tasks running at once")
+    parser.add_argument("--rate-limit", action="append", default=[], metavar="PROVIDER=RPS",
+                        help="requests per second for a provider (openai, aci), can be repeated")
+    parser.add_argument("--cache-ttl", type=float, default=0.0,
+                        help="seconds the results of idempotent functions are reused (ACI_IDEMPOTENT_FUNCTIONS)")
+    parser.add_argument("--max-retries", type=int, default=3, help="retries of an ACI call failing transiently")
+    parser.add_argument("--call-timeout", type=float, default=30.0, help="seconds an ACI call may take")
+    parser.add_argument("--run-timeout", type=float, default=300.0,
+                        help="seconds after the start of a task (model time included) after which its next ACI "
+                             "call fails the task, 0 for no limit")
+    parser.add_argument("--usage", metavar="FILE", help="JSON file the token accounting of the batch is written to")
+    parser.add_argument("--trace", metavar="FILE", help="JSONL file the spans of the runs are appended to")
+    parser.add_argument("--trace-console", action="store_true", help="print the spans of the runs")
+    parser.add_argument("--resume", action="store_true", help="skip the tasks already in the output file")
+    parser.add_argument("--linked-account-owner-id", default=os.getenv("LINKED_ACCOUNT_OWNER_ID", ""),
+                        help="linked account owner of the tasks that do not set one")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_batch(parse_args()))
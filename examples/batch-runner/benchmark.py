@@ -0,0 +1,415 @@
+"""
+Benchmark of the three agent patterns on a shared task set, to choose the pattern per workload.
+
+Runs every task of benchmark_tasks.jsonl with each pattern of agent_loops.py (pre_planned, discovery,
+discovery_execute) and compares, per pattern and per task: the turns, the input and output tokens
+(and the share of the input spent on tool definitions), the tool calls, the ACI requests and the
+wall time of the runs.
+
+By default nothing leaves the machine:
+
+- the model is scripted: each task lists the function calls ("steps") solving it, which the
+  scripted model plays the way each pattern needs them (all the calls up front with pre_planned, a
+  search before each new function with the discovery patterns, through ACI_EXECUTE_FUNCTION with
+  discovery_execute) before answering. Its token usage is estimated from the requests it receives,
+  and each request takes --model-latency-ms plus --ms-per-1k-input-tokens
+- ACI is stubbed in process with the fixture catalog of the mock ACI server (../mock-aci), each
+  call taking --aci-latency-ms
+
+With the scripted model, the turns and tool calls of each pattern follow from the task's steps
+(they are fixed by the script, not measured), so the comparison is of the tokens, the ACI requests
+and the wall time.
+
+--model openai sends the requests to OpenAI instead (the turns and answers are then the model's
+own), and --aci sdk uses the ACI SDK, e.g. pointed at the mock ACI server with ACI_SERVER_URL. With
+--recording, the responses of OpenAI and their latency are appended to a JSONL file, which
+--model replay plays back: the turns, tool calls and tokens are then a real model's, measured once
+and compared offline and repeatably afterwards. A replayed run fails when it asks for a turn that
+was not recorded (e.g. after the tasks or the stubbed ACI changed), record again then.
+
+Usage:
+    python benchmark.py --repeat 3 --output benchmark.json
+    python benchmark.py --model openai --aci sdk --patterns discovery discovery_execute
+    python benchmark.py --model openai --recording responses.jsonl
+    python benchmark.py --model replay --recording responses.jsonl --output benchmark.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import SimpleNamespace
+
+from aci.meta_functions import ACIExecuteFunction, ACISearchFunctions
+from dotenv import load_dotenv
+from rich import print as rprint
+from rich.table import Table
+
+from agent_loops import PATTERNS, FunctionExecutor, Model, RunResult, Task, run_task
+from token_accounting import TokenLedger, estimate_tokens
+
+load_dotenv()
+
+DEFAULT_TASKS = Path(__file__).with_name("benchmark_tasks.jsonl")
+DEFAULT_CATALOG = Path(__file__).resolve().parent.parent / "mock-aci" / "functions.json"
+
+
+@dataclass
+class BenchmarkTask:
+    id: str
+    prompt: str
+    # the function calls solving the task: intent (for ACI_SEARCH_FUNCTIONS), function, arguments,
+    # and after_previous when the call needs the result of the previous one
+    steps: list[dict]
+    answer: str = "Done."
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BenchmarkTask":
+        return cls(id=str(data["id"]), prompt=data["prompt"], steps=data["steps"], answer=data.get("answer", "Done."))
+
+    def to_task(self, pattern: str, model: str, linked_account_owner_id: str) -> Task:
+        return Task(
+            id=self.id,
+            prompt=self.prompt,
+            pattern=pattern,
+            functions=list(dict.fromkeys(step["function"] for step in self.steps)),
+            model=model,
+            linked_account_owner_id=linked_account_owner_id,
+        )
+
+
+def script(task: BenchmarkTask, pattern: str, search_limit: int) -> list[list[tuple[str, dict]]]:
+    """The tool calls of every turn of a run of the task with the pattern, the answer comes after the last turn"""
+    turns: list[list[tuple[str, dict]]] = []
+    if pattern == "pre_planned":
+        for step in task.steps:
+            if not turns or step.get("after_previous"):
+                turns.append([])
+            turns[-1].append((step["function"], step["arguments"]))
+        return turns
+
+    searched = set()
+    for step in task.steps:
+        if step["function"] not in searched:
+            searched.add(step["function"])
+            turns.append([(ACISearchFunctions.get_name(), {"intent": step["intent"], "limit": search_limit})])
+        if pattern == "discovery":
+            turns.append([(step["function"], step["arguments"])])
+        else:
+            arguments = {"function_name": step["function"], "function_arguments": step["arguments"]}
+            turns.append([(ACIExecuteFunction.get_name(), arguments)])
+    return turns
+
+
+@dataclass
+class _Function:
+    name: str
+    arguments: str
+
+
+@dataclass
+class _ToolCall:
+    id: str
+    function: _Function
+    type: str = "function"
+
+    def model_dump(self) -> dict:
+        return asdict(self)
+
+
+def request_key(messages: list[dict], tools: list[dict]) -> tuple[str, str, int]:
+    """The task prompt, the pattern and the turn of a model request of a run"""
+    tool_names = {tool["function"]["name"] for tool in tools}
+    if ACIExecuteFunction.get_name() in tool_names:
+        pattern = "discovery_execute"
+    elif ACISearchFunctions.get_name() in tool_names:
+        pattern = "discovery"
+    else:
+        pattern = "pre_planned"
+    prompt = next(message["content"] for message in messages if message["role"] == "user")
+    turn = sum(1 for message in messages if message["role"] == "assistant")
+    return prompt, pattern, turn
+
+
+class ScriptedClient:
+    """Stands in for AsyncOpenAI, answering every request with the next turn of the task's script"""
+
+    def __init__(
+        self, tasks: list[BenchmarkTask], latency_ms: float, ms_per_1k_input_tokens: float, search_limit: int
+    ):
+        self.tasks = {task.prompt: task for task in tasks}
+        self.latency_ms = latency_ms
+        self.ms_per_1k_input_tokens = ms_per_1k_input_tokens
+        self.search_limit = search_limit
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages: list[dict], tools: list[dict], **kwargs) -> SimpleNamespace:
+        prompt, pattern, turn = request_key(messages, tools)
+        task = self.tasks[prompt]
+        turns = script(task, pattern, self.search_limit)
+
+        input_tokens = estimate_tokens(messages) + estimate_tokens(tools)
+        await asyncio.sleep((self.latency_ms + input_tokens * self.ms_per_1k_input_tokens / 1000) / 1000)
+
+        content, tool_calls = None, None
+        if turn < len(turns):
+            tool_calls = [
+                _ToolCall(id=f"call_{turn}_{index}", function=_Function(name, json.dumps(arguments)))
+                for index, (name, arguments) in enumerate(turns[turn])
+            ]
+        else:
+            content = task.answer
+        output_tokens = estimate_tokens(content or [tool_call.model_dump() for tool_call in tool_calls])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=tool_calls))],
+            usage=SimpleNamespace(prompt_tokens=input_tokens, completion_tokens=max(output_tokens, 1)),
+        )
+
+
+class RecordingClient:
+    """Wraps AsyncOpenAI, appending every response and its latency to a JSONL file for ReplayClient"""
+
+    def __init__(self, client, path: str | Path):
+        self.client = client
+        self.path = Path(path)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages: list[dict], tools: list[dict], **kwargs):
+        started_at = time.perf_counter()
+        response = await self.client.chat.completions.create(messages=messages, tools=tools, **kwargs)
+        prompt, pattern, turn = request_key(messages, tools)
+        record = {
+            "prompt": prompt,
+            "pattern": pattern,
+            "turn": turn,
+            "seconds": time.perf_counter() - started_at,
+            "response": response.model_dump(mode="json"),
+        }
+        with self.path.open("a", encoding="utf-8") as recording:
+            recording.write(json.dumps(record) + "\n")
+        return response
+
+
+class ReplayClient:
+    """
+    Stands in for AsyncOpenAI, answering every request with the response recorded for the same task,
+    pattern and turn (in the recorded order when the runs were repeated), after the recorded latency
+    """
+
+    def __init__(self, path: str | Path):
+        # the recorded responses are parsed back into the OpenAI types the agent loop reads
+        from openai.types.chat import ChatCompletion
+
+        self.responses: dict[tuple[str, str, int], list[tuple[float, ChatCompletion]]] = defaultdict(list)
+        with open(path, encoding="utf-8") as recording:
+            for line in recording:
+                if line.strip():
+                    record = json.loads(line)
+                    key = (record["prompt"], record["pattern"], record["turn"])
+                    self.responses[key].append((record["seconds"], ChatCompletion.model_validate(record["response"])))
+        self.replays: dict[tuple[str, str, int], int] = defaultdict(int)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages: list[dict], tools: list[dict], **kwargs):
+        key = request_key(messages, tools)
+        recorded = self.responses.get(key)
+        if not recorded:
+            _, pattern, turn = key
+            raise LookupError(f"no recorded response for turn {turn + 1} of the {pattern} run, record the task again")
+        seconds, response = recorded[self.replays[key] % len(recorded)]
+        self.replays[key] += 1
+        await asyncio.sleep(seconds)
+        return response
+
+
+class StubACI:
+    """Stands in for the ACI client with the functions of a fixture catalog, like the mock ACI server"""
+
+    def __init__(self, catalog_path: str | Path, latency_ms: float):
+        catalog = json.loads(Path(catalog_path).read_text(encoding="utf-8"))
+        self.catalog = {function["name"]: function for function in catalog}
+        self.latency_ms = latency_ms
+        self.functions = SimpleNamespace(get_definition=self.get_definition)
+
+    def _definition(self, function: dict) -> dict:
+        return {
+            "type": "function",
+            "function": {k: function[k] for k in ("name", "description", "parameters")},
+        }
+
+    def get_definition(self, function_name: str, format=None) -> dict:
+        # a blocking sleep is fine, FunctionExecutor runs the ACI client calls with asyncio.to_thread
+        time.sleep(self.latency_ms / 1000)
+        return self._definition(self.catalog[function_name])
+
+    def search(self, intent: str, limit: int) -> list[dict]:
+        words = set(re.findall(r"[a-z0-9]+", intent.lower()))
+        scored = []
+        for position, function in enumerate(self.catalog.values()):
+            text = f"{function['name'].replace('_', ' ')} {function['description']}".lower()
+            scored.append((-len(words & set(re.findall(r"[a-z0-9]+", text))), position, function))
+        return [self._definition(function) for _, _, function in sorted(scored)[:limit]]
+
+    def handle_function_call(self, function_name: str, function_arguments: dict, **kwargs):
+        time.sleep(self.latency_ms / 1000)  # in a worker thread, see get_definition
+        if function_name == ACISearchFunctions.get_name():
+            return self.search(function_arguments.get("intent", ""), function_arguments.get("limit") or 100)
+        if function_name == ACIExecuteFunction.get_name():
+            function_name = function_arguments["function_name"]
+            function_arguments = function_arguments.get("function_arguments", {})
+        function = self.catalog.get(function_name)
+        if function is None:
+            return {"success": False, "error": f"Function {function_name} not found"}
+        return {"success": True, "data": function.get("mock_response", {"arguments": function_arguments})}
+
+
+def summarize(results: list[RunResult], ledger: TokenLedger, aci_requests: int) -> dict:
+    totals = ledger.totals()
+    input_tokens = totals.get("input_tokens", 0)
+    seconds = [result.seconds for result in results]
+    return {
+        "runs": len(results),
+        "succeeded": sum(1 for result in results if not result.error),
+        "turns": statistics.mean(result.turns for result in results),
+        "tool_calls": statistics.mean(len(result.tool_calls) for result in results),
+        "aci_requests": aci_requests / len(results),
+        "input_tokens": statistics.mean(result.input_tokens for result in results),
+        "output_tokens": statistics.mean(result.output_tokens for result in results),
+        "tool_definition_share": totals.get("tool_definitions", 0) / input_tokens if input_tokens else 0.0,
+        "seconds_p50": statistics.median(seconds),
+        "seconds_mean": statistics.mean(seconds),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    with open(args.tasks, encoding="utf-8") as tasks_file:
+        tasks = [BenchmarkTask.from_dict(json.loads(line)) for line in tasks_file if line.strip()]
+
+    if args.model == "scripted":
+        client = ScriptedClient(tasks, args.model_latency_ms, args.ms_per_1k_input_tokens, args.search_limit)
+        model = Model(client)
+    elif args.model == "replay":
+        model = Model(ReplayClient(args.recording))
+    else:
+        model = Model()
+        if args.recording:
+            model.client = RecordingClient(model.client, args.recording)
+    executor = FunctionExecutor(StubACI(args.catalog, args.aci_latency_ms) if args.aci == "stub" else None)
+    linked_account_owner_id = os.getenv("LINKED_ACCOUNT_OWNER_ID") or "benchmark"
+
+    # pattern -> results, token accounts and ACI requests of its runs, and task -> pattern -> results
+    results: dict[str, list[RunResult]] = defaultdict(list)
+    ledgers = {pattern: TokenLedger() for pattern in args.patterns}
+    aci_requests: dict[str, int] = defaultdict(int)
+    per_task: dict[str, dict[str, list[RunResult]]] = defaultdict(lambda: defaultdict(list))
+    for _ in range(args.repeat):
+        for task in tasks:
+            for pattern in args.patterns:
+                calls_before = executor.calls
+                result = await run_task(
+                    model,
+                    executor,
+                    task.to_task(pattern, args.model_name, linked_account_owner_id),
+                    ledgers[pattern].new_run(task.id, pattern),
+                )
+                aci_requests[pattern] += executor.calls - calls_before
+                results[pattern].append(result)
+                per_task[task.id][pattern].append(result)
+                status = f"[red]failed: {result.error}[/red]" if result.error else "[green]done[/green]"
+                rprint(f"{task.id} {pattern}: {status} in {result.seconds:.2f}s, {result.turns} turns")
+
+    return {
+        "patterns": {
+            pattern: summarize(results[pattern], ledgers[pattern], aci_requests[pattern]) for pattern in args.patterns
+        },
+        "tasks": {
+            task_id: {
+                pattern: {
+                    "turns": statistics.mean(result.turns for result in pattern_results),
+                    "input_tokens": statistics.mean(result.input_tokens for result in pattern_results),
+                    "seconds_mean": statistics.mean(result.seconds for result in pattern_results),
+                }
+                for pattern, pattern_results in patterns.items()
+            }
+            for task_id, patterns in per_task.items()
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    table = Table(title="Patterns (mean per run)")
+    for column in ("pattern", "succeeded", "turns", "tool calls", "ACI requests", "input tokens",
+                   "tool definitions", "output tokens", "p50 s", "mean s"):
+        table.add_column(column, justify="left" if column == "pattern" else "right")
+    for pattern, summary in report["patterns"].items():
+        table.add_row(
+            pattern,
+            f"{summary['succeeded']}/{summary['runs']}",
+            f"{summary['turns']:.1f}",
+            f"{summary['tool_calls']:.1f}",
+            f"{summary['aci_requests']:.1f}",
+            f"{summary['input_tokens']:.0f}",
+            f"{100 * summary['tool_definition_share']:.0f}%",
+            f"{summary['output_tokens']:.0f}",
+            f"{summary['seconds_p50']:.2f}",
+            f"{summary['seconds_mean']:.2f}",
+        )
+    rprint(table)
+
+    patterns = list(report["patterns"])
+    table = Table(title="Tasks (turns / input tokens / mean seconds)")
+    table.add_column("task")
+    for pattern in patterns:
+        table.add_column(pattern, justify="right")
+    for task_id, task_patterns in report["tasks"].items():
+        table.add_row(
+            task_id,
+            *(
+                f"{task_patterns[pattern]['turns']:.1f} / {task_patterns[pattern]['input_tokens']:.0f} / "
+                f"{task_patterns[pattern]['seconds_mean']:.2f}"
+                for pattern in patterns
+            ),
+        )
+    rprint(table)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the agent patterns on a shared task set")
+    parser.add_argument("--tasks", default=DEFAULT_TASKS, help="JSONL file with the benchmark tasks")
+    parser.add_argument("--patterns", nargs="+", choices=PATTERNS, default=list(PATTERNS))
+    parser.add_argument("--repeat", type=int, default=1, help="runs of every task with every pattern")
+    parser.add_argument("--output", metavar="FILE", help="JSON file the report is written to")
+    parser.add_argument("--model", choices=("scripted", "openai", "replay"), default="scripted")
+    parser.add_argument("--recording", metavar="FILE",
+                        help="JSONL file the responses are appended to with --model openai, and replayed from with --model replay")
+    parser.add_argument("--model-name", default="gpt-4o", help="model requested, and sent to OpenAI with --model openai")
+    parser.add_argument("--model-latency-ms", type=float, default=500.0, help="latency of a scripted model request")
+    parser.add_argument("--ms-per-1k-input-tokens", type=float, default=20.0,
+                        help="extra latency of a scripted model request per 1000 input tokens")
+    parser.add_argument("--search-limit", type=int, default=3, help="results asked per ACI_SEARCH_FUNCTIONS call by the scripted model")
+    parser.add_argument("--aci", choices=("stub", "sdk"), default="stub")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="functions of the stubbed ACI")
+    parser.add_argument("--aci-latency-ms", type=float, default=150.0, help="latency of a stubbed ACI call")
+    args = parser.parse_args()
+    if args.model == "replay" and not args.recording:
+        parser.error("--model replay needs --recording, the file to replay")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        rprint(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Retries, backoff, circuit breakers and timeout budgets around the ACI function executions.
+
+ResilientExecutor wraps a FunctionExecutor so a flaky upstream app does not tie up the workers of a
+batch or waste model turns:
+
+- transient errors (timeouts, connection errors, 408/429/5xx responses, which the ACI SDK raises as
+  RateLimitError, ServerError and UnknownError) are retried with jittered exponential backoff;
+  calls to non-idempotent functions are only retried when the request never reached ACI
+  (connection refused, 429), so e.g. a repository is never starred twice. The SDK's own retries
+  are turned off on the wrapped executor, so every attempt is made (and counted) here
+- each call is limited to call_timeout seconds, and to what is left of the run's budget (see
+  run_budget()): a wall-clock deadline counted from the start of the run, model requests included;
+  once it has passed, the next ACI call stops the run instead of asking the model again
+- every function has a circuit breaker: after failure_threshold consecutive transient failures it
+  rejects the calls for reset_timeout seconds, then lets one trial call through
+- every outcome is counted in `outcomes`
+
+Note that the ACI client is synchronous: a call that times out is abandoned, but its thread only
+ends when the request does, so a timed out execution may still take effect on ACI after it was
+counted as a timeout. That is why a timeout is only retried for idempotent functions.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import random
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Iterator
+
+import httpx
+from aci._exceptions import RateLimitError, ServerError, UnknownError
+from opentelemetry import trace
+
+from agent_loops import AbortRun, FunctionExecutor
+from single_flight import executed_function, idempotent_functions_from_env
+
+tracer = trace.get_tracer(__name__)
+
+TRANSIENT_STATUS_CODES = {408, 425, 429, *range(500, 600)}
+
+# monotonic deadline of the current run, None when the run has no budget
+_run_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("run_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """The function failed too often recently, the call was not sent"""
+
+
+class RunBudgetExhaustedError(AbortRun):
+    """The run spent its time budget"""
+
+
+@contextlib.contextmanager
+def run_budget(seconds: float | None) -> Iterator[None]:
+    """
+    Set a wall-clock deadline `seconds` from now for the ACI calls made inside the block (e.g. one
+    agent run): the time spent on the model counts too, and no ACI call is made after the deadline
+    """
+    token = _run_deadline.set(time.monotonic() + seconds if seconds else None)
+    try:
+        yield
+    finally:
+        _run_deadline.reset(token)
+
+
+def _status_code(error: BaseException) -> int | None:
+    """The HTTP status of the error, the ACI SDK only keeps it on the chained httpx.HTTPStatusError"""
+    while error is not None:
+        status_code = getattr(error, "status_code", None)
+        if status_code is None:
+            status_code = getattr(getattr(error, "response", None), "status_code", None)
+        if status_code is not None:
+            return status_code
+        error = error.__cause__
+    return None
+
+
+def is_transient(error: Exception) -> bool:
+    status_code = _status_code(error)
+    if status_code is not None:
+        return status_code in TRANSIENT_STATUS_CODES
+    return isinstance(
+        error,
+        (TimeoutError, asyncio.TimeoutError, ConnectionError, httpx.TransportError)
+        + (ServerError, RateLimitError, UnknownError),
+    )
+
+
+def never_sent(error: Exception) -> bool:
+    """Whether the request failed before ACI processed it, so retrying it can not repeat its effect"""
+    return isinstance(error, (ConnectionRefusedError, httpx.ConnectError, httpx.ConnectTimeout, RateLimitError)) or (
+        _status_code(error) == 429
+    )
+
+
+# how CircuitBreaker.allow() admitted a call: only the call admitted as TRIAL ends the trial
+CLOSED = "closed"
+TRIAL = "trial"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_in_flight = False
+
+    def allow(self) -> str | None:
+        """CLOSED or TRIAL when the call may go through, None when it is rejected"""
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+            return None
+        # half open: let one trial call through
+        self.trial_in_flight = True
+        return TRIAL
+
+    def end_trial(self) -> None:
+        self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures, self.opened_at = 0, None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ResilientExecutor:
+    def __init__(
+        self,
+        executor: FunctionExecutor,
+        idempotent_functions: set[str] | None = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        call_timeout: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.executor = executor
+        # the retries are made here, the SDK retrying 5xx and 429 again (writes included) under every
+        # attempt would multiply the calls and ignore idempotent_functions
+        executor.sdk_retries = False
+        self.idempotent_functions = (
+            idempotent_functions if idempotent_functions is not None else idempotent_functions_from_env()
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.call_timeout = call_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.outcomes: Counter[str] = Counter()
+
+    @property
+    def calls(self) -> int:
+        return self.executor.calls
+
+    def _breaker(self, function_name: str) -> CircuitBreaker:
+        if function_name not in self.breakers:
+            self.breakers[function_name] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[function_name]
+
+    def _timeout(self) -> float:
+        deadline = _run_deadline.get()
+        if deadline is None:
+            return self.call_timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.outcomes["budget_exhausted"] += 1
+            raise RunBudgetExhaustedError("the run spent its time budget")
+        return min(self.call_timeout, remaining)
+
+    async def _call(self, function_name: str, idempotent: bool, call: Callable[[], Awaitable[Any]]) -> Any:
+        breaker = self._breaker(function_name)
+        for attempt in range(self.max_retries + 1):
+            # before allow(), so a spent budget can not leave a half-open trial in flight
+            timeout = self._timeout()
+            admission = breaker.allow()
+            if admission is None:
+                self.outcomes["circuit_open"] += 1
+                raise CircuitOpenError(f"{function_name} is failing, not called for up to {self.reset_timeout:.0f}s")
+            try:
+                result = await asyncio.wait_for(call(), timeout=timeout)
+            except asyncio.TimeoutError as e:
+                self.outcomes["timeout"] += 1
+                breaker.record_failure()
+                error: Exception = e
+            except Exception as e:
+                if not is_transient(e):
+                    # e.g. invalid arguments, retrying would fail the same way
+                    self.outcomes["error"] += 1
+                    breaker.record_success()
+                    raise
+                self.outcomes["transient_error"] += 1
+                breaker.record_failure()
+                error = e
+            else:
+                self.outcomes["success"] += 1
+                breaker.record_success()
+                return result
+            finally:
+                # a cancelled trial records no outcome, it must not block the next trial forever
+                if admission == TRIAL:
+                    breaker.end_trial()
+
+            if attempt == self.max_retries or not (idempotent or never_sent(error)):
+                raise error
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+            deadline = _run_deadline.get()
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise error
+            self.outcomes["retried"] += 1
+            with tracer.start_as_current_span(
+                "aci.backoff", attributes={"aci.function_name": function_name, "aci.attempt": attempt + 1}
+            ):
+                await asyncio.sleep(delay)
+
+    async def get_definition(self, function_name: str) -> dict:
+        return await self._call(function_name, True, lambda: self.executor.get_definition(function_name))
+
+    async def execute(self, function_name: str, function_arguments: dict, linked_account_owner_id: str) -> Any:
+        target = executed_function(function_name, function_arguments)
+        return await self._call(
+            target,
+            target in self.idempotent_functions,
+            lambda: self.executor.execute(function_name, function_arguments, linked_account_owner_id),
+        )
@@ -0,0 +1,126 @@
+"""
+Single-flight deduplication of identical concurrent ACI function executions.
+
+When many tasks of a batch run the same read-only function with the same arguments at once (e.g.
+BRAVE_SEARCH__WEB_SEARCH on the same query, GITHUB__GET_REPOSITORY on the same repo), each of them
+would send its own request to ACI. SingleFlightExecutor wraps a FunctionExecutor so that, for the
+functions marked idempotent only:
+
+- identical calls (same function, arguments and linked account owner) in flight at the same time
+  share one request and its result (or its error)
+- optionally, successful results are kept for a short TTL and reused by identical calls made after
+  it (failed ones are not, so a transient failure is retried by the next call)
+
+Calls through ACI_EXECUTE_FUNCTION are judged on the function they execute. Function definitions
+do not change during a batch, so they are always fetched once and cached.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from aci.meta_functions import ACIExecuteFunction
+
+from agent_loops import FunctionExecutor
+
+DEFAULT_IDEMPOTENT_FUNCTIONS = "ACI_SEARCH_FUNCTIONS,BRAVE_SEARCH__WEB_SEARCH,GITHUB__GET_REPOSITORY"
+
+
+def idempotent_functions_from_env() -> set[str]:
+    names = os.getenv("ACI_IDEMPOTENT_FUNCTIONS", DEFAULT_IDEMPOTENT_FUNCTIONS)
+    return {name.strip() for name in names.split(",") if name.strip()}
+
+
+def executed_function(function_name: str, function_arguments: dict) -> str:
+    """The function a call executes, looking through ACI_EXECUTE_FUNCTION"""
+    if function_name == ACIExecuteFunction.get_name():
+        return function_arguments.get("function_name", "")
+    return function_name
+
+
+def is_error_result(result: Any) -> bool:
+    """Whether ACI returned the call as failed, e.g. {"success": false, "error": "..."}"""
+    return isinstance(result, dict) and result.get("success") is False
+
+
+class SingleFlightExecutor:
+    def __init__(
+        self,
+        executor: FunctionExecutor,
+        idempotent_functions: set[str] | None = None,
+        ttl_seconds: float = 0.0,
+        max_cached: int = 1024,
+    ):
+        """
+        Args:
+            executor: The executor the requests are sent through
+            idempotent_functions: The functions safe to deduplicate (read-only ones)
+            ttl_seconds: How long results are reused after their request completed, 0 to only share
+                the results of in-flight requests
+            max_cached: The maximum number of results kept for the TTL
+        """
+        self.executor = executor
+        self.idempotent_functions = (
+            idempotent_functions if idempotent_functions is not None else idempotent_functions_from_env()
+        )
+        self.ttl_seconds = ttl_seconds
+        self.max_cached = max_cached
+
+        self.in_flight: dict[str, asyncio.Task] = {}
+        self.results: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.definitions: dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    @property
+    def calls(self) -> int:
+        """Requests actually sent to ACI"""
+        return self.executor.calls
+
+    async def get_definition(self, function_name: str) -> dict:
+        task = self.definitions.get(function_name)
+        if task is None or (task.done() and (task.cancelled() or task.exception())):
+            task = asyncio.create_task(self.executor.get_definition(function_name))
+            self.definitions[function_name] = task
+        else:
+            self.cache_hits += 1
+        # shielded, so a cancelled task does not cancel the fetch the other tasks wait for
+        return await asyncio.shield(task)
+
+    async def execute(self, function_name: str, function_arguments: dict, linked_account_owner_id: str) -> Any:
+        if executed_function(function_name, function_arguments) not in self.idempotent_functions:
+            return await self.executor.execute(function_name, function_arguments, linked_account_owner_id)
+
+        key = json.dumps([function_name, function_arguments, linked_account_owner_id], sort_keys=True, default=str)
+        if key in self.results:
+            expires_at, result = self.results[key]
+            if time.monotonic() < expires_at:
+                self.cache_hits += 1
+                return result
+            del self.results[key]
+
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._execute_and_cache(
+                    key, lambda: self.executor.execute(function_name, function_arguments, linked_account_owner_id)
+                )
+            )
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _execute_and_cache(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        result = await call()
+        # neither raised errors nor error results ({"success": false, ...}) are cached: a transient
+        # failure would otherwise be replayed to every identical call for the whole TTL
+        if self.ttl_seconds > 0 and not is_error_result(result):
+            self.results[key] = (time.monotonic() + self.ttl_seconds, result)
+            if len(self.results) > self.max_cached:
+                self.results.popitem(last=False)
+        return result
@@ -1,70 +1,78 @@
 #!/usr/bin/env python3
 import asyncio
 import os
-import json
-from collections import defaultdict
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
 from rich import print as rprint
 
-from camel.agents import ChatAgent
-from camel.messages import BaseMessage
-from camel.models import ModelFactory
-from camel.toolkits import MCPToolkit
-from camel.types import ModelPlatformType
+if TYPE_CHECKING:
+    from camel.agents import ChatAgent
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from tool_output_summary import answer_or_summary_prompt, get_summariser  # noqa: E402
 
 load_dotenv()
+
+
 async def summarize_tool_outputs(model, response, query):
     """
-    Summarize the results of tool calls and generate a natural language response.
-    
+    Summarize the results of tool calls and generate a natural language response, only calling
+    the model when the tool outputs are too large for a template (see tool_output_summary.py).
+
     Args:
         model: The model instance
         response: The response containing tool call results
         query: The original user query
-        
+
     Returns:
         str: A natural language summary of the tool call results
     """
-
-    summariser_system_msg = BaseMessage.make_assistant_message(
-        role_name="Summariser",
-        content="You summarise tool outputs without calling any tools."
-    )
-    agent = ChatAgent(
-        system_message=summariser_system_msg,
-        model=model,
-        tools=[]# ensure no tool recursion
-    )        
-    info = getattr(response, "info", {})
-    tool_calls = info.get("tool_calls", [])
-    # Return original response if no tools were called
-    if not tool_calls:
-        rprint("\n[dim]No tools were called[/dim]")
-        if hasattr(response, "msg") and response.msg:
-            return response.msg.content
-        if hasattr(response, "msgs") and response.msgs:
-            return response.msgs[-1].content
-        return str(response)
-
-    # Process tool call results and generate summary
-    structured_results: dict[str, list] = defaultdict(list)
-    for record in tool_calls:
-        # Ensure every value is JSON-serialisable
-        value = record.result
-        if not isinstance(value, (str, int, float, bool, list, dict, type(None))):
-            value = str(value)
-        structured_results[record.tool_name].append(value)
-
-    tool_outputs_json = json.dumps(structured_results, ensure_ascii=False, indent=2)
-    summary_prompt = f"""Please summarize the following tool call results:{tool_outputs_json} and answer the user's question:{query} in natural language."""
-    summary_response = await agent.astep(summary_prompt)
+    answer, summary_prompt = answer_or_summary_prompt(response, query)
+    if answer is not None:
+        return answer
+    summary_response = await get_summariser(model).astep(summary_prompt)
     rprint(f"\n[dim]Summary response: {summary_response}[/dim]")
     return summary_response.msg.content
 
 
+def create_model():
+    """Setup gemini model"""
+    # camel is imported when the model and agent are built, not when this module is imported (see mcp_worker.py)
+    from camel.models import ModelFactory
+    from camel.types import ModelPlatformType
+
+    return ModelFactory.create(
+        model_platform=ModelPlatformType.GEMINI,
+        model_type="gemini-2.0-flash-001", 
+        api_key=os.getenv("GOOGLE_API_KEY"),
+        model_config_dict={"temperature": 0.7, "max_tokens": 8000},
+    )
+
+
+def create_agent(model, tools) -> "ChatAgent":
+    """Create camel agent with the MCP tools"""
+    from camel.agents import ChatAgent
+    from camel.messages import BaseMessage
+
+    system_message = BaseMessage.make_assistant_message(
+        role_name="Assistant",
+        content="You are a helpful assistant with access to search, GitHub, and arXiv tools.",
+    )
+    return ChatAgent(
+        system_message=system_message, 
+        model=model, 
+        tools=tools
+    )
+
+
 async def main():
     mcp_toolkit = None
     try:
+        from camel.toolkits import MCPToolkit
         from create_config import create_config
         
         rprint("[green]CAMEL AI Agent with MCP Toolkit[/green]")
@@ -81,24 +89,10 @@ async def main():
         rprint(f"Connected successfully. Found [cyan]{len(tools)}[/cyan] tools available")
 
         # Setup gemini model
-        model = ModelFactory.create(
-            model_platform=ModelPlatformType.GEMINI,
-            model_type="gemini-2.0-flash-001", 
-            api_key=os.getenv("GOOGLE_API_KEY"),
-            model_config_dict={"temperature": 0.7, "max_tokens": 8000},
-        )
-
-        system_message = BaseMessage.make_assistant_message(
-            role_name="Assistant",
-            content="You are a helpful assistant with access to search, GitHub, and arXiv tools.",
-        )
+        model = create_model()
 
         # Create camel agent
-        agent = ChatAgent(
-            system_message=system_message, 
-            model=model, 
-            tools=tools
-        )
+        agent = create_agent(model, tools)
 
         rprint("[green]Agent ready[/green]")
         
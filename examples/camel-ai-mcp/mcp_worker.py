@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Long-running worker for the CAMEL MCP example.
+
+aci_mcp_camel.py writes the config, spawns the ACI MCP server, connects, answers one query and tears
+everything down. This worker connects once and then answers a stream of queries over the same MCP
+connection, so the server startup is paid once instead of once per query.
+
+Queries are read one per line, either as plain text or as JSON ({"id": ..., "query": ...}), and each
+answer is written as one JSON line ({"id", "query", "answer", "tool_calls", "seconds"} or "error").
+
+Usage:
+    python mcp_worker.py < queries.txt                          # stdin to stdout
+    python mcp_worker.py --input queries.jsonl --output answers.jsonl
+    python mcp_worker.py --port 8766                            # local socket, e.g. `nc 127.0.0.1 8766`
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from typing import TYPE_CHECKING
+
+from rich.console import Console
+
+from aci_mcp_camel import create_agent, create_model, summarize_tool_outputs
+from create_config import create_config
+
+if TYPE_CHECKING:
+    from camel.toolkits import MCPToolkit
+
+# logs go to stderr, stdout is reserved for the answers
+console = Console(stderr=True)
+
+
+class MCPWorker:
+    def __init__(self):
+        self.mcp_toolkit: "MCPToolkit | None" = None
+        self.model = None
+        self.agent = None
+        # one agent serves the queries one at a time
+        self.lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        started_at = time.perf_counter()
+        # camel is only imported once the worker starts, so --help and import stay fast
+        from camel.toolkits import MCPToolkit
+
+        with contextlib.redirect_stdout(sys.stderr):
+            create_config()
+        self.mcp_toolkit = MCPToolkit(config_path="config.json")
+        await self.mcp_toolkit.connect()
+        tools = self.mcp_toolkit.get_tools()
+        self.model = create_model()
+        self.agent = create_agent(self.model, tools)
+        console.print(
+            f"[green]Worker ready with {len(tools)} tools in {time.perf_counter() - started_at:.2f}s[/green]"
+        )
+
+    async def stop(self) -> None:
+        if self.mcp_toolkit is not None:
+            await self.mcp_toolkit.disconnect()
+            console.print("[green]MCP connection closed[/green]")
+
+    async def answer(self, line: str) -> dict:
+        """Answer one query line (plain text or JSON) and return the JSON result"""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            request = line
+        if not isinstance(request, dict):
+            request = {"query": line.strip()}
+        result = {"id": request.get("id"), "query": request.get("query")}
+
+        started_at = time.perf_counter()
+        try:
+            async with self.lock:
+                # every query is independent of the previous ones
+                self.agent.reset()
+                response = await self.agent.astep(request["query"])
+                with contextlib.redirect_stdout(sys.stderr):
+                    result["answer"] = await summarize_tool_outputs(self.model, response, request["query"])
+            result["tool_calls"] = len(response.info.get("tool_calls", []))
+        except Exception as e:
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - started_at, 3)
+        return result
+
+    async def serve_lines(self, lines, output) -> None:
+        count = 0
+        async for line in lines:
+            if not line.strip():
+                continue
+            output.write(json.dumps(await self.answer(line), ensure_ascii=False) + "\n")
+            output.flush()
+            count += 1
+        console.print(f"[green]Answered {count} queries[/green]")
+
+    async def serve_socket(self, port: int) -> None:
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            while line := await reader.readline():
+                if line.strip():
+                    result = await self.answer(line.decode())
+                    writer.write((json.dumps(result, ensure_ascii=False) + "\n").encode())
+                    await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", port)
+        console.print(f"[green]Listening on 127.0.0.1:{port}[/green]")
+        async with server:
+            await server.serve_forever()
+
+
+async def read_lines(stream):
+    while line := await asyncio.to_thread(stream.readline):
+        yield line
+
+
+async def main(args: argparse.Namespace) -> None:
+    worker = MCPWorker()
+    try:
+        await worker.start()
+        if args.port:
+            await worker.serve_socket(args.port)
+        else:
+            with contextlib.ExitStack() as stack:
+                source = stack.enter_context(open(args.input)) if args.input else sys.stdin
+                output = stack.enter_context(open(args.output, "a")) if args.output else sys.stdout
+                await worker.serve_lines(read_lines(source), output)
+    finally:
+        await worker.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a stream of queries over one MCP connection")
+    parser.add_argument("--input", help="file with one query per line (defaults to stdin)")
+    parser.add_argument("--output", help="file the JSON answers are appended to (defaults to stdout)")
+    parser.add_argument("--port", type=int, help="serve queries on this local port instead")
+    asyncio.run(main(parser.parse_args()))
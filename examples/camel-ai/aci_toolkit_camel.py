@@ -1,77 +1,73 @@
 #!/usr/bin/env python3
 import os
+import sys
+from pathlib import Path
+
 from dotenv import load_dotenv
 from rich import print as rprint
-from camel.agents import ChatAgent
-from camel.models import ModelFactory
-from camel.toolkits import ACIToolkit
-from collections import defaultdict
-from camel.messages import BaseMessage
-import json
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from tool_output_summary import answer_or_summary_prompt, get_summariser  # noqa: E402
 
 load_dotenv()
 
+
 def summarize_tool_outputs(model, response, query):
     """
-    Summarize the results of tool calls and generate a natural language response.
-    
+    Summarize the results of tool calls and generate a natural language response, only calling
+    the model when the tool outputs are too large for a template (see tool_output_summary.py).
+
     Args:
         model: The model instance
         response: The response containing tool call results
         query: The original user query
-        
+
     Returns:
         str: A natural language summary of the tool call results
     """
-
-    summariser_system_msg = BaseMessage.make_assistant_message(
-        role_name="Summariser",
-        content="You summarise tool outputs without calling any tools."
-    )
-    agent = ChatAgent(
-        system_message=summariser_system_msg,
-        model=model,
-        tools=[]# ensure no tool recursion
-    )        
-    info = getattr(response, "info", {})
-    tool_calls = info.get("tool_calls", [])
-    # Return original response if no tools were called
-    if not tool_calls:
-        rprint("\n[dim]No tools were called[/dim]")
-        if hasattr(response, "msg") and response.msg:
-            return response.msg.content
-        if hasattr(response, "msgs") and response.msgs:
-            return response.msgs[-1].content
-        return str(response)
-
-    # Process tool call results and generate summary
-    structured_results: dict[str, list] = defaultdict(list)
-    for record in tool_calls:
-        # Ensure every value is JSON-serialisable
-        value = record.result
-        if not isinstance(value, (str, int, float, bool, list, dict, type(None))):
-            value = str(value)
-        structured_results[record.tool_name].append(value)
-
-    tool_outputs_json = json.dumps(structured_results, ensure_ascii=False, indent=2)
-    rprint(f"\n[dim]Tool outputs: {tool_outputs_json}[/dim]")
-    summary_prompt = f"""Please summarize the following tool call results:{tool_outputs_json} and answer the user's question:{query} in natural language."""
-    summary_response = agent.step(summary_prompt)
+    answer, summary_prompt = answer_or_summary_prompt(response, query)
+    if answer is not None:
+        return answer
+    summary_response = get_summariser(model).step(summary_prompt)
     rprint(f"\n[dim]Summary response: {summary_response}[/dim]")
     return summary_response.msg.content
 
 
 def main():
     """Main function to run the CAMEL AI agent with ACI toolkit."""
+    # camel (also imported by filtered_aci_tools) is only loaded when the agent runs
+    from camel.agents import ChatAgent
+    from camel.models import ModelFactory
+    from camel.toolkits import ACIToolkit
+    from camel.messages import BaseMessage
+
+    from filtered_aci_tools import FilteredACITools
+
     rprint("[green]CAMEL AI with ACI Toolkit[/green]")
 
     # Initialize with linked account from environment or use default
     linked_account_owner_id = os.getenv("LINKED_ACCOUNT_OWNER_ID", "parthshr370")
     rprint(f"Using account: [cyan]{linked_account_owner_id}[/cyan]")
 
-    # Initialize ACI toolkit and get available tools
-    aci_toolkit = ACIToolkit(linked_account_owner_id=linked_account_owner_id)
-    tools = aci_toolkit.get_tools()
+    # Get user input, used to pick the relevant tools in discovery mode
+    query = input("\nEnter your query: ")
+
+    # Only load the tools of the allowed apps (or the ones relevant to the query in discovery mode),
+    # instead of the whole catalog from ACIToolkit(...).get_tools()
+    allowed_apps = [app for app in os.getenv("ACI_ALLOWED_APPS", "BRAVE_SEARCH,GITHUB,ARXIV").split(",") if app]
+    tool_discovery = os.getenv("ACI_TOOL_DISCOVERY", "false").lower() == "true"
+    if allowed_apps or tool_discovery:
+        aci_tools = FilteredACITools(
+            linked_account_owner_id=linked_account_owner_id,
+            apps=allowed_apps or None,
+            intent=query if tool_discovery else None,
+        )
+        tools = aci_tools.get_tools()
+        rprint(f"Tool schemas cost: [cyan]~{aci_tools.schema_token_cost()}[/cyan] tokens per request")
+    else:
+        aci_toolkit = ACIToolkit(linked_account_owner_id=linked_account_owner_id)
+        tools = aci_toolkit.get_tools()
     
     
     rprint(f"\nTotal tools loaded: [cyan]{len(tools)}[/cyan]")
@@ -96,9 +92,6 @@ def main():
     )
     rprint("[green]Agent ready[/green]")
 
-    # Get user input
-    query = input("\nEnter your query: ")
-
     rprint("\n[yellow]Processing...[/yellow]")
     # Execute agent step with user query - may trigger multiple tool calls
     response = agent.step(query)
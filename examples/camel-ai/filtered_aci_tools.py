@@ -0,0 +1,101 @@
+"""
+Filtered tool loading for the CAMEL ACI example.
+
+ACIToolkit.get_tools() fetches the definition of every function of every configured app and hands
+all of them to the agent, so every model request carries the whole catalog. FilteredACITools instead:
+
+- loads only the functions of an allow-list of apps (all of them, page by page), or only the
+  `limit` functions most relevant to the query (discovery through ACI function search)
+- reports the approximate token cost of the tool schemas sent with every request
+
+The definitions are fetched up front, with one search request per page of functions: the CAMEL
+ChatAgent reads the schema of every tool on every step, so deferring the fetch per tool would only
+add a request per tool.
+"""
+
+import json
+
+from aci import ACI
+from aci.types.functions import FunctionDefinitionFormat
+from camel.toolkits import FunctionTool
+
+# functions fetched per search request when loading every function of the allowed apps
+SEARCH_PAGE_SIZE = 100
+
+
+class FilteredACITools:
+    def __init__(
+        self,
+        linked_account_owner_id: str,
+        apps: list[str] | None = None,
+        intent: str | None = None,
+        limit: int = 20,
+    ):
+        """
+        Args:
+            linked_account_owner_id: The owner of the linked accounts the tools execute with
+            apps: Only load the functions of these apps (e.g. ["BRAVE_SEARCH", "GITHUB"])
+            intent: Only load the functions most relevant to this intent (e.g. the user query)
+            limit: The maximum number of functions to load in discovery mode (with an intent), without
+                an intent every function of the apps is loaded
+        """
+        self.linked_account_owner_id = linked_account_owner_id
+        self.apps = apps
+        self.intent = intent
+        self.limit = limit
+        self.aci = ACI()
+        self._definitions: list[dict] | None = None
+        self._tools: list[FunctionTool] | None = None
+
+    @property
+    def definitions(self) -> list[dict]:
+        if self._definitions is None:
+            if self.intent:
+                self._definitions = self._search(limit=self.limit, offset=0)
+            else:
+                # no relevance ranking to cut at, so page through every function of the apps
+                self._definitions = []
+                while True:
+                    page = self._search(limit=SEARCH_PAGE_SIZE, offset=len(self._definitions))
+                    self._definitions.extend(page)
+                    if len(page) < SEARCH_PAGE_SIZE:
+                        break
+        return self._definitions
+
+    def _search(self, limit: int, offset: int) -> list[dict]:
+        return self.aci.functions.search(
+            app_names=self.apps,
+            intent=self.intent,
+            allowed_apps_only=True,
+            limit=limit,
+            offset=offset,
+            format=FunctionDefinitionFormat.OPENAI,
+        )
+
+    def _execute(self, function_name: str, **function_arguments):
+        return self.aci.handle_function_call(
+            function_name,
+            function_arguments,
+            linked_account_owner_id=self.linked_account_owner_id,
+            allowed_apps_only=True,
+            format=FunctionDefinitionFormat.OPENAI,
+        )
+
+    def _make_tool(self, definition: dict) -> FunctionTool:
+        function_name = definition["function"]["name"]
+
+        def execute(**kwargs):
+            return self._execute(function_name, **kwargs)
+
+        execute.__name__ = function_name
+        execute.__doc__ = definition["function"].get("description", "")
+        return FunctionTool(func=execute, openai_tool_schema=definition)
+
+    def get_tools(self) -> list[FunctionTool]:
+        if self._tools is None:
+            self._tools = [self._make_tool(definition) for definition in self.definitions]
+        return self._tools
+
+    def schema_token_cost(self) -> int:
+        """Approximate tokens (~4 characters per token) the tool schemas add to every request"""
+        return sum(len(json.dumps(definition)) for definition in self.definitions) // 4
@@ -0,0 +1,125 @@
+"""
+Adaptive batch sizing for the stages of the cognify pipeline.
+
+A fixed batch size is either too small for short chunks (too many LLM round trips) or too large for
+long ones (slow calls, rate limit errors). AdaptiveBatcher instead packs items into batches by token
+count and adjusts the token budget of a batch from the observed latency of the stage:
+
+- a batch faster than the target latency grows the budget additively
+- a batch slower than the target latency shrinks it
+- a failed batch (e.g. a rate limit error) halves it, and the batch is split and retried
+
+At most max_in_flight batches of a stage run at the same time, so the pipeline can saturate the
+model rate limit without overshooting it.
+
+Usage:
+    batcher = AdaptiveBatcher("extract_graph", target_latency_seconds=20)
+    Task(batcher.wrap(extract_graph_from_data), graph_model=KnowledgeGraph, task_config={"batch_size": 100})
+"""
+
+import asyncio
+import functools
+import time
+
+
+def item_tokens(item) -> int:
+    """Approximate token count of a pipeline item (a chunk, a summary or any other data point)"""
+    chunk_size = getattr(item, "chunk_size", None)
+    if isinstance(chunk_size, int):
+        return max(chunk_size, 1)
+    text = getattr(item, "text", None)
+    if not isinstance(text, str):
+        text = str(item)
+    # ~4 characters per token for english text
+    return max(len(text) // 4, 1)
+
+
+class AdaptiveBatcher:
+    def __init__(
+        self,
+        name: str,
+        target_latency_seconds: float,
+        initial_batch_tokens: int = 4000,
+        min_batch_tokens: int = 500,
+        max_batch_tokens: int = 32000,
+        max_in_flight: int = 4,
+        max_retries: int = 3,
+    ):
+        self.name = name
+        self.target_latency_seconds = target_latency_seconds
+        self.batch_tokens = initial_batch_tokens
+        self.min_batch_tokens = min_batch_tokens
+        self.max_batch_tokens = max_batch_tokens
+        self.increase_step = max(initial_batch_tokens // 4, 1)
+        self.max_retries = max_retries
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+
+    def _take_batch(self, items: list, start: int) -> list:
+        """The next batch from items[start:], at most batch_tokens tokens (and at least one item)"""
+        end, batch_tokens = start, 0
+        while end < len(items):
+            tokens = item_tokens(items[end])
+            if end > start and batch_tokens + tokens > self.batch_tokens:
+                break
+            batch_tokens += tokens
+            end += 1
+        return items[start:end]
+
+    def split(self, items: list) -> list[list]:
+        """Pack the items, in order, into batches using the current token budget"""
+        batches, start = [], 0
+        while start < len(items):
+            batches.append(self._take_batch(items, start))
+            start += len(batches[-1])
+        return batches
+
+    def record(self, latency_seconds: float, succeeded: bool) -> None:
+        """Adjust the token budget of the next batches from the outcome of a batch"""
+        if not succeeded:
+            self.batch_tokens = max(self.min_batch_tokens, self.batch_tokens // 2)
+        elif latency_seconds > self.target_latency_seconds:
+            self.batch_tokens = max(self.min_batch_tokens, int(self.batch_tokens * 0.75))
+        elif latency_seconds < self.target_latency_seconds * 0.8:
+            self.batch_tokens = min(self.max_batch_tokens, self.batch_tokens + self.increase_step)
+
+    async def _run_batch(self, task_fn, batch: list, args, kwargs, attempt: int = 0) -> list:
+        """Run one batch, the caller must hold a slot of the semaphore, which is released here"""
+        started_at = time.perf_counter()
+        try:
+            result = await task_fn(batch, *args, **kwargs)
+        except Exception:
+            self.record(time.perf_counter() - started_at, succeeded=False)
+            if attempt >= self.max_retries:
+                raise
+        else:
+            self.record(time.perf_counter() - started_at, succeeded=True)
+            return list(result or [])
+        finally:
+            self.semaphore.release()
+
+        # retry the failed batch, split with the reduced budget
+        async def retry(sub_batch: list) -> list:
+            await self.semaphore.acquire()
+            return await self._run_batch(task_fn, sub_batch, args, kwargs, attempt + 1)
+
+        results = await asyncio.gather(*(retry(sub_batch) for sub_batch in self.split(batch)))
+        return [item for sub_result in results for item in sub_result]
+
+    def wrap(self, task_fn):
+        """Wrap a batch task (async, list in and list out) so the list it receives is batched adaptively"""
+
+        @functools.wraps(task_fn)
+        async def adaptive_task(items: list, *args, **kwargs) -> list:
+            items = list(items)
+            running, start = [], 0
+            while start < len(items):
+                # wait for a free slot before sizing the batch, so it uses the latest token budget
+                await self.semaphore.acquire()
+                batch = self._take_batch(items, start)
+                start += len(batch)
+                running.append(asyncio.create_task(self._run_batch(task_fn, batch, args, kwargs)))
+            results = await asyncio.gather(*running)
+            # results keep the order of the input items
+            return [item for batch_result in results for item in batch_result]
+
+        return adaptive_task
@@ -1,38 +1,11 @@
-import cognee
 import asyncio
 import os
-from cognee.api.v1.visualize.visualize import visualize_graph
-from cognee.modules.search.types import SearchType
 import json
 from dotenv import load_dotenv
-from rich import print as rprint
-from rich.panel import Panel
 
 from aci import ACI
 from aci.meta_functions import ACISearchFunctions
 from aci.types.functions import FunctionDefinitionFormat
-from openai import OpenAI
-
-from cognee.shared.data_models import KnowledgeGraph
-from cognee.modules.data.models import Dataset, Data
-from cognee.modules.data.methods.get_dataset_data import get_dataset_data
-from cognee.modules.cognify.config import get_cognify_config
-from cognee.modules.pipelines.tasks.task import Task
-from cognee.modules.pipelines import run_tasks
-from cognee.modules.users.models import User
-from cognee.tasks.documents import (
-    check_permissions_on_dataset,
-    classify_documents,
-    extract_chunks_from_documents,
-)
-from cognee.infrastructure.llm import get_max_chunk_tokens
-from cognee.tasks.graph import extract_graph_from_data
-from cognee.tasks.storage import add_data_points
-from cognee.tasks.summarization import summarize_text
-
-from cognee.modules.users.methods import get_default_user
-from cognee.modules.data.methods import get_datasets_by_name
-from cognee.modules.users.methods import get_user
 
 
 job_position = """Senior Data Scientist (Machine Learning)
@@ -306,12 +279,13 @@ LINKED_ACCOUNT_OWNER_ID = os.getenv("LINKED_ACCOUNT_OWNER_ID", "")
 if not LINKED_ACCOUNT_OWNER_ID:
     raise ValueError("LINKED_ACCOUNT_OWNER_ID is not set")
 
-openai = OpenAI()
-aci = ACI()
-
-BATCH_SIZE = 10
 DATASET_NAME = "example"
 MODEL_NAME = "gpt-4.1"
+# run the cognify stages concurrently instead of one after the other
+STREAMING_PIPELINE = True
+# memory context injected into each request
+MEMORY_TOP_K = 5
+MEMORY_MAX_CONTEXT_TOKENS = 1500
 
 # ACI meta functions for the LLM to discover the available executable functions dynamically
 tools_meta = [
@@ -329,66 +303,56 @@ prompt = (
 "You are given a list of candidates and their information as a relevant context. use this context to help you answer the user's question."
 )
 
-async def run_cognify_pipeline(dataset: Dataset, user: User = None):
-    data_documents: list[Data] = await get_dataset_data(dataset_id=dataset.id)
-
-    try:
-        cognee_config = get_cognify_config()
-
-        tasks = [
-            Task(classify_documents),
-            Task(check_permissions_on_dataset, user=user, permissions=["write"]),
-            Task(
-                extract_chunks_from_documents, max_chunk_size=get_max_chunk_tokens()
-            ),  # Extract text chunks based on the document type.
-            Task(
-                extract_graph_from_data, graph_model=KnowledgeGraph,
-                task_config={"batch_size": BATCH_SIZE}
-            ),  # Generate knowledge graphs from the document chunks.
-            Task(
-                summarize_text,
-                summarization_model=cognee_config.summarization_model,
-                task_config={"batch_size": BATCH_SIZE},
-            ),
-            Task(add_data_points, task_config={"batch_size": BATCH_SIZE}),
-        ]
-
-        pipeline_run = run_tasks(tasks, dataset.id, data_documents, user, "cognify_pipeline", context={"dataset": dataset})
-        pipeline_run_status = None
-
-        async for run_status in pipeline_run:
-            pipeline_run_status = run_status
-
-    except Exception as error:
-        raise error
-
 async def main():
+    # cognee (imported by the memory modules), openai and rich are only loaded when the agent runs
+    from cognee.modules.users.methods import get_default_user
+    from cognee.modules.users.methods import get_user
+    from openai import OpenAI
+    from rich import print as rprint
+    from rich.panel import Panel
 
-    chat_history: list[dict] = []
+    from cognify_pipeline import ingest_documents
+    from embedding_cache import install_embedding_cache
+    from memory_retrieval import MemoryRetriever, build_query
+
+    openai = OpenAI()
+    aci = ACI()
 
-    # Cognee memory pipeline
+    chat_history: list[dict] = []
 
-    await cognee.prune.prune_data()
-    await cognee.prune.prune_system(metadata=True)
+    # Cognee memory pipeline, only new documents are cognified, unchanged ones reuse the existing graph and vectors
 
-    await cognee.add([job_1, job_2, job_3, job_4, job_5, job_6, job_7, job_position], DATASET_NAME)
+    documents = {
+        "job_1": job_1,
+        "job_2": job_2,
+        "job_3": job_3,
+        "job_4": job_4,
+        "job_5": job_5,
+        "job_6": job_6,
+        "job_7": job_7,
+        "job_position": job_position,
+    }
 
     default_user = await get_default_user()
 
     user = await get_user(default_user.id)
 
-    datasets = await get_datasets_by_name([DATASET_NAME], user.id)
+    # embeddings of texts seen in previous runs are read from disk instead of recomputed
+    embedding_cache = install_embedding_cache()
 
-    await run_cognify_pipeline(datasets[0], user)
+    await ingest_documents(documents, DATASET_NAME, user, streaming=STREAMING_PIPELINE)
+    rprint(f"Embeddings computed: {embedding_cache.misses}, served from cache: {embedding_cache.hits}")
         
-    # Search the knowledge graph
+    # Search the knowledge graph, re-issued every turn against the latest task state (cached, capped to top_k chunks)
 
     query = "1. Get information about David Kim 2. Create a new google doc 3. Add the information to google doc with 3 interview questions"
-    retrieved_context = await cognee.search(query_type=SearchType.CHUNKS, query_text=query)
-    rprint(Panel(f"\n\nretrieved_context\n\n{retrieved_context}\n\n", style="bold green"))
+    memory = MemoryRetriever(top_k=MEMORY_TOP_K, max_context_tokens=MEMORY_MAX_CONTEXT_TOKENS)
     
     while True:
 
+        retrieved_context = await memory.retrieve(build_query(query, chat_history))
+        rprint(Panel(f"\n\nretrieved_context\n\n{retrieved_context}\n\n", style="bold green"))
+
         rprint(Panel("Waiting for LLM Output", style="bold green"))
         response = openai.chat.completions.create(
             model=MODEL_NAME,
@@ -448,6 +412,7 @@ async def main():
         else:
             # If there's no further function call, exit the loop
             rprint(Panel("Task Completed", style="bold green"))
+            rprint(f"Memory searches: {memory.misses}, served from cache: {memory.hits}")
             break
 
 if __name__ == '__main__':
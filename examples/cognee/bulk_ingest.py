@@ -0,0 +1,167 @@
+"""
+Bulk ingestion of candidate profiles into the Cognee memory of the HR agent.
+
+Streams documents from a directory (one document per file) or a JSONL file (one document per line)
+and ingests them in bounded chunks through cognee.add and the cognify pipeline:
+
+- only one chunk is read ahead of the chunk being ingested, so memory stays bounded
+  however large the source is (reading pauses while the ingestion catches up)
+- documents already ingested (same name and content hash, see cognify_pipeline.py) are skipped,
+  so an interrupted run can simply be restarted and resumes where it stopped; the manifest of
+  ingested documents is kept in memory and written every --save-every chunks and at the end,
+  and each chunk only looks up its own documents in the dataset, so the cost per chunk does not
+  grow with the dataset
+- a JSONL line that is not valid JSON, or a record without the text field, is reported with its
+  file:line and skipped (and written to --rejected when given) instead of stopping the run, which a
+  restart could never get past
+- progress and throughput are printed after every chunk
+
+The documents go to their own dataset ("candidates" by default), which the agent searches along with
+its own one. Note that a rebuild of the agent's dataset (after one of its documents changed) prunes
+the whole memory, including this dataset.
+
+Usage:
+    python bulk_ingest.py ./profiles                      # every file under ./profiles
+    python bulk_ingest.py profiles.jsonl --text-field cv  # {"id": ..., "cv": ...} per line
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def read_directory(directory: Path, pattern: str) -> Iterator[tuple[str, str]]:
+    for path in sorted(directory.glob(pattern)):
+        if path.is_file():
+            yield str(path.relative_to(directory)), path.read_text(encoding="utf-8", errors="replace")
+
+
+class RejectedRecords:
+    """The JSONL records that could not be ingested, reported on stderr and appended to a file if given"""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.count = 0
+
+    def add(self, location: str, line: str, error: str) -> None:
+        self.count += 1
+        print(f"{location}: skipped, {error}", file=sys.stderr)
+        if self.path is not None:
+            record = {"location": location, "error": error, "line": line.rstrip("\n")}
+            with open(self.path, "a", encoding="utf-8") as rejected_file:
+                rejected_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_jsonl(path: Path, id_field: str, text_field: str, rejected: RejectedRecords) -> Iterator[tuple[str, str]]:
+    with open(path, encoding="utf-8") as jsonl_file:
+        for line_number, line in enumerate(jsonl_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+                if not isinstance(record.get(text_field), str):
+                    raise ValueError(f"no text in the '{text_field}' field")
+            except ValueError as e:
+                rejected.add(f"{path}:{line_number}", line, str(e))
+                continue
+            yield str(record.get(id_field, f"{path.name}:{line_number}")), record[text_field]
+
+
+def read_documents(source: Path, args: argparse.Namespace, rejected: RejectedRecords) -> Iterator[tuple[str, str]]:
+    if source.is_dir():
+        return read_directory(source, args.pattern)
+    return read_jsonl(source, args.id_field, args.text_field, rejected)
+
+
+async def read_chunks(documents: Iterator[tuple[str, str]], chunk_size: int, queue: asyncio.Queue) -> None:
+    chunk: dict[str, str] = {}
+    try:
+        # the files are read in a worker thread, so reading does not block the ingestion
+        while (document := await asyncio.to_thread(next, documents, None)) is not None:
+            name, text = document
+            chunk[name] = text
+            if len(chunk) >= chunk_size:
+                # blocks while the ingestion is behind, which is the back-pressure on reading
+                await queue.put(chunk)
+                chunk = {}
+        if chunk:
+            await queue.put(chunk)
+    finally:
+        # also signals the end when reading failed, the error is raised when awaiting the reader
+        await queue.put(None)
+
+
+async def bulk_ingest(args: argparse.Namespace) -> None:
+    # cognee is imported once the arguments are parsed, so --help and argument errors are instant
+    from cognee.modules.users.methods import get_default_user, get_user
+
+    from cognify_pipeline import ingest_documents, load_manifest, save_manifest
+    from embedding_cache import install_embedding_cache
+
+    source = Path(args.source)
+    default_user = await get_default_user()
+    user = await get_user(default_user.id)
+    embedding_cache = install_embedding_cache()
+    # kept in memory and updated by every chunk, only written every --save-every chunks and at the end
+    manifest = await asyncio.to_thread(load_manifest, args.dataset)
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    rejected = RejectedRecords(Path(args.rejected) if args.rejected else None)
+    reader = asyncio.create_task(read_chunks(read_documents(source, args, rejected), args.chunk_size, queue))
+
+    started_at = time.perf_counter()
+    documents_seen = 0
+    chunk_number = 0
+    try:
+        while (chunk := await queue.get()) is not None:
+            chunk_number += 1
+            await ingest_documents(
+                chunk, args.dataset, user, streaming=args.streaming, additive=True, manifest=manifest
+            )
+            documents_seen += len(chunk)
+            if chunk_number % args.save_every == 0:
+                await asyncio.to_thread(save_manifest, args.dataset, manifest)
+            elapsed = time.perf_counter() - started_at
+            print(
+                f"[chunk {chunk_number}] {documents_seen} documents processed in {elapsed:.1f}s "
+                f"({documents_seen / elapsed:.1f} docs/s), embeddings served from cache: {embedding_cache.hits}"
+            )
+        await reader
+    finally:
+        reader.cancel()
+        # also after an error, so a restarted run skips the chunks ingested before it
+        await asyncio.to_thread(save_manifest, args.dataset, manifest)
+
+    print(f"Done: {documents_seen} documents from {source} in dataset '{args.dataset}'")
+    if rejected.count:
+        print(f"{rejected.count} records skipped" + (f", written to {args.rejected}" if args.rejected else ""))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk ingest documents into the Cognee memory of the HR agent")
+    parser.add_argument("source", help="a directory (one document per file) or a JSONL file (one document per line)")
+    parser.add_argument("--dataset", default="candidates", help="the cognee dataset to ingest into")
+    parser.add_argument("--chunk-size", type=int, default=100, help="documents added and cognified at once")
+    parser.add_argument("--save-every", type=int, default=10,
+                        help="chunks between two writes of the manifest of ingested documents")
+    parser.add_argument("--pattern", default="**/*", help="glob of the files to ingest from a directory")
+    parser.add_argument("--id-field", default="id", help="JSONL field holding the document name")
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the document text")
+    parser.add_argument("--rejected", help="JSONL file the skipped records are appended to, with their error")
+    parser.add_argument("--no-streaming", dest="streaming", action="store_false",
+                        help="run the cognify stages one after the other")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(bulk_ingest(parse_args()))
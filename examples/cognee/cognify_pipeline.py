@@ -0,0 +1,352 @@
+"""
+Cognee ingestion for the HR agent: the cognify pipeline and incremental ingestion on top of it.
+
+Instead of pruning cognee and re-cognifying every document on every start, ingest_documents keeps
+a manifest of content hashes of the documents that were already cognified:
+
+- unchanged documents are skipped, and the existing graph and vectors are reused
+- new documents are added to the dataset and only they go through run_cognify_pipeline
+- if a known document was modified or removed, its old chunks, entities and summaries would stay
+  in the graph, so the memory is rebuilt from scratch (the same prune + cognify as before),
+  unless the documents are ingested in additive mode (see bulk_ingest.py)
+
+run_streaming_cognify_pipeline runs the same stages as run_cognify_pipeline, but concurrently:
+chunks flow to graph extraction and summarization (which run side by side on each batch) while
+later chunks are still being extracted, and storage consumes the finished data points as they
+arrive, so the ingestion time approaches the slowest stage rather than the sum of the stages.
+
+Both pipelines write a per-stage timing and throughput report (see pipeline_report.py) to REPORT_PATH.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import cognee
+from cognee.infrastructure.databases.relational import get_relational_engine
+from cognee.infrastructure.llm import get_max_chunk_tokens
+from cognee.modules.cognify.config import get_cognify_config
+from cognee.modules.data.methods import get_datasets_by_name
+from cognee.modules.data.methods.get_dataset_data import get_dataset_data
+from cognee.modules.data.models import Data, Dataset
+from cognee.modules.pipelines import run_tasks
+from cognee.modules.pipelines.tasks.task import Task
+from cognee.modules.users.models import User
+from cognee.shared.data_models import KnowledgeGraph
+from cognee.tasks.documents import (
+    check_permissions_on_dataset,
+    classify_documents,
+    extract_chunks_from_documents,
+)
+from cognee.tasks.graph import extract_graph_from_data
+from cognee.tasks.storage import add_data_points
+from cognee.tasks.summarization import summarize_text
+from sqlalchemy import select
+
+from adaptive_batching import AdaptiveBatcher
+from pipeline_report import PipelineReport, instrument
+
+# upper bound on the number of items handed to a stage at once, the adaptive batchers split it further
+STAGE_BATCH_SIZE = 100
+MANIFEST_PATH = Path(__file__).parent / ".cognee_manifest.json"
+REPORT_PATH = Path(os.getenv("COGNEE_PIPELINE_REPORT", Path(__file__).parent / "cognify_report.json"))
+
+# batches are sized by tokens and latency, shared across pipeline runs so the learned budgets carry over
+graph_batcher = AdaptiveBatcher(
+    "extract_graph_from_data",
+    target_latency_seconds=float(os.getenv("COGNEE_LLM_TARGET_LATENCY", "30")),
+    max_in_flight=int(os.getenv("COGNEE_LLM_MAX_IN_FLIGHT", "4")),
+)
+summary_batcher = AdaptiveBatcher(
+    "summarize_text",
+    target_latency_seconds=float(os.getenv("COGNEE_LLM_TARGET_LATENCY", "30")),
+    max_in_flight=int(os.getenv("COGNEE_LLM_MAX_IN_FLIGHT", "4")),
+)
+storage_batcher = AdaptiveBatcher(
+    "add_data_points",
+    target_latency_seconds=float(os.getenv("COGNEE_STORAGE_TARGET_LATENCY", "5")),
+    initial_batch_tokens=16000,
+    max_batch_tokens=128000,
+    max_in_flight=int(os.getenv("COGNEE_STORAGE_MAX_IN_FLIGHT", "2")),
+)
+
+# the stages record their timing into the active PipelineReport, the LLM and storage stages are batched adaptively
+classify_documents_stage = instrument(classify_documents)
+check_permissions_stage = instrument(check_permissions_on_dataset)
+extract_chunks_stage = instrument(extract_chunks_from_documents)
+adaptive_extract_graph_from_data = graph_batcher.wrap(instrument(extract_graph_from_data))
+adaptive_summarize_text = summary_batcher.wrap(instrument(summarize_text))
+adaptive_add_data_points = storage_batcher.wrap(instrument(add_data_points))
+
+
+def _write_report(report: PipelineReport) -> None:
+    report.write(REPORT_PATH)
+    for name, stage in report.to_dict()["stages"].items():
+        print(
+            f"  {name}: {stage['wall_seconds']}s wall, {stage['busy_seconds']}s busy, "
+            f"{stage['items_in']} items in, {stage['tokens_in']} tokens in, {stage['failures']} failures"
+        )
+    print(f"Pipeline report written to {REPORT_PATH}")
+
+
+async def run_cognify_pipeline(dataset: Dataset, user: User = None, data_documents: list[Data] | None = None):
+    """Cognify the given documents of the dataset (all of its documents by default)"""
+    if data_documents is None:
+        data_documents = await get_dataset_data(dataset_id=dataset.id)
+
+    report = PipelineReport("cognify_pipeline")
+    try:
+        cognee_config = get_cognify_config()
+
+        tasks = [
+            Task(classify_documents_stage),
+            Task(check_permissions_stage, user=user, permissions=["write"]),
+            Task(
+                extract_chunks_stage, max_chunk_size=get_max_chunk_tokens()
+            ),  # Extract text chunks based on the document type.
+            Task(
+                adaptive_extract_graph_from_data, graph_model=KnowledgeGraph,
+                task_config={"batch_size": STAGE_BATCH_SIZE}
+            ),  # Generate knowledge graphs from the document chunks.
+            Task(
+                adaptive_summarize_text,
+                summarization_model=cognee_config.summarization_model,
+                task_config={"batch_size": STAGE_BATCH_SIZE},
+            ),
+            Task(adaptive_add_data_points, task_config={"batch_size": STAGE_BATCH_SIZE}),
+        ]
+
+        with report.activate():
+            pipeline_run = run_tasks(tasks, dataset.id, data_documents, user, "cognify_pipeline", context={"dataset": dataset})
+            pipeline_run_status = None
+
+            async for run_status in pipeline_run:
+                pipeline_run_status = run_status
+
+        report.status = type(pipeline_run_status).__name__ if pipeline_run_status is not None else None
+
+    except Exception as error:
+        report.status = f"failed: {error}"
+        raise error
+    finally:
+        _write_report(report)
+
+    return report
+
+
+async def run_streaming_cognify_pipeline(
+    dataset: Dataset,
+    user: User = None,
+    data_documents: list[Data] | None = None,
+    chunk_batch_size: int = 10,
+    enrich_workers: int = 2,
+    max_pending_batches: int = 4,
+):
+    """
+    Cognify the given documents of the dataset (all of its documents by default), with the stages running concurrently.
+
+    Args:
+        dataset: The dataset the documents belong to
+        user: The cognee user owning the dataset
+        data_documents: The documents to cognify
+        chunk_batch_size: The number of chunks handed from the chunker to graph extraction and summarization at once
+        enrich_workers: The number of chunk batches going through graph extraction and summarization at the same time
+        max_pending_batches: The size of the queues between the stages, a full queue pauses the stage feeding it
+    """
+    if data_documents is None:
+        data_documents = await get_dataset_data(dataset_id=dataset.id)
+
+    report = PipelineReport("streaming_cognify_pipeline")
+    with report.activate():
+        try:
+            await _run_streaming_stages(
+                dataset, user, data_documents, chunk_batch_size, enrich_workers, max_pending_batches
+            )
+            report.status = "completed"
+        except Exception as error:
+            report.status = f"failed: {error}"
+            raise
+        finally:
+            _write_report(report)
+
+    return report
+
+
+async def _run_streaming_stages(
+    dataset: Dataset,
+    user: User,
+    data_documents: list[Data],
+    chunk_batch_size: int,
+    enrich_workers: int,
+    max_pending_batches: int,
+):
+    cognee_config = get_cognify_config()
+    documents = await classify_documents_stage(data_documents)
+    documents = await check_permissions_stage(
+        documents, context={"dataset": dataset}, user=user, permissions=["write"]
+    )
+
+    chunk_batches: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+    data_point_batches: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+
+    async def chunk():
+        batch = []
+        async for document_chunk in extract_chunks_stage(documents, max_chunk_size=get_max_chunk_tokens()):
+            batch.append(document_chunk)
+            if len(batch) >= chunk_batch_size:
+                await chunk_batches.put(batch)
+                batch = []
+        if batch:
+            await chunk_batches.put(batch)
+        for _ in range(enrich_workers):
+            await chunk_batches.put(None)
+
+    async def enrich():
+        while (batch := await chunk_batches.get()) is not None:
+            # summaries only reference the chunks, so they can be generated while the graph is extracted,
+            # the chunks get their entities attached before the summaries (and through them the chunks) are stored
+            _, summaries = await asyncio.gather(
+                adaptive_extract_graph_from_data(batch, graph_model=KnowledgeGraph),
+                adaptive_summarize_text(batch, summarization_model=cognee_config.summarization_model),
+            )
+            await data_point_batches.put(summaries)
+
+    async def enrich_all():
+        await asyncio.gather(*(enrich() for _ in range(enrich_workers)))
+        await data_point_batches.put(None)
+
+    async def store():
+        while (batch := await data_point_batches.get()) is not None:
+            await adaptive_add_data_points(batch)
+
+    stages = [asyncio.create_task(stage()) for stage in (chunk, enrich_all, store)]
+    try:
+        await asyncio.gather(*stages)
+    except Exception:
+        # a failed stage would leave the others waiting on their queues forever
+        for stage in stages:
+            stage.cancel()
+        raise
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_manifest(dataset_name: str, manifest_path: Path = MANIFEST_PATH) -> dict:
+    """
+    Return what was already cognified into the dataset:
+    {"documents": {document name: content hash}, "data_ids": {cognee data id, ...}}
+    """
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    entry = manifest.get(dataset_name, {"documents": {}, "data_ids": []})
+    return {"documents": entry["documents"], "data_ids": set(entry["data_ids"])}
+
+
+def save_manifest(dataset_name: str, entry: dict, manifest_path: Path = MANIFEST_PATH) -> None:
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    manifest[dataset_name] = {"documents": entry["documents"], "data_ids": sorted(entry["data_ids"])}
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+
+
+async def _get_dataset(dataset_name: str, user: User) -> Dataset | None:
+    datasets = await get_datasets_by_name([dataset_name], user.id)
+    return datasets[0] if datasets else None
+
+
+async def _get_data_of_texts(dataset: Dataset, texts: list[str]) -> list[Data]:
+    """
+    The data of the dataset holding the given texts, looked up by content hash (cognee stores a text
+    as a file and records the md5 of its utf-8 bytes), so a chunk costs a query on its own documents
+    instead of reading the whole dataset
+    """
+    content_hashes = {hashlib.md5(text.encode("utf-8")).hexdigest() for text in texts}
+    async with get_relational_engine().get_async_session() as session:
+        result = await session.execute(
+            select(Data).join(Data.datasets).filter(Dataset.id == dataset.id, Data.content_hash.in_(content_hashes))
+        )
+        return list(result.scalars().all())
+
+
+async def ingest_documents(
+    documents: dict[str, str],
+    dataset_name: str,
+    user: User,
+    manifest_path: Path = MANIFEST_PATH,
+    streaming: bool = False,
+    additive: bool = False,
+    manifest: dict | None = None,
+) -> Dataset:
+    """
+    Make sure the dataset memory reflects the given documents, cognifying as little as possible.
+
+    Args:
+        documents: {document name: document text}
+        dataset_name: The cognee dataset to ingest the documents into
+        user: The cognee user owning the dataset
+        manifest_path: Where the content hashes of the cognified documents are kept
+        streaming: Use run_streaming_cognify_pipeline instead of run_cognify_pipeline
+        additive: The documents are only a part of the dataset (e.g. one chunk of a bulk ingestion):
+            known documents missing from them are kept, and modified ones are ingested as new versions
+            instead of rebuilding the memory. Only the data of the given documents is looked up in
+            the dataset, instead of the whole dataset
+        manifest: The manifest entry of the dataset (see load_manifest), updated in place and not
+            saved, so a caller ingesting many chunks can save it once in a while instead of after
+            every chunk. Loaded from and saved to manifest_path when not given
+
+    Returns:
+        Dataset: The up to date dataset
+    """
+    hashes = {name: content_hash(text) for name, text in documents.items()}
+    save = manifest is None
+    if manifest is None:
+        manifest = load_manifest(dataset_name, manifest_path)
+    known, cognified_ids = manifest["documents"], manifest["data_ids"]
+    dataset = await _get_dataset(dataset_name, user)
+
+    if additive:
+        modified = [name for name in documents if name in known and known[name] != hashes[name]]
+        if modified:
+            print(f"Warning: {len(modified)} modified document(s) are added as new versions, "
+                  f"the previous versions stay in the memory: {', '.join(modified[:5])}")
+    else:
+        stale = [name for name, known_hash in known.items() if hashes.get(name) != known_hash]
+        if dataset is not None and stale:
+            # documents changed: start from scratch (note that pruning wipes the other datasets too)
+            await cognee.prune.prune_data()
+            await cognee.prune.prune_system(metadata=True)
+            dataset = None
+
+    if dataset is None:
+        # the memory was wiped, never built or just pruned, nothing of the manifest is in it
+        known.clear()
+        cognified_ids.clear()
+
+    new = [name for name in documents if known.get(name) != hashes[name]]
+    if not new:
+        print(f"Memory for dataset '{dataset_name}' is up to date, reusing the existing graph and vectors")
+        return dataset
+
+    print(f"Ingesting {len(new)} new document(s) into dataset '{dataset_name}'")
+    await cognee.add([documents[name] for name in new], dataset_name)
+
+    dataset = await _get_dataset(dataset_name, user)
+    if additive:
+        # data of these documents added but not cognified by an interrupted run is found again here
+        dataset_data = await _get_data_of_texts(dataset, [documents[name] for name in new])
+    else:
+        # cognify everything in the dataset that was not cognified yet, including data added by an interrupted run
+        dataset_data = await get_dataset_data(dataset_id=dataset.id)
+    new_data = [data for data in dataset_data if str(data.id) not in cognified_ids]
+    if new_data:
+        cognify = run_streaming_cognify_pipeline if streaming else run_cognify_pipeline
+        await cognify(dataset, user, new_data)
+
+    # only record the documents once they are cognified, so an interrupted run is retried
+    known.update((name, hashes[name]) for name in new)
+    cognified_ids.update(str(data.id) for data in new_data)
+    if save:
+        save_manifest(dataset_name, manifest, manifest_path)
+    return dataset
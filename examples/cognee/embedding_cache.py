@@ -0,0 +1,148 @@
+"""
+Persistent, content-addressed embedding cache shared across Cognee ingestion runs.
+
+Re-ingesting the same (or overlapping) documents recomputes the embeddings of identical chunks,
+summaries and entities on every run. install_embedding_cache() wraps the embed_text method of the
+embedding engine used by cognee's vector store, so every embedding call first looks the texts up
+in the cache and only sends the missing ones to the model.
+
+On disk the cache is:
+- vectors.f32: the embeddings, one float32 row per entry, memory-mapped for reads
+- keys.txt: the sha256 of (model, text) of each row, in row order
+- meta.json: the model and the embedding dimensions
+
+Rows are only appended, the vectors before their keys. An interrupted run can leave vectors without
+a key, a partial row or a partial key behind: on load, the files are cut back to the rows having both
+a complete vector and a complete key, so new rows are always numbered after the last valid one.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+from cognee.infrastructure.databases.vector import get_vector_engine
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".embedding_cache"
+
+KEY = re.compile(r"[0-9a-f]{64}")
+
+
+class EmbeddingCache:
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, model: str = ""):
+        self.directory = directory
+        self.model = model
+        self.vectors_path = directory / "vectors.f32"
+        self.keys_path = directory / "keys.txt"
+        self.meta_path = directory / "meta.json"
+        self.dimensions: int | None = None
+        self.index: dict[str, int] = {}
+        # rows with both a vector and a key, new rows are appended after them
+        self.rows = 0
+        self._vectors: np.memmap | None = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.meta_path.exists():
+            return
+        meta = json.loads(self.meta_path.read_text())
+        if meta["model"] != self.model:
+            # embeddings of another model can not be reused, start over
+            self.clear()
+            return
+        self.dimensions = meta["dimensions"]
+        keys_text = self.keys_path.read_text() if self.keys_path.exists() else ""
+        row_bytes = 4 * self.dimensions
+        complete_rows = self.vectors_path.stat().st_size // row_bytes if self.vectors_path.exists() else 0
+
+        # keep the leading rows with a complete vector and a complete key, drop what an interrupted run left
+        keys = []
+        for key in keys_text.split("\n")[:complete_rows]:
+            if not KEY.fullmatch(key):
+                break
+            keys.append(key)
+        self.rows = len(keys)
+        self.vectors_path.touch()
+        if self.vectors_path.stat().st_size != self.rows * row_bytes:
+            with open(self.vectors_path, "r+b") as vectors_file:
+                vectors_file.truncate(self.rows * row_bytes)
+        if keys_text != "".join(f"{key}\n" for key in keys):
+            self.keys_path.write_text("".join(f"{key}\n" for key in keys))
+        self.index = {key: row for row, key in enumerate(keys)}
+
+    def clear(self) -> None:
+        for path in (self.vectors_path, self.keys_path, self.meta_path):
+            path.unlink(missing_ok=True)
+        self.dimensions, self.index, self.rows, self._vectors = None, {}, 0, None
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{text}".encode("utf-8")).hexdigest()
+
+    def _rows(self) -> np.memmap:
+        if self._vectors is None:
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dimensions)
+            )
+        return self._vectors
+
+    def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        """The cached embedding of each text, or None where it is not cached"""
+        rows = [self.index.get(self._key(text)) for text in texts]
+        vectors = self._rows() if any(row is not None for row in rows) else None
+        return [vectors[row].tolist() if row is not None else None for row in rows]
+
+    def add_many(self, texts: list[str], embeddings: list[list[float]]) -> None:
+        new = {}
+        for text, embedding in zip(texts, embeddings):
+            key = self._key(text)
+            if key not in self.index and key not in new:
+                new[key] = embedding
+        if not new:
+            return
+
+        if self.dimensions is None:
+            self.dimensions = len(next(iter(new.values())))
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.meta_path.write_text(json.dumps({"model": self.model, "dimensions": self.dimensions}))
+            self.vectors_path.touch()
+
+        first_row = self.rows
+        with open(self.vectors_path, "ab") as vectors_file:
+            vectors_file.write(np.asarray(list(new.values()), dtype=np.float32).tobytes())
+        with open(self.keys_path, "a") as keys_file:
+            keys_file.write("".join(f"{key}\n" for key in new))
+
+        for offset, key in enumerate(new):
+            self.index[key] = first_row + offset
+        self.rows += len(new)
+        # the file grew, remap it on the next read
+        self._vectors = None
+
+
+def install_embedding_cache(directory: Path = DEFAULT_CACHE_DIR) -> EmbeddingCache:
+    """Route the embedding calls of cognee's vector store through a persistent EmbeddingCache"""
+    embedding_engine = get_vector_engine().embedding_engine
+    if hasattr(embedding_engine, "embedding_cache"):
+        return embedding_engine.embedding_cache
+
+    cache = EmbeddingCache(directory, model=str(getattr(embedding_engine, "model", "")))
+    embed_text = embedding_engine.embed_text
+
+    async def cached_embed_text(text: list[str]) -> list[list[float]]:
+        embeddings = cache.get_many(text)
+        missing = [index for index, embedding in enumerate(embeddings) if embedding is None]
+        cache.hits += len(text) - len(missing)
+        cache.misses += len(missing)
+        if missing:
+            computed = await embed_text([text[index] for index in missing])
+            cache.add_many([text[index] for index in missing], computed)
+            for index, embedding in zip(missing, computed):
+                embeddings[index] = embedding
+        return embeddings
+
+    embedding_engine.embed_text = cached_embed_text
+    embedding_engine.embedding_cache = cache
+    return cache
@@ -0,0 +1,78 @@
+"""
+Per-turn memory retrieval for the Cognee agent loop.
+
+Instead of searching the memory once and pasting the whole result into every request, the agent
+re-issues the search every turn with a query built from the task and its progress (the functions
+called so far), so the context follows the conversation. Results are:
+
+- cached per query (LRU), so turns that do not change the task state cost no search: the query
+  leaves out the wording of the model and the arguments of the calls, which change every turn
+- limited to the top_k chunks, and cut to max_context_tokens, so prompts stay small
+"""
+
+from collections import OrderedDict
+
+
+def state_summary(chat_history: list[dict]) -> str:
+    """The names of the functions called so far, in the order of their first call"""
+    called = {}
+    for message in chat_history:
+        for tool_call in message.get("tool_calls") or []:
+            called[tool_call.function.name] = None
+    return ", ".join(called)
+
+
+def build_query(task: str, chat_history: list[dict]) -> str:
+    """Combine the task with the summary of its progress"""
+    summary = state_summary(chat_history)
+    return f"{task}\nDone so far: {summary}" if summary else task
+
+
+def _chunk_text(result) -> str:
+    if isinstance(result, dict):
+        return str(result.get("text", result))
+    return str(result)
+
+
+class MemoryRetriever:
+    def __init__(self, top_k: int = 5, max_context_tokens: int = 1500, cache_size: int = 128):
+        self.top_k = top_k
+        self.max_context_tokens = max_context_tokens
+        self.cache_size = cache_size
+        self.cache: OrderedDict[str, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _cap(self, chunks: list[str]) -> str:
+        # ~4 characters per token, always keep at least the best chunk (cut if needed)
+        budget = self.max_context_tokens * 4
+        kept = []
+        for chunk in chunks[: self.top_k]:
+            if len(chunk) > budget:
+                if not kept:
+                    kept.append(chunk[:budget])
+                break
+            kept.append(chunk)
+            budget -= len(chunk)
+        return "\n\n".join(kept)
+
+    async def retrieve(self, query: str) -> str:
+        """Return the capped memory context for the query, searching the memory only on a cache miss"""
+        key = " ".join(query.lower().split())
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+        # cognee takes seconds to import, only loaded once the memory is searched
+        import cognee
+        from cognee.modules.search.types import SearchType
+
+        results = await cognee.search(query_type=SearchType.CHUNKS, query_text=query, top_k=self.top_k)
+        context = self._cap([_chunk_text(result) for result in results or []])
+
+        self.cache[key] = context
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return context
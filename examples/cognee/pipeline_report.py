@@ -0,0 +1,185 @@
+"""
+Per-stage timing and throughput report for the cognify pipeline.
+
+Every stage function of the pipeline is wrapped with instrument(...). While a PipelineReport is active
+(see PipelineReport.activate), each call of a stage records:
+
+- busy time (sum of the call durations) and wall time (first call start to last call end)
+- items in and out, and the approximate tokens of the items it received
+- failures
+
+The report is written as JSON, so it can be compared across runs to see which stage to scale.
+Tokens are approximated from the items (chunk sizes, text length), cognee does not expose the LLM usage.
+"""
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from adaptive_batching import item_tokens
+
+_current_report: contextvars.ContextVar["PipelineReport | None"] = contextvars.ContextVar(
+    "current_pipeline_report", default=None
+)
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    failures: int = 0
+    items_in: int = 0
+    items_out: int = 0
+    tokens_in: int = 0
+    busy_seconds: float = 0.0
+    first_started_at: float | None = None
+    last_finished_at: float | None = None
+
+    @property
+    def wall_seconds(self) -> float:
+        if self.first_started_at is None or self.last_finished_at is None:
+            return 0.0
+        return self.last_finished_at - self.first_started_at
+
+
+def _count(items) -> int:
+    if isinstance(items, (list, tuple, set)):
+        return len(items)
+    return 0 if items is None else 1
+
+
+def _tokens(items) -> int:
+    if isinstance(items, (list, tuple)):
+        return sum(item_tokens(item) for item in items)
+    return 0
+
+
+class PipelineReport:
+    def __init__(self, pipeline_name: str):
+        self.pipeline_name = pipeline_name
+        self.stages: dict[str, StageStats] = {}
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.status: str | None = None
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Record the stage calls made inside this block (including tasks started from it) into this report"""
+        token = _current_report.set(self)
+        try:
+            yield self
+        finally:
+            _current_report.reset(token)
+            self.finished_at = time.time()
+
+    def _stage(self, name: str) -> StageStats:
+        return self.stages.setdefault(name, StageStats())
+
+    def _start(self, name: str, items) -> float:
+        stage = self._stage(name)
+        stage.calls += 1
+        stage.items_in += _count(items)
+        stage.tokens_in += _tokens(items)
+        started_at = time.perf_counter()
+        if stage.first_started_at is None:
+            stage.first_started_at = started_at
+        return started_at
+
+    def _finish(self, name: str, started_at: float, items_out: int, failed: bool) -> None:
+        stage = self._stage(name)
+        finished_at = time.perf_counter()
+        stage.busy_seconds += finished_at - started_at
+        stage.last_finished_at = max(stage.last_finished_at or finished_at, finished_at)
+        stage.items_out += items_out
+        stage.failures += int(failed)
+
+    def to_dict(self) -> dict:
+        stages = {}
+        for name, stage in self.stages.items():
+            stats = asdict(stage)
+            del stats["first_started_at"], stats["last_finished_at"]
+            stats["wall_seconds"] = round(stage.wall_seconds, 3)
+            stats["busy_seconds"] = round(stage.busy_seconds, 3)
+            stats["items_per_second"] = (
+                round(stage.items_in / stage.wall_seconds, 2) if stage.wall_seconds else None
+            )
+            stages[name] = stats
+        return {
+            "pipeline": self.pipeline_name,
+            "status": self.status,
+            "total_seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+            "stages": stages,
+        }
+
+    def write(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+
+
+def instrument(stage_fn, name: str | None = None):
+    """Wrap a pipeline stage (function, coroutine function or async generator function), keeping its kind"""
+    name = name or stage_fn.__name__
+
+    if inspect.isasyncgenfunction(stage_fn):
+
+        @functools.wraps(stage_fn)
+        async def instrumented_async_gen(items, *args, **kwargs):
+            report = _current_report.get()
+            if report is None:
+                async for item in stage_fn(items, *args, **kwargs):
+                    yield item
+                return
+            # only the time spent inside the stage counts, not the time the consumer holds each item
+            started_at = report._start(name, items)
+            generator = stage_fn(items, *args, **kwargs)
+            while True:
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    report._finish(name, started_at, 0, failed=False)
+                    break
+                except Exception:
+                    report._finish(name, started_at, 0, failed=True)
+                    raise
+                report._finish(name, started_at, 1, failed=False)
+                yield item
+                started_at = time.perf_counter()
+
+        return instrumented_async_gen
+
+    if inspect.iscoroutinefunction(stage_fn):
+
+        @functools.wraps(stage_fn)
+        async def instrumented_coroutine(items, *args, **kwargs):
+            report = _current_report.get()
+            if report is None:
+                return await stage_fn(items, *args, **kwargs)
+            started_at = report._start(name, items)
+            try:
+                result = await stage_fn(items, *args, **kwargs)
+            except Exception:
+                report._finish(name, started_at, 0, failed=True)
+                raise
+            report._finish(name, started_at, _count(result), failed=False)
+            return result
+
+        return instrumented_coroutine
+
+    @functools.wraps(stage_fn)
+    def instrumented_function(items, *args, **kwargs):
+        report = _current_report.get()
+        if report is None:
+            return stage_fn(items, *args, **kwargs)
+        started_at = report._start(name, items)
+        try:
+            result = stage_fn(items, *args, **kwargs)
+        except Exception:
+            report._finish(name, started_at, 0, failed=True)
+            raise
+        report._finish(name, started_at, _count(result), failed=False)
+        return result
+
+    return instrumented_function
@@ -0,0 +1,121 @@
+"""
+On-disk plan cache for Portia.
+
+portia.plan(...) runs a full LLM planning pass every time, even when the task description
+is identical to a previous run or only differs in a few templated fields (e.g. the GitHub
+project URL or the email recipient). This cache stores generated plans keyed by:
+
+- the normalized prompt, with the templated field values replaced by {{FIELD_NAME}} placeholders
+- a fingerprint of the tool registry (tool ids, descriptions and argument schemas)
+
+On a cache hit the stored plan is re-hydrated with the current field values and saved as a new
+plan, so recurring jobs skip planning entirely. Changing the tools invalidates the cache.
+
+Note: substitution is textual. If the planner did not copy a field value verbatim into the plan
+(e.g. it only kept a rewritten form of it), the plan is not cached, since it could not be safely
+re-hydrated with a different value.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from portia import Plan, Portia, ToolRegistry
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences map to the same cache entry."""
+    return " ".join(prompt.split())
+
+
+def registry_fingerprint(tool_registry: ToolRegistry) -> str:
+    """Hash the ids, descriptions and argument schemas of every tool in the registry."""
+    tools = sorted(tool_registry.get_tools(), key=lambda tool: tool.id)
+    payload = [
+        {
+            "id": tool.id,
+            "description": tool.description,
+            "args_schema": tool.args_schema.model_json_schema(),
+        }
+        for tool in tools
+    ]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _escaped(value: str) -> str:
+    # values are substituted inside JSON strings, so they need to be JSON-escaped
+    return json.dumps(value)[1:-1]
+
+
+def _to_template(text: str, params: dict[str, str]) -> str:
+    # replace longer values first so a value that contains another one is not partially replaced
+    for name, value in sorted(params.items(), key=lambda item: len(item[1]), reverse=True):
+        if value:
+            text = text.replace(_escaped(value), "{{" + name + "}}")
+    return text
+
+
+def _from_template(text: str, params: dict[str, str]) -> str:
+    for name, value in params.items():
+        text = text.replace("{{" + name + "}}", _escaped(value))
+    return text
+
+
+class PlanCache:
+    def __init__(
+        self,
+        portia: Portia,
+        tool_registry: ToolRegistry,
+        cache_dir: str | os.PathLike | None = None,
+    ):
+        self.portia = portia
+        self.tool_registry = tool_registry
+        self.cache_dir = Path(cache_dir or os.getenv("PORTIA_PLAN_CACHE_DIR", ".plan_cache"))
+        self._fingerprint: str | None = None
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = registry_fingerprint(self.tool_registry)
+        return self._fingerprint
+
+    def _cache_path(self, prompt: str, params: dict[str, str]) -> Path:
+        template = normalize_prompt(_to_template(prompt, params))
+        key = hashlib.sha256(f"{self.fingerprint}\n{template}".encode()).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def get_or_plan(self, prompt: str, params: dict[str, str] | None = None) -> Plan:
+        """
+        Return a plan for the prompt, reusing a cached plan when one exists.
+
+        Args:
+            prompt: The task description, with the templated field values already filled in
+            params: The templated fields of the prompt, e.g. {"EMAIL_RECIPIENT": "someone@example.com"}
+
+        Returns:
+            Plan: A plan ready to be passed to portia.run_plan(...)
+        """
+        params = params or {}
+        cache_path = self._cache_path(prompt, params)
+
+        if cache_path.exists():
+            plan_data = json.loads(_from_template(cache_path.read_text(), params))
+            # drop the cached id so every run gets its own plan in portia's storage
+            plan_data.pop("id", None)
+            plan = Plan.model_validate(plan_data)
+            self.portia.storage.save_plan(plan)
+            print(f"Plan cache hit: {cache_path.name}")
+            return plan
+
+        print("Plan cache miss, generating a new plan...")
+        plan = self.portia.plan(prompt)
+        plan_json = plan.model_dump_json(indent=2)
+        missing = [name for name, value in params.items() if value and _escaped(value) not in plan_json]
+        if missing:
+            print(f"Not caching plan, fields not found verbatim in the plan: {', '.join(missing)}")
+            return plan
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(_to_template(plan_json, params))
+        return plan
@@ -0,0 +1,62 @@
+"""
+JSON schema checks of function arguments, shared by the mock ACI server (which rejects invalid input
+with a 400, like the hosted API) and the OpenAI discovery example (which checks the arguments of
+ACI_EXECUTE_FUNCTION before sending them).
+
+Only the parts of JSON Schema used by the function definitions are checked: type (a name or a list
+of names), enum, required, additionalProperties: false, and items. Standard library only.
+"""
+
+from typing import Any
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _is_type(value: Any, expected: Any) -> bool:
+    if not isinstance(expected, str) or expected not in JSON_TYPES:
+        # not a type this module knows, left to the server
+        return True
+    if isinstance(value, bool):
+        # bool is a subclass of int, but not a JSON integer or number
+        return expected == "boolean"
+    if expected == "integer" and isinstance(value, float):
+        # JSON does not tell 5 from 5.0, both are integers
+        return value.is_integer()
+    return isinstance(value, JSON_TYPES[expected])
+
+
+def validate_arguments(schema: Any, value: Any, path: str = "function_arguments") -> str | None:
+    """The first violation of the JSON schema by the value, or None"""
+    if not isinstance(schema, dict):
+        return None
+    expected = schema.get("type")
+    if expected is not None:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_is_type(value, name) for name in types):
+            return f"{path} must be of type {' or '.join(map(str, types))}, got {type(value).__name__}"
+    if isinstance(schema.get("enum"), list) and value not in schema["enum"]:
+        return f"{path} must be one of {schema['enum']}, got {value!r}"
+    if isinstance(value, dict):
+        properties = schema.get("properties") or {}
+        for name in schema.get("required") or []:
+            if name not in value:
+                return f"{path} is missing the required property '{name}'"
+        for name, item in value.items():
+            if name in properties:
+                if error := validate_arguments(properties[name], item, f"{path}.{name}"):
+                    return error
+            elif schema.get("additionalProperties") is False:
+                return f"{path} has the unexpected property '{name}', expected one of {sorted(properties)}"
+    if isinstance(value, list) and isinstance(schema.get("items"), dict):
+        for index, item in enumerate(value):
+            if error := validate_arguments(schema["items"], item, f"{path}[{index}]"):
+                return error
+    return None
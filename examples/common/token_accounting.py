@@ -0,0 +1,233 @@
+"""
+Token accounting of the agent runs, per turn, per run, per tool schema and per tool call.
+
+The usage of a model response only tells the total input tokens of the request. RunAccount splits
+them between the parts of the request, so we can tell which optimization pays off:
+
+- system: the system prompt
+- tool_definitions: the tool schemas (tools_meta + tools_retrieved in the discovery pattern)
+- history: the user and assistant messages, including the tool calls
+- tool_results: the outputs of the tool calls
+
+Each part is estimated at ~4 characters per token, then the estimates are scaled to the input tokens
+reported by the model, so the parts add up to what was billed. The output tokens of a turn are split
+the same way between its text and its tool calls, so the tokens the model spends writing the arguments
+of each tool are tracked too. Works with the usage and messages of both the OpenAI chat completions
+and the Anthropic messages APIs (pass the Anthropic system prompt as a first "system" message).
+
+The cost of every tool schema (its tokens times the requests it was sent with) is tracked as well,
+and TokenLedger exports it all as JSON. Standard library only.
+"""
+
+import json
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+PARTS = ("system", "tool_definitions", "history", "tool_results")
+
+
+def estimate_tokens(value) -> int:
+    """Approximate tokens (~4 characters per token) of a string or of a JSON value"""
+    return len(value if isinstance(value, str) else json.dumps(value, default=str)) // 4
+
+
+def _scale(estimates: dict, total: int, remainder) -> dict:
+    """The estimates scaled to add up to the total, the rounding difference goes to the remainder key"""
+    estimated = sum(estimates.values())
+    scaled = {key: estimate * total // max(estimated, 1) for key, estimate in estimates.items()}
+    scaled[remainder] = scaled.get(remainder, 0) + total - sum(scaled.values())
+    return scaled
+
+
+def _usage_tokens(usage) -> tuple[int, int, int] | None:
+    """Input, output and cached input tokens of an OpenAI or Anthropic usage, or None"""
+    if usage is None:
+        return None
+    if hasattr(usage, "prompt_tokens"):
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+        return usage.prompt_tokens, usage.completion_tokens, cached
+    # Anthropic reports the tokens read from and written to the prompt cache apart from the others
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return usage.input_tokens + cache_read + cache_creation, usage.output_tokens, cache_read
+
+
+def _message_parts(message: dict) -> Iterable[tuple[str, Any]]:
+    """The parts of the request a message belongs to, with the content counted in each"""
+    if message["role"] == "system":
+        yield "system", message.get("content") or ""
+    elif message["role"] == "tool":
+        yield "tool_results", message.get("content") or ""
+    elif isinstance(message.get("content"), list):
+        # Anthropic content blocks, the tool results are sent in user messages
+        for block in message["content"]:
+            is_result = isinstance(block, dict) and block.get("type") == "tool_result"
+            yield ("tool_results" if is_result else "history"), block
+    else:
+        yield "history", message.get("content") or ""
+    if message.get("tool_calls"):
+        yield "history", message["tool_calls"]
+
+
+@dataclass
+class TurnUsage:
+    turn: int
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    system: int
+    tool_definitions: int
+    history: int
+    tool_results: int
+    # output tokens spent on the arguments of the tool calls, the rest is text
+    tool_call_tokens: int
+
+
+class RunAccount:
+    def __init__(self, run_id: str, pattern: str):
+        self.run_id = run_id
+        self.pattern = pattern
+        self.turns: list[TurnUsage] = []
+        # tool name -> tokens of its schema and number of requests it was sent with
+        self.tool_schemas: dict[str, dict[str, int]] = {}
+        # tool name -> number of calls the model made and output tokens it spent on them
+        self.tool_calls: dict[str, dict[str, int]] = {}
+
+    def record_turn(
+        self,
+        messages: list[dict],
+        tools: list[dict],
+        usage,
+        text: str | None = None,
+        tool_calls: Iterable[tuple[str, Any]] = (),
+    ) -> TurnUsage:
+        """
+        Attribute the usage of a model request to the messages and tools it was sent with, and its
+        output tokens to the text and to the (name, arguments) tool calls of the response
+        """
+        estimates = dict.fromkeys(PARTS, 0)
+        for message in messages:
+            for part, content in _message_parts(message):
+                estimates[part] += estimate_tokens(content)
+        for tool in tools:
+            tokens = estimate_tokens(tool)
+            estimates["tool_definitions"] += tokens
+            # {"type": "function", "function": {"name": ...}} for OpenAI, {"name": ...} for Anthropic
+            name = tool.get("function", tool)["name"]
+            schema = self.tool_schemas.setdefault(name, {"tokens": tokens, "requests": 0})
+            schema["requests"] += 1
+
+        tool_calls = list(tool_calls)
+        outputs: dict = {"text": estimate_tokens(text or "")}
+        for index, (name, arguments) in enumerate(tool_calls):
+            outputs[index] = estimate_tokens(name) + estimate_tokens(arguments)
+
+        tokens = _usage_tokens(usage)
+        input_tokens, output_tokens, cached_tokens = tokens if tokens else (sum(estimates.values()), 0, 0)
+        # scale the estimates to the billed tokens, the rounding differences go to the history and the text
+        attributed = _scale(estimates, input_tokens, remainder="history")
+        written = _scale(outputs, output_tokens, remainder="text")
+        for index, (name, _) in enumerate(tool_calls):
+            call = self.tool_calls.setdefault(name, {"calls": 0, "output_tokens": 0})
+            call["calls"] += 1
+            call["output_tokens"] += written[index]
+
+        turn = TurnUsage(
+            turn=len(self.turns) + 1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_tokens=cached_tokens,
+            tool_call_tokens=output_tokens - written["text"],
+            **attributed,
+        )
+        self.turns.append(turn)
+        return turn
+
+    def totals(self) -> dict[str, int]:
+        totals: dict[str, int] = defaultdict(int)
+        for turn in self.turns:
+            for key, value in asdict(turn).items():
+                if key != "turn":
+                    totals[key] += value
+        return dict(totals)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.run_id,
+            "pattern": self.pattern,
+            "totals": self.totals(),
+            "turns": [asdict(turn) for turn in self.turns],
+            "tool_schemas": self.tool_schemas,
+            "tool_calls": self.tool_calls,
+        }
+
+    def summary(self) -> str:
+        return _summary(self.totals())
+
+
+class TokenLedger:
+    """The accounts of all the runs of a batch"""
+
+    def __init__(self):
+        self.runs: list[RunAccount] = []
+
+    def new_run(self, run_id: str, pattern: str) -> RunAccount:
+        account = RunAccount(run_id, pattern)
+        self.runs.append(account)
+        return account
+
+    def totals(self) -> dict[str, int]:
+        totals: dict[str, int] = defaultdict(int)
+        for account in self.runs:
+            for key, value in account.totals().items():
+                totals[key] += value
+        return dict(totals)
+
+    def tool_schema_costs(self) -> dict[str, dict[str, int]]:
+        """Tokens spent on each tool schema over all the runs, most expensive first"""
+        costs: dict[str, dict[str, int]] = {}
+        for account in self.runs:
+            for name, schema in account.tool_schemas.items():
+                cost = costs.setdefault(name, {"tokens": schema["tokens"], "requests": 0, "total_tokens": 0})
+                cost["requests"] += schema["requests"]
+                cost["total_tokens"] += schema["tokens"] * schema["requests"]
+        return dict(sorted(costs.items(), key=lambda item: item[1]["total_tokens"], reverse=True))
+
+    def tool_call_costs(self) -> dict[str, dict[str, int]]:
+        """Output tokens spent on the calls of each tool over all the runs, most expensive first"""
+        costs: dict[str, dict[str, int]] = {}
+        for account in self.runs:
+            for name, call in account.tool_calls.items():
+                cost = costs.setdefault(name, {"calls": 0, "output_tokens": 0})
+                cost["calls"] += call["calls"]
+                cost["output_tokens"] += call["output_tokens"]
+        return dict(sorted(costs.items(), key=lambda item: item[1]["output_tokens"], reverse=True))
+
+    def to_dict(self) -> dict:
+        return {
+            "totals": self.totals(),
+            "tool_schemas": self.tool_schema_costs(),
+            "tool_calls": self.tool_call_costs(),
+            "runs": [account.to_dict() for account in self.runs],
+        }
+
+    def write(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
+
+    def summary(self) -> str:
+        return _summary(self.totals())
+
+
+def _summary(totals: dict[str, int]) -> str:
+    input_tokens = totals.get("input_tokens", 0)
+    shares = ", ".join(f"{part} {100 * totals.get(part, 0) / input_tokens:.0f}%" for part in PARTS if input_tokens)
+    cached_tokens = totals.get("cached_tokens", 0)
+    hit_rate = f"{100 * cached_tokens / input_tokens:.0f}%" if input_tokens else "n/a"
+    return (
+        f"tokens: {input_tokens} input ({shares or 'none'}), {totals.get('output_tokens', 0)} output "
+        f"({totals.get('tool_call_tokens', 0)} on tool calls), "
+        f"{cached_tokens} input tokens served from the prompt cache (hit rate {hit_rate})"
+    )
@@ -0,0 +1,27 @@
+"""
+Token bucket rate limiter for asyncio, shared by the batch runner (per provider) and the MCP gateway
+(per owner).
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `capacity` calls."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
@@ -0,0 +1,108 @@
+"""
+Summary policy for the tool outputs of a CAMEL agent step, shared by the CAMEL examples.
+
+An extra model call is only made when it is needed:
+
+1. the agent's own final message is returned when there is one
+2. small tool outputs are rendered with a deterministic template
+3. larger tool outputs are summarised by a summariser agent, one per model, reused across calls
+
+answer_or_summary_prompt() applies 1 and 2 and otherwise returns the prompt for 3, so the examples
+can step the summariser synchronously or asynchronously.
+"""
+
+import json
+from collections import defaultdict
+
+from rich import print as rprint
+
+# tool outputs up to this size (in characters of JSON) are summarized with a template instead of a model call
+SUMMARY_TEMPLATE_MAX_CHARS = 2000
+
+# one summariser agent per model, reused across calls instead of being rebuilt after every step
+_summarisers: dict = {}
+
+
+def _final_message(response) -> str | None:
+    """The agent's own final answer, if it produced one"""
+    if hasattr(response, "msg") and response.msg and response.msg.content:
+        return response.msg.content
+    if hasattr(response, "msgs") and response.msgs and response.msgs[-1].content:
+        return response.msgs[-1].content
+    return None
+
+
+def _structured_results(tool_calls) -> dict[str, list]:
+    structured_results: dict[str, list] = defaultdict(list)
+    for record in tool_calls:
+        # Ensure every value is JSON-serialisable
+        value = record.result
+        if not isinstance(value, (str, int, float, bool, list, dict, type(None))):
+            value = str(value)
+        structured_results[record.tool_name].append(value)
+    return structured_results
+
+
+def _template_summary(structured_results: dict[str, list], query: str) -> str:
+    lines = [f"Results for: {query}"]
+    for tool_name, values in structured_results.items():
+        for value in values:
+            rendered = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+            lines.append(f"- {tool_name}: {rendered}")
+    return "\n".join(lines)
+
+
+def get_summariser(model):
+    """The summariser agent of the model, reset so every summary is independent"""
+    # imported here, the summariser is only needed for large tool outputs
+    from camel.agents import ChatAgent
+    from camel.messages import BaseMessage
+
+    if id(model) not in _summarisers:
+        summariser_system_msg = BaseMessage.make_assistant_message(
+            role_name="Summariser",
+            content="You summarise tool outputs without calling any tools."
+        )
+        _summarisers[id(model)] = ChatAgent(
+            system_message=summariser_system_msg,
+            model=model,
+            tools=[]# ensure no tool recursion
+        )
+    summariser = _summarisers[id(model)]
+    summariser.reset()
+    return summariser
+
+
+def answer_or_summary_prompt(response, query: str) -> tuple[str | None, str | None]:
+    """
+    The answer to the query when no model call is needed, otherwise the prompt to send to the summariser.
+
+    Args:
+        response: The agent step response containing the tool call results
+        query: The original user query
+
+    Returns:
+        (answer, None), or (None, summary prompt) when the tool outputs must be summarised by the model
+    """
+    info = getattr(response, "info", {})
+    tool_calls = info.get("tool_calls", [])
+    final_message = _final_message(response)
+    # Return original response if no tools were called, or if the agent already answered
+    if not tool_calls:
+        rprint("\n[dim]No tools were called[/dim]")
+        return final_message or str(response), None
+    if final_message:
+        rprint("\n[dim]Using the agent's final message, no summary needed[/dim]")
+        return final_message, None
+
+    # Process tool call results and generate summary
+    structured_results = _structured_results(tool_calls)
+    tool_outputs_json = json.dumps(structured_results, ensure_ascii=False, indent=2)
+    rprint(f"\n[dim]Tool outputs: {tool_outputs_json}[/dim]")
+    if len(tool_outputs_json) <= SUMMARY_TEMPLATE_MAX_CHARS:
+        return _template_summary(structured_results, query), None
+
+    return None, (
+        f"Please summarize the following tool call results:{tool_outputs_json} "
+        f"and answer the user's question:{query} in natural language."
+    )
@@ -0,0 +1,151 @@
+"""
+OpenTelemetry tracing of the agent runs, exported to a local file or the console (no collector).
+
+The agent loops, the model clients, the ACI executor and the MCP clients create spans through the
+OpenTelemetry API, which does nothing until setup_tracing() installs an SDK tracer provider:
+
+- agent.run: one task or query, with one agent.turn child per model request and its tool executions
+- chat <model>: a model request, with the token usage of the response
+- aci.handle_function_call / aci.get_definition / mcp.call_tool: an ACI request, made directly or
+  through an MCP server, with the function name
+
+The file exporter writes one JSON span per line (trace and span ids, parent, start and end time in
+unix nanoseconds, attributes, status). Running this module on that file prints, for every run, how
+its wall time splits between the model, ACI_SEARCH_FUNCTIONS, ACI_EXECUTE_FUNCTION, the other ACI
+calls and local overhead, followed by a flame-style timeline of its spans:
+
+    python ../common/tracing.py traces.jsonl
+"""
+
+import argparse
+import json
+import os
+from collections import defaultdict
+from typing import Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+
+# width of the timeline bars, in characters
+TIMELINE_WIDTH = 60
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    def __init__(self, path: str):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        for span in spans:
+            record = {
+                "name": span.name,
+                "trace_id": format(span.context.trace_id, "032x"),
+                "span_id": format(span.context.span_id, "016x"),
+                "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                "start_time_unix_nano": span.start_time,
+                "end_time_unix_nano": span.end_time,
+                "attributes": dict(span.attributes or {}),
+                "status": span.status.status_code.name,
+            }
+            self.file.write(json.dumps(record, default=str) + "\n")
+        self.file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        self.file.close()
+
+
+def setup_tracing(path: str | None = None, console: bool = False, service_name: str = "aci-agents") -> TracerProvider:
+    """
+    Export the spans to the JSONL file at `path` (defaults to the TRACES_FILE environment variable)
+    and/or to the console. Call shutdown() on the returned provider to flush the spans.
+    """
+    path = path or os.getenv("TRACES_FILE")
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    if path:
+        provider.add_span_processor(BatchSpanProcessor(JsonLinesSpanExporter(path)))
+    if console:
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+def _category(span: dict) -> str:
+    if span["name"].startswith("chat "):
+        return "model"
+    if span["name"].startswith(("aci.", "mcp.")):
+        function_name = span["attributes"].get("aci.function_name", "")
+        if function_name in ("ACI_SEARCH_FUNCTIONS", "ACI_EXECUTE_FUNCTION"):
+            return function_name
+        return "other ACI calls"
+    return ""
+
+
+def _covered(intervals: list[tuple[int, int]]) -> int:
+    """Total length of the union of the intervals, as concurrent calls overlap"""
+    total, end = 0, None
+    for start, stop in sorted(intervals):
+        if end is None or start > end:
+            total += stop - start
+            end = stop
+        elif stop > end:
+            total += stop - end
+            end = stop
+    return total
+
+
+def print_run(root: dict, children: dict[str, list[dict]]) -> None:
+    spans, stack = [], [(root, 0)]
+    while stack:
+        span, depth = stack.pop()
+        spans.append((span, depth))
+        stack.extend((child, depth + 1) for child in reversed(children[span["span_id"]]))
+
+    start, end = root["start_time_unix_nano"], root["end_time_unix_nano"]
+    duration = max(end - start, 1)
+    intervals: dict[str, list[tuple[int, int]]] = defaultdict(list)
+    for span, _ in spans:
+        if category := _category(span):
+            intervals[category].append((span["start_time_unix_nano"], span["end_time_unix_nano"]))
+
+    attributes = root["attributes"]
+    label = attributes.get("task.id", attributes.get("agent.query", ""))
+    print(f"\n{root['name']} {label} ({attributes.get('agent.pattern', '')}): {duration / 1e9:.2f}s")
+    busy = _covered([interval for category_intervals in intervals.values() for interval in category_intervals])
+    breakdown = {category: _covered(category_intervals) for category, category_intervals in intervals.items()}
+    breakdown["local overhead"] = duration - busy
+    for category, nanoseconds in breakdown.items():
+        print(f"  {category:<22} {nanoseconds / 1e9:7.2f}s {100 * nanoseconds / duration:5.1f}%")
+
+    print()
+    for span, depth in spans:
+        offset = (span["start_time_unix_nano"] - start) * TIMELINE_WIDTH // duration
+        width = max(1, (span["end_time_unix_nano"] - span["start_time_unix_nano"]) * TIMELINE_WIDTH // duration)
+        label = span["attributes"].get("aci.function_name", span["name"])
+        seconds = (span["end_time_unix_nano"] - span["start_time_unix_nano"]) / 1e9
+        bar = f"{' ' * offset}{'█' * width}".ljust(TIMELINE_WIDTH)
+        print(f"  {bar} {'  ' * depth}{label} {seconds:.2f}s")
+
+
+def print_timelines(path: str) -> None:
+    with open(path, encoding="utf-8") as traces_file:
+        spans = [json.loads(line) for line in traces_file if line.strip()]
+    children: dict[str, list[dict]] = defaultdict(list)
+    for span in sorted(spans, key=lambda span: span["start_time_unix_nano"]):
+        children[span["parent_id"]].append(span)
+    for span in spans:
+        if span["name"] == "agent.run":
+            print_run(span, children)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the time breakdown and timeline of traced agent runs")
+    parser.add_argument("traces", help="JSONL file written by the file exporter")
+    print_timelines(parser.parse_args().traces)
@@ -6,8 +6,6 @@ from typing import Callable
 from aci import ACI
 from aci.types.functions import FunctionDefinitionFormat
 from dotenv import load_dotenv
-from llama_index.core.agent.workflow import FunctionAgent
-from llama_index.llms.openai import OpenAI
 from rich import print as rprint
 
 
@@ -97,6 +95,9 @@ def github_get_repository_languages(owner: str, repo: str) -> str:
 
 
 async def main() -> None:
+    from llama_index.core.agent.workflow import FunctionAgent
+    from llama_index.llms.openai import OpenAI
+
     agent = FunctionAgent(
         tools=[github_star_repository, github_get_user, github_get_repository_languages],
         llm=OpenAI(model="gpt-4o-mini"),
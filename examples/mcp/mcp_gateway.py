@@ -0,0 +1,243 @@
+"""
+A multi-tenant gateway in front of a small, fixed pool of ACI MCP server processes.
+
+unified_mcp_multi_user.py shows how to override the linked account owner per ACI_EXECUTE_FUNCTION
+call against a single server. This gateway builds on the same override to serve many end users:
+
+- keeps a pool of MCP sessions open (one server process each) and routes every owner to the
+  same session, so an owner's calls are never spread over servers
+- enforces a per-owner concurrency limit and a per-owner rate limit (token bucket), so one busy
+  owner cannot starve the others
+- caps the number of in-flight calls per session
+- records per-owner call counts, errors and latency percentiles, available via stats()
+- keeps the state (limits and stats) of at most max_owners owners, dropping the least recently
+  used ones and the ones idle for owner_idle_timeout seconds, so memory does not grow with the
+  number of owners ever seen
+- traces every call as an OpenTelemetry mcp.call_tool span (see ../common/tracing.py), with a hash
+  of the owner id instead of the id
+
+Usage:
+    async with MCPGateway(server_params, pool_size=4) as gateway:
+        result = await gateway.call_tool(owner_id, "ACI_EXECUTE_FUNCTION", {...})
+        print(gateway.stats())
+"""
+
+import asyncio
+import hashlib
+import os
+import statistics
+import sys
+import time
+import zlib
+from collections import OrderedDict, deque
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from aci.meta_functions import ACIExecuteFunction
+from dotenv import load_dotenv
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from opentelemetry import trace
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from token_bucket import TokenBucket  # noqa: E402
+
+load_dotenv()
+
+tracer = trace.get_tracer(__name__)
+
+# number of latency samples kept per owner for the percentiles
+LATENCY_WINDOW = 1000
+
+
+def owner_hash(owner_id: str) -> str:
+    """A stable pseudonym of the owner id for the span attributes, so the traces never hold the id"""
+    return hashlib.sha256(owner_id.encode()).hexdigest()[:16]
+
+
+@dataclass
+class OwnerState:
+    semaphore: asyncio.Semaphore
+    bucket: TokenBucket
+    calls: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    # calls admitted and not finished, waiting or running, the state is never dropped while there are any
+    pending: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class MCPGateway:
+    def __init__(
+        self,
+        server_params: StdioServerParameters,
+        pool_size: int = 4,
+        max_concurrency_per_owner: int = 4,
+        max_calls_per_second_per_owner: float = 5.0,
+        burst_per_owner: int = 10,
+        max_in_flight_per_session: int = 64,
+        max_owners: int = 10_000,
+        owner_idle_timeout: float = 600.0,
+    ):
+        self.server_params = server_params
+        self.pool_size = pool_size
+        self.max_concurrency_per_owner = max_concurrency_per_owner
+        self.max_calls_per_second_per_owner = max_calls_per_second_per_owner
+        self.burst_per_owner = burst_per_owner
+        self.max_in_flight_per_session = max_in_flight_per_session
+        self.max_owners = max_owners
+        # longer than a bucket takes to refill, so dropping an idle owner never loosens its rate limit
+        self.owner_idle_timeout = max(owner_idle_timeout, burst_per_owner / max_calls_per_second_per_owner)
+
+        self.exit_stack = AsyncExitStack()
+        self.sessions: list[ClientSession] = []
+        self.session_semaphores: list[asyncio.Semaphore] = []
+        # least recently used first
+        self.owners: OrderedDict[str, OwnerState] = OrderedDict()
+        self.evicted_owners = 0
+
+    async def __aenter__(self) -> "MCPGateway":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Start the server processes and open one session to each of them"""
+        for _ in range(self.pool_size):
+            read, write = await self.exit_stack.enter_async_context(stdio_client(self.server_params))
+            session = await self.exit_stack.enter_async_context(ClientSession(read, write))
+            self.sessions.append(session)
+            self.session_semaphores.append(asyncio.Semaphore(self.max_in_flight_per_session))
+        await asyncio.gather(*(session.initialize() for session in self.sessions))
+
+    async def close(self) -> None:
+        await self.exit_stack.aclose()
+
+    def _admit(self, owner_id: str) -> OwnerState:
+        """The state of the owner, with one more pending call"""
+        owner = self.owners.get(owner_id)
+        if owner is None:
+            owner = self.owners[owner_id] = OwnerState(
+                semaphore=asyncio.Semaphore(self.max_concurrency_per_owner),
+                bucket=TokenBucket(self.max_calls_per_second_per_owner, self.burst_per_owner),
+            )
+        self.owners.move_to_end(owner_id)
+        owner.pending += 1
+        self._evict_owners()
+        return owner
+
+    def _evict_owners(self) -> None:
+        """Drop the idle owners, and the least recently used ones beyond max_owners"""
+        now = time.monotonic()
+        evicted = []
+        for owner_id, owner in self.owners.items():
+            if len(self.owners) - len(evicted) <= self.max_owners and now - owner.last_used < self.owner_idle_timeout:
+                # the next owners were used more recently
+                break
+            if owner.pending == 0:
+                evicted.append(owner_id)
+        # nothing to close, the sessions are shared by all the owners
+        for owner_id in evicted:
+            del self.owners[owner_id]
+        self.evicted_owners += len(evicted)
+
+    def _session_index(self, owner_id: str) -> int:
+        # stable hash, so an owner always lands on the same session across runs
+        return zlib.crc32(owner_id.encode()) % len(self.sessions)
+
+    async def list_tools(self):
+        return await self.sessions[0].list_tools()
+
+    async def call_tool(self, owner_id: str, tool_name: str, tool_args: dict):
+        """Call a tool on behalf of the given linked account owner"""
+        tool_args = dict(tool_args)
+        # same override as in unified_mcp_multi_user.py, so the server executes with the owner's linked account
+        if tool_name == ACIExecuteFunction.get_name():
+            tool_args["aci_override_linked_account_owner_id"] = owner_id
+
+        index = self._session_index(owner_id)
+        owner = self._admit(owner_id)
+        try:
+            return await self._call_tool(owner, owner_id, index, tool_name, tool_args)
+        finally:
+            owner.pending -= 1
+            owner.last_used = time.monotonic()
+
+    async def _call_tool(self, owner: OwnerState, owner_id: str, index: int, tool_name: str, tool_args: dict):
+        async with owner.semaphore:
+            await owner.bucket.acquire()
+            async with self.session_semaphores[index]:
+                owner.in_flight += 1
+                started_at = time.perf_counter()
+                try:
+                    with tracer.start_as_current_span(
+                        "mcp.call_tool",
+                        attributes={
+                            "mcp.tool_name": tool_name,
+                            "aci.function_name": tool_name,
+                            # the owner id identifies an end user, the traces only tell the owners apart
+                            "aci.linked_account_owner_hash": owner_hash(owner_id),
+                            "mcp.session": index,
+                        },
+                    ):
+                        return await self.sessions[index].call_tool(tool_name, tool_args)
+                except Exception:
+                    owner.errors += 1
+                    raise
+                finally:
+                    owner.calls += 1
+                    owner.in_flight -= 1
+                    owner.latencies.append(time.perf_counter() - started_at)
+
+    def stats(self) -> dict[str, dict]:
+        """Per-owner call counts, errors and latency percentiles (in milliseconds), of the owners still tracked"""
+        stats = {}
+        for owner_id, owner in self.owners.items():
+            latencies = sorted(owner.latencies)
+            stats[owner_id] = {
+                "session": self._session_index(owner_id),
+                "calls": owner.calls,
+                "errors": owner.errors,
+                "in_flight": owner.in_flight,
+                "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+                "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else None,
+                "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+            }
+        return stats
+
+
+async def main():
+    server_params = StdioServerParameters(
+        command="uvx",
+        args=["aci-mcp", "unified-server", "--linked-account-owner-id", os.getenv("LINKED_ACCOUNT_OWNER_ID")],
+        env={"ACI_API_KEY": os.getenv("ACI_API_KEY")}
+    )
+    owner_ids = os.getenv("GATEWAY_OWNER_IDS", os.getenv("LINKED_ACCOUNT_OWNER_ID")).split(",")
+    # set TRACES_FILE to trace the calls, show them with `python ../common/tracing.py <file>`
+    tracer_provider = None
+    if os.getenv("TRACES_FILE"):
+        # the OpenTelemetry SDK is only loaded when tracing is on, from examples/common (put on sys.path above)
+        from tracing import setup_tracing
+
+        tracer_provider = setup_tracing()
+
+    async with MCPGateway(server_params, pool_size=2) as gateway:
+        # every owner searches for functions concurrently, each call routed to the owner's session
+        await asyncio.gather(*(
+            gateway.call_tool(owner_id, "ACI_SEARCH_FUNCTIONS", {"intent": "search the web", "limit": 1})
+            for owner_id in owner_ids
+            for _ in range(3)
+        ))
+        for owner_id, owner_stats in gateway.stats().items():
+            print(owner_id, owner_stats)
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
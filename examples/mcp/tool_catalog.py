@@ -0,0 +1,87 @@
+"""
+Tool catalog cache for MCP clients.
+
+Listing the tools of an MCP server costs a round trip on every start (and the full tool list can be large).
+ToolCatalog fetches the list at most once per session and persists it on disk, keyed by a fingerprint
+of the server (name, version and launch arguments), so the next start can skip list_tools entirely.
+The cached list is dropped when the server sends a tools/list_changed notification, when the server
+fingerprint changes, or when it is older than max_age_seconds (tools of the ACI apps server also depend
+on the apps configured on the platform, which the fingerprint cannot see).
+
+Usage:
+    catalog = ToolCatalog(server_params)
+    session = ClientSession(read, write, message_handler=catalog.message_handler)
+    init_result = await session.initialize()
+    tools = await catalog.get_tools(session, init_result.serverInfo)
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from mcp import ClientSession, StdioServerParameters, types
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".mcp_tool_cache"
+
+
+class ToolCatalog:
+    def __init__(
+        self,
+        server_params: StdioServerParameters,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_age_seconds: float = 24 * 60 * 60,
+    ):
+        self.server_params = server_params
+        self.cache_dir = cache_dir
+        self.max_age_seconds = max_age_seconds
+        self._tools: list[types.Tool] | None = None
+        self._server_info: types.Implementation | None = None
+        # set by a list_changed notification received before the server was known, skips the disk cache once
+        self._stale = False
+
+    def _cache_path(self, server_info: types.Implementation) -> Path:
+        # the api key in the env is deliberately left out of the fingerprint
+        fingerprint = json.dumps(
+            [server_info.name, server_info.version, self.server_params.command, self.server_params.args]
+        )
+        return self.cache_dir / f"{hashlib.sha256(fingerprint.encode()).hexdigest()}.json"
+
+    async def message_handler(self, message) -> None:
+        """Pass as the message_handler of the ClientSession to refresh the catalog on change notifications"""
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop the tools of this catalog's server only, the cache files of other servers are kept"""
+        self._tools = None
+        if self._server_info is None:
+            self._stale = True
+        else:
+            self._cache_path(self._server_info).unlink(missing_ok=True)
+
+    async def get_tools(self, session: ClientSession, server_info: types.Implementation) -> list[types.Tool]:
+        """Return the server tools from memory, then from disk, and only then from the server"""
+        if self._tools is not None:
+            return self._tools
+
+        self._server_info = server_info
+        cache_path = self._cache_path(server_info)
+        if self._stale:
+            self._stale = False
+        elif cache_path.exists():
+            cached = json.loads(cache_path.read_text())
+            if time.time() - cached["fetched_at"] < self.max_age_seconds:
+                self._tools = [types.Tool.model_validate(tool) for tool in cached["tools"]]
+                return self._tools
+
+        response = await session.list_tools()
+        self._tools = response.tools
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps({
+            "fetched_at": time.time(),
+            "tools": [tool.model_dump(mode="json") for tool in self._tools],
+        }))
+        return self._tools
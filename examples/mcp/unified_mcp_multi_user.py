@@ -14,6 +14,16 @@ Below is an MCP client example that showcases how to adapt to this temporary sol
 
 What's need to be done is basciaclly to intercept the ACI_EXECUTE_FUNCTION tool call and 
 add the "linked_account_owner_id" parameter to the tool call arguments.
+
+To serve many end users from a small, fixed set of server processes (with per-user concurrency
+and rate limits), see mcp_gateway.py.
+
+The tool list and the previous turns are identical on every request of a query, so they are sent
+with prompt cache breakpoints and read from Anthropic's prompt cache on every turn after the first;
+the cache hit rate is printed after every query.
+
+Set TRACES_FILE to trace every query (model requests and MCP tool calls) to that file, and show the
+timelines with `python ../common/tracing.py <file>`.
 """
 
 from aci.meta_functions import ACIExecuteFunction
@@ -22,22 +32,51 @@ import asyncio
 from typing import Optional
 from contextlib import AsyncExitStack
 import os
+import sys
+from pathlib import Path
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
-from anthropic import Anthropic
+from opentelemetry import trace
 
+from tool_catalog import ToolCatalog
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
 
 load_dotenv()
 
+tracer = trace.get_tracer(__name__)
+
 ACI_OVERRIDE_LINKED_ACCOUNT_OWNER_ID = <YOUR_LINKED_ACCOUNT_OWNER_ID_OVERRIDE>
 
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def with_cache_breakpoint(messages: list[dict]) -> list[dict]:
+    """Copy of the messages with a cache breakpoint on the last content block only (at most 4 breakpoints are allowed)"""
+    *previous_messages, last_message = messages
+    content = last_message["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    *previous_blocks, last_block = content
+    return previous_messages + [
+        {**last_message, "content": previous_blocks + [{**last_block, "cache_control": CACHE_CONTROL}]}
+    ]
+
+
 class MCPClient:
     def __init__(self):
+        from anthropic import AsyncAnthropic
+
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
+        self.tool_catalog: Optional[ToolCatalog] = None
+        self.server_info = None
         self.exit_stack = AsyncExitStack()
-        self.anthropic = Anthropic()
+        self.anthropic = AsyncAnthropic()
+        # input tokens read from the prompt cache, written to it, and not cached
+        self.cache_stats = {"read": 0, "created": 0, "uncached": 0}
 
     async def connect_to_server(self):
         """Connect to an MCP server
@@ -48,18 +87,152 @@ class MCPClient:
             env={"ACI_API_KEY": os.getenv("ACI_API_KEY")}
         )
 
+        # the tool list is fetched once per session (or loaded from disk) and refreshed on list_changed notifications
+        self.tool_catalog = ToolCatalog(server_params)
+
         stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
         self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(self.stdio, self.write, message_handler=self.tool_catalog.message_handler)
+        )
 
-        await self.session.initialize()
+        init_result = await self.session.initialize()
+        self.server_info = init_result.serverInfo
 
         # List available tools
-        response = await self.session.list_tools()
-        tools = response.tools
+        tools = await self.tool_catalog.get_tools(self.session, self.server_info)
         print("\nConnected to server with tools:", [tool.name for tool in tools])
 
 
+    async def list_available_tools(self) -> list[dict]:
+        """
+        List the server tools in the format expected by the Anthropic messages API, sorted by name so
+        the tools prefix is identical on every request, and cached from the last tool
+        """
+        tools = await self.tool_catalog.get_tools(self.session, self.server_info)
+        available_tools = [{
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": tool.inputSchema
+        } for tool in sorted(tools, key=lambda tool: tool.name)]
+        if available_tools:
+            available_tools[-1]["cache_control"] = CACHE_CONTROL
+        return available_tools
+
+    async def call_tool(self, tool_use, linked_account_owner_id: str) -> dict:
+        """Execute a single tool_use block over the MCP session and build its tool_result block"""
+        tool_name = tool_use.name
+        tool_args = dict(tool_use.input)
+        print(f"[Calling tool {tool_name} with args {tool_args}]")
+
+        # inject the aci_override_linked_account_owner_id parameter for the ACI_EXECUTE_FUNCTION tool call
+        # to override the linked_account_owner_id parameter
+        if tool_name == ACIExecuteFunction.get_name():
+            tool_args["aci_override_linked_account_owner_id"] = linked_account_owner_id
+
+        try:
+            with tracer.start_as_current_span(
+                "mcp.call_tool", attributes={"mcp.tool_name": tool_name, "aci.function_name": tool_name}
+            ):
+                result = await self.session.call_tool(tool_name, tool_args)
+        except Exception as e:
+            print(f"[Tool {tool_name} failed: {e}]")
+            return {"type": "tool_result", "tool_use_id": tool_use.id, "content": str(e), "is_error": True}
+
+        print(f"[Tool {tool_name} result: {result.content}]")
+        return {"type": "tool_result", "tool_use_id": tool_use.id, "content": result.content}
+
+    async def process_query(
+        self,
+        query: str,
+        messages: list[dict],
+        available_tools: list[dict],
+        linked_account_owner_id: str = ACI_OVERRIDE_LINKED_ACCOUNT_OWNER_ID,
+    ) -> None:
+        """
+        Run one user query to completion, appending to the given conversation history.
+
+        Nothing here blocks the event loop, and all the tool_use blocks of one model response are
+        dispatched concurrently over the MCP session, so many users (each with their own messages
+        and linked_account_owner_id) can be served concurrently by one client.
+        """
+        messages.append({
+            "role": "user",
+            "content": query
+        })
+
+        with tracer.start_as_current_span("agent.run", attributes={"agent.query": query[:100]}):
+            while True:
+                with tracer.start_as_current_span("agent.turn"):
+                    tool_uses = await self._run_turn(messages, available_tools, linked_account_owner_id)
+                if not tool_uses:
+                    break
+
+        total = sum(self.cache_stats.values())
+        if total:
+            print(
+                f"[Prompt cache hit rate: {100 * self.cache_stats['read'] / total:.0f}% of {total} input tokens "
+                f"({self.cache_stats['created']} written to cache, {self.cache_stats['uncached']} uncached)]"
+            )
+
+    async def _run_turn(self, messages: list[dict], available_tools: list[dict], linked_account_owner_id: str) -> list:
+        """Send one model request and run its tool calls, returns the tool_use blocks of the response"""
+        model = "claude-3-5-sonnet-20241022"
+        with tracer.start_as_current_span(
+            f"chat {model}",
+            attributes={"gen_ai.operation.name": "chat", "gen_ai.system": "anthropic", "gen_ai.request.model": model},
+        ) as span:
+            response = await self.anthropic.messages.create(
+                model=model,
+                max_tokens=1000,
+                messages=with_cache_breakpoint(messages),
+                tools=available_tools
+            )
+            usage = response.usage
+            self.cache_stats["read"] += usage.cache_read_input_tokens or 0
+            self.cache_stats["created"] += usage.cache_creation_input_tokens or 0
+            self.cache_stats["uncached"] += usage.input_tokens
+            span.set_attributes({
+                "gen_ai.usage.input_tokens": usage.input_tokens,
+                "gen_ai.usage.output_tokens": usage.output_tokens,
+                "gen_ai.usage.cache_read_input_tokens": usage.cache_read_input_tokens or 0,
+                "gen_ai.usage.cache_creation_input_tokens": usage.cache_creation_input_tokens or 0,
+            })
+
+        assistant_message_content = []
+        tool_uses = []
+        for content in response.content:
+            if content.type == 'text':
+                print(content.text)
+                assistant_message_content.append({
+                    "type": "text",
+                    "text": content.text
+                })
+            elif content.type == 'tool_use':
+                assistant_message_content.append({
+                    "type": "tool_use",
+                    "id": content.id,
+                    "name": content.name,
+                    "input": content.input
+                })
+                tool_uses.append(content)
+
+        messages.append({
+            "role": "assistant",
+            "content": assistant_message_content
+        })
+
+        if tool_uses:
+            # Execute all tool calls of this response concurrently, results are returned in the same order
+            tool_results = await asyncio.gather(
+                *(self.call_tool(tool_use, linked_account_owner_id) for tool_use in tool_uses)
+            )
+            messages.append({
+                "role": "user",
+                "content": list(tool_results)
+            })
+        return tool_uses
+
     async def chat_loop(self):
         """Run an interactive chat loop"""
         print("\nMCP Client Started!")
@@ -67,70 +240,17 @@ class MCPClient:
 
         messages = []
 
-        response = await self.session.list_tools()
-        available_tools = [{
-            "name": tool.name,
-            "description": tool.description,
-            "input_schema": tool.inputSchema
-        } for tool in response.tools]
-
-
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                # read the input in a worker thread so the event loop is not blocked while waiting
+                query = (await asyncio.to_thread(input, "\nQuery: ")).strip()
 
                 if query.lower() == 'quit':
                     break
 
-                messages.append({
-                    "role": "user",
-                    "content": query
-                })
-
-                response = self.anthropic.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=1000,
-                    messages=messages,
-                    tools=available_tools
-                )
-
-                assistant_message_content = []
-                for content in response.content:
-                    if content.type == 'text':
-                        print(content.text)
-                        assistant_message_content.append({
-                            "type": "text",
-                            "text": content.text
-                        })
-                    elif content.type == 'tool_use':
-                        tool_name = content.name
-                        tool_args = content.input
-                        assistant_message_content.append({
-                            "type": "tool_use",
-                            "id": content.id,
-                            "name": tool_name,
-                            "input": tool_args
-                        })
-                        # Execute tool call
-                        print(f"[Calling tool {tool_name} with args {tool_args}]")
-                        messages.append({
-                            "role": "assistant",
-                            "content": assistant_message_content
-                        })
-
-                        # inject the aci_override_linked_account_owner_id parameter for the ACI_EXECUTE_FUNCTION tool call
-                        # to override the linked_account_owner_id parameter
-                        if tool_name == ACIExecuteFunction.get_name():
-                            tool_args["aci_override_linked_account_owner_id"] = ACI_OVERRIDE_LINKED_ACCOUNT_OWNER_ID
-
-                        result = await self.session.call_tool(tool_name, tool_args)
-                        print(f"[Tool {tool_name} result: {result.content}]")
-
-                        messages.append({
-                            "role": "user",
-                            "content": [{"type": "tool_result", "tool_use_id": content.id, "content": result.content}]
-                        })
-
+                # served from the tool catalog, only hits the server again after a list_changed notification
+                available_tools = await self.list_available_tools()
+                await self.process_query(query, messages, available_tools)
 
             except Exception as e:
                 print(f"\nError: {str(e)}")
@@ -141,6 +261,12 @@ class MCPClient:
 
 
 async def main():
+    tracer_provider = None
+    if os.getenv("TRACES_FILE"):
+        # the OpenTelemetry SDK is only loaded when tracing is on, from examples/common (put on sys.path above)
+        from tracing import setup_tracing
+
+        tracer_provider = setup_tracing()
     client = MCPClient()
     try:
         await client.connect_to_server()
@@ -148,6 +274,8 @@ async def main():
         await client.chat_loop()
     finally:
         await client.cleanup()
+        if tracer_provider is not None:
+            tracer_provider.shutdown()
 
 if __name__ == "__main__":
     asyncio.run(main())        
\ No newline at end of file
@@ -5,20 +5,12 @@ from aci import ACI
 from aci.meta_functions import ACISearchFunctions
 from aci.types.functions import FunctionDefinitionFormat
 from dotenv import load_dotenv
-from mistralai import Mistral
-from rich import print as rprint
-from rich.panel import Panel
 
 load_dotenv()
 LINKED_ACCOUNT_OWNER_ID = os.getenv("LINKED_ACCOUNT_OWNER_ID", "")
 if not LINKED_ACCOUNT_OWNER_ID:
     raise ValueError("LINKED_ACCOUNT_OWNER_ID is not set")
 
-# gets MISTRAL_API_KEY from your environment variables
-mistral = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
-# gets AIPOLABS_ACI_API_KEY from your environment variables
-aci = ACI()
-
 prompt = (
     "You are a helpful assistant with access to a unlimited number of tools via a meta function: "
     "ACI_SEARCH_FUNCTIONS"
@@ -36,6 +28,15 @@ tools_retrieved: list[dict] = []
 
 
 def main() -> None:
+    from mistralai import Mistral
+    from rich import print as rprint
+    from rich.panel import Panel
+
+    # gets MISTRAL_API_KEY from your environment variables
+    mistral = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+    # gets AIPOLABS_ACI_API_KEY from your environment variables
+    aci = ACI()
+
     # Start the LLM processing loop
     chat_history: list[dict] = []
 
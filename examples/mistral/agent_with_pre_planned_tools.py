@@ -4,9 +4,6 @@ import os
 from aci import ACI
 from aci.types.functions import FunctionDefinitionFormat
 from dotenv import load_dotenv
-from mistralai import Mistral
-from rich import print as rprint
-from rich.panel import Panel
 
 load_dotenv(override=True)
 LINKED_ACCOUNT_OWNER_ID = os.getenv("LINKED_ACCOUNT_OWNER_ID", "")
@@ -14,13 +11,16 @@ if not LINKED_ACCOUNT_OWNER_ID:
     raise ValueError("LINKED_ACCOUNT_OWNER_ID is not set")
 
 
-# gets MISTRAL_API_KEY from your environment variables
-mistral = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
-# gets ACI_API_KEY from your environment variables
-aci = ACI()
+def main() -> None:
+    from mistralai import Mistral
+    from rich import print as rprint
+    from rich.panel import Panel
 
+    # gets MISTRAL_API_KEY from your environment variables
+    mistral = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+    # gets ACI_API_KEY from your environment variables
+    aci = ACI()
 
-def main() -> None:
     # For a list of all supported apps and functions, please go to the platform.aci.dev
     brave_search_function_definition = aci.functions.get_definition(
         "BRAVE_SEARCH__WEB_SEARCH"
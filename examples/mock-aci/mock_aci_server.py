@@ -0,0 +1,239 @@
+"""
+Local stand-in for the ACI API, for developing and benchmarking the examples offline.
+
+Serves the endpoints the ACI SDK uses for function search, definitions and execution from a fixture
+catalog of function definitions (functions.json):
+
+- GET  /v1/functions/search?intent=...&app_names=...&format=...&limit=...&offset=...
+- GET  /v1/functions/<function_name>/definition?format=...
+- POST /v1/functions/<function_name>/execute  {"function_input": {...}, "linked_account_owner_id": "..."}
+
+so ACI_SEARCH_FUNCTIONS, get_definition and handle_function_call work unchanged once the SDK points
+at it, e.g. with ACI(base_url="http://127.0.0.1:8787/v1/") or by setting ACI_SERVER_URL (any
+ACI_API_KEY is accepted). Search ranks the catalog by the words the intent shares with each function's
+name and description; execution validates the arguments against the function's schema (400 on
+invalid input, like the hosted API) and returns the function's "mock_response" from the catalog, or
+an echo of the arguments.
+
+Every request waits --latency-ms (plus up to --jitter-ms), fails with --error-status at --error-rate,
+and execution results are padded to at least --payload-bytes, to reproduce slow, flaky or verbose
+apps. Only the Python standard library is needed.
+
+Usage:
+    python mock_aci_server.py --port 8787 --latency-ms 150 --jitter-ms 100 --error-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlparse
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from schema_validation import validate_arguments  # noqa: E402
+
+DEFAULT_CATALOG = Path(__file__).with_name("functions.json")
+
+FUNCTION_PATH = re.compile(r"^(?:/v1)?/functions/(?P<name>[^/]+)/(?P<action>definition|execute)$")
+SEARCH_PATH = re.compile(r"^(?:/v1)?/functions/search$")
+
+
+class MockACI:
+    """The fixture catalog and the simulated latency, errors and payload sizes"""
+
+    def __init__(
+        self,
+        catalog: list[dict],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        payload_bytes: int = 0,
+        seed: int | None = None,
+    ):
+        self.functions = {function["name"]: function for function in catalog}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payload_bytes = payload_bytes
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests: dict[str, int] = {"search": 0, "definition": 0, "execute": 0, "injected_errors": 0}
+
+    @classmethod
+    def from_file(cls, path: str | Path, **options) -> "MockACI":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")), **options)
+
+    def simulate(self, endpoint: str) -> bool:
+        """Count the request and wait its latency, returns True when it must fail with an injected error"""
+        with self.lock:
+            self.requests[endpoint] += 1
+            delay = (self.latency_ms + self.random.uniform(0, self.jitter_ms)) / 1000
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.requests["injected_errors"] += 1
+        time.sleep(delay)
+        return failed
+
+    def definition(self, function: dict, format: str) -> dict:
+        """The definition of a function in one of the SDK's FunctionDefinitionFormat values"""
+        name, description, parameters = function["name"], function["description"], function["parameters"]
+        if format == "basic":
+            return {"name": name, "description": description}
+        if format == "anthropic":
+            return {"name": name, "description": description, "input_schema": parameters}
+        if format == "openai_responses":
+            return {"type": "function", "name": name, "description": description, "parameters": parameters}
+        return {"type": "function", "function": {"name": name, "description": description, "parameters": parameters}}
+
+    def search(self, intent: str, app_names: list[str], format: str, limit: int, offset: int) -> list[dict]:
+        words = set(re.findall(r"[a-z0-9]+", intent.lower()))
+        scored = []
+        for position, function in enumerate(self.functions.values()):
+            if app_names and function["name"].split("__")[0] not in app_names:
+                continue
+            text = f"{function['name'].replace('_', ' ')} {function['description']}".lower()
+            score = len(words & set(re.findall(r"[a-z0-9]+", text)))
+            if score or not words:
+                scored.append((-score, position, function))
+        return [self.definition(function, format) for _, _, function in sorted(scored)[offset : offset + limit]]
+
+    def execute(self, function: dict, function_input: dict) -> tuple[int, dict]:
+        if error := validate_arguments(function["parameters"], function_input, "function_input"):
+            return HTTPStatus.BAD_REQUEST, {"error": f"Invalid input for function {function['name']}: {error}"}
+        data = function.get("mock_response", {"function_name": function["name"], "arguments": function_input})
+        result: dict[str, Any] = {"success": True, "data": data}
+        padding = self.payload_bytes - len(json.dumps(result))
+        if padding > 0:
+            # a large result, e.g. a full page of search results or an email thread
+            result["data"] = {"result": data, "padding": "x" * padding}
+        return HTTPStatus.OK, result
+
+
+class MockACIHandler(BaseHTTPRequestHandler):
+    server: "MockACIServer"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        format = query.get("format", ["basic"])[0]
+        mock = self.server.mock
+
+        if SEARCH_PATH.match(url.path):
+            if mock.simulate("search"):
+                return self.send_injected_error()
+            results = mock.search(
+                intent=query.get("intent", [""])[0],
+                app_names=query.get("app_names", []),
+                format=format,
+                limit=int(query.get("limit", ["100"])[0]),
+                offset=int(query.get("offset", ["0"])[0]),
+            )
+            return self.send_json(HTTPStatus.OK, results)
+
+        match = FUNCTION_PATH.match(url.path)
+        if not match or match["action"] != "definition":
+            return self.send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {url.path}"})
+        if mock.simulate("definition"):
+            return self.send_injected_error()
+        function = mock.functions.get(unquote(match["name"]))
+        if function is None:
+            return self.send_json(HTTPStatus.NOT_FOUND, {"error": f"Function {match['name']} not found"})
+        self.send_json(HTTPStatus.OK, mock.definition(function, format))
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        match = FUNCTION_PATH.match(url.path)
+        if not match or match["action"] != "execute":
+            return self.send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {url.path}"})
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        mock = self.server.mock
+        if mock.simulate("execute"):
+            return self.send_injected_error()
+        function = mock.functions.get(unquote(match["name"]))
+        if function is None:
+            return self.send_json(HTTPStatus.NOT_FOUND, {"error": f"Function {match['name']} not found"})
+        self.send_json(*mock.execute(function, body.get("function_input") or {}))
+
+    def send_injected_error(self) -> None:
+        self.send_json(self.server.mock.error_status, {"error": "Injected error from the mock ACI server"})
+
+    def send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class MockACIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], mock: MockACI, verbose: bool = False):
+        super().__init__(address, MockACIHandler)
+        self.mock = mock
+        self.verbose = verbose
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+
+def start_server(mock: MockACI, host: str = "127.0.0.1", port: int = 0) -> MockACIServer:
+    """Serve the mock in a background thread (on a free port by default), stop it with shutdown()"""
+    server = MockACIServer((host, port), mock)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the ACI function endpoints from a fixture catalog")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="JSON file with the function definitions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra latency, up to this value")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of the requests failing, e.g. 0.05")
+    parser.add_argument("--error-status", type=int, default=503, help="status of the failed requests, e.g. 429")
+    parser.add_argument("--payload-bytes", type=int, default=0, help="minimum size of the execution results")
+    parser.add_argument("--seed", type=int, help="seed of the latency and error draws, for repeatable runs")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    mock = MockACI.from_file(
+        args.catalog,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        payload_bytes=args.payload_bytes,
+        seed=args.seed,
+    )
+    server = MockACIServer((args.host, args.port), mock, verbose=args.verbose)
+    print(f"Mock ACI server with {len(mock.functions)} functions, set ACI_SERVER_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requests: {mock.requests}")
+
+
+if __name__ == "__main__":
+    main()
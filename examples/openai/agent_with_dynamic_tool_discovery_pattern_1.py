@@ -1,24 +1,22 @@
 import json
 import os
+import sys
+from pathlib import Path
 
 from aci import ACI
 from aci.meta_functions import ACISearchFunctions
 from aci.types.functions import FunctionDefinitionFormat
 from dotenv import load_dotenv
-from openai import OpenAI
-from rich import print as rprint
-from rich.panel import Panel
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from token_accounting import RunAccount  # noqa: E402
 
 load_dotenv()
 LINKED_ACCOUNT_OWNER_ID = os.getenv("LINKED_ACCOUNT_OWNER_ID", "")
 if not LINKED_ACCOUNT_OWNER_ID:
     raise ValueError("LINKED_ACCOUNT_OWNER_ID is not set")
 
-# gets OPENAI_API_KEY from your environment variables
-openai = OpenAI()
-# gets AIPOLABS_ACI_API_KEY from your environment variables
-aci = ACI()
-
 prompt = (
     "You are a helpful assistant with access to a unlimited number of tools via a meta function: "
     "ACI_SEARCH_FUNCTIONS"
@@ -36,28 +34,54 @@ tools_retrieved: list[dict] = []
 
 
 def main() -> None:
+    from openai import OpenAI
+    from rich import print as rprint
+    from rich.panel import Panel
+
+    # gets OPENAI_API_KEY from your environment variables
+    openai = OpenAI()
+    # gets AIPOLABS_ACI_API_KEY from your environment variables
+    aci = ACI()
+
     # Start the LLM processing loop
     chat_history: list[dict] = []
+    # input tokens per part of the request, output tokens per tool call, see ../common/token_accounting.py
+    account = RunAccount("agent_with_dynamic_tool_discovery_pattern_1", "discovery")
 
     while True:
         rprint(Panel("Waiting for LLM Output", style="bold blue"))
+        messages = [
+            {
+                "role": "system",
+                "content": prompt,
+            },
+            {
+                "role": "user",
+                "content": "Can you use brave web search to find top 5 results about aipolabs ACI?",
+            },
+        ] + chat_history
+        tools = tools_meta + tools_retrieved
         response = openai.chat.completions.create(
             model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": prompt,
-                },
-                {
-                    "role": "user",
-                    "content": "Can you use brave web search to find top 5 results about aipolabs ACI?",
-                },
-            ]
-            + chat_history,
-            tools=tools_meta + tools_retrieved,
+            messages=messages,
+            tools=tools,
             # tool_choice="required",  # force the model to generate a tool call
             parallel_tool_calls=False,
         )
+        turn = account.record_turn(
+            messages,
+            tools,
+            response.usage,
+            response.choices[0].message.content,
+            [
+                (tool_call.function.name, tool_call.function.arguments)
+                for tool_call in response.choices[0].message.tool_calls or []
+            ],
+        )
+        rprint(
+            f"turn {turn.turn}: {turn.input_tokens} input tokens, {turn.output_tokens} output tokens "
+            f"({turn.tool_call_tokens} on tool calls)"
+        )
 
         # Process LLM response and potential function call (there can only be at most one function call)
         content = response.choices[0].message.content
@@ -105,6 +129,10 @@ def main() -> None:
             rprint(Panel("Task Completed", style="bold green"))
             break
 
+    rprint(Panel("Token Usage", style="bold blue"))
+    rprint(account.summary())
+    rprint(f"output tokens per tool: {account.tool_calls}")
+
 
 if __name__ == "__main__":
     main()
@@ -1,24 +1,24 @@
 import json
 import os
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
 
 from aci import ACI
 from aci.meta_functions import ACISearchFunctions, ACIExecuteFunction
 from aci.types.functions import FunctionDefinitionFormat
 from dotenv import load_dotenv
-from openai import OpenAI
-from rich import print as rprint
-from rich.panel import Panel
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from schema_validation import validate_arguments  # noqa: E402
+from token_accounting import RunAccount  # noqa: E402
 
 load_dotenv()
 LINKED_ACCOUNT_OWNER_ID = os.getenv("LINKED_ACCOUNT_OWNER_ID", "")
 if not LINKED_ACCOUNT_OWNER_ID:
     raise ValueError("LINKED_ACCOUNT_OWNER_ID is not set")
 
-# gets OPENAI_API_KEY from your environment variables
-openai = OpenAI()
-# gets ACI_API_KEY from your environment variables
-aci = ACI()
-
 prompt = (
     "You are a helpful assistant with access to a unlimited number of tools via some meta functions: "
     "ACI_SEARCH_FUNCTIONS, and ACI_EXECUTE_FUNCTION."
@@ -34,30 +34,109 @@ tools_meta = [
     ACIExecuteFunction.to_json_schema(FunctionDefinitionFormat.OPENAI),
 ]
 
+class DefinitionPrefetcher:
+    """
+    Fetches the full definitions of the functions found by ACI_SEARCH_FUNCTIONS in the background,
+    while the model is still choosing which one to execute, so the arguments of ACI_EXECUTE_FUNCTION
+    can be checked locally without waiting for a round trip
+    """
+
+    def __init__(self, aci: ACI):
+        self.aci = aci
+        self.pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="definition-prefetch")
+        self.definitions: dict[str, Future] = {}
+
+    def prefetch(self, search_results: list[dict]) -> None:
+        for result in search_results:
+            name = result.get("function", result).get("name")
+            if name and name not in self.definitions:
+                self.definitions[name] = self.pool.submit(
+                    self.aci.functions.get_definition, name, format=FunctionDefinitionFormat.OPENAI
+                )
+
+    def get(self, function_name: str) -> dict | None:
+        """The definition of the function (fetched now if it was not prefetched), or None if it cannot be fetched"""
+        if function_name not in self.definitions:
+            self.prefetch([{"name": function_name}])
+        try:
+            return self.definitions[function_name].result()
+        except Exception:
+            # fetched again on the next call, ACI reports the error of this one
+            del self.definitions[function_name]
+            return None
+
+    def check_execute_arguments(self, arguments: dict) -> str | None:
+        """Why the ACI_EXECUTE_FUNCTION call would fail validation on ACI, or None"""
+        try:
+            function_name = arguments.get("function_name", "")
+            definition = self.get(function_name)
+            if definition is None:
+                return None
+            parameters = definition["function"].get("parameters", {})
+            error = validate_arguments(parameters, arguments.get("function_arguments", {}))
+        except Exception:
+            # arguments or a definition the local check does not understand, ACI validates the call instead
+            return None
+        if error:
+            return (
+                f"Invalid arguments for {function_name}, the call was not executed: {error}. "
+                f"Fix the arguments to match the parameters of the function: {json.dumps(parameters)}"
+            )
+        return None
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
 
 def main() -> None:
+    from openai import OpenAI
+    from rich import print as rprint
+    from rich.panel import Panel
+
+    # gets OPENAI_API_KEY from your environment variables
+    openai = OpenAI()
+    # gets ACI_API_KEY from your environment variables
+    aci = ACI()
+    prefetcher = DefinitionPrefetcher(aci)
+
     # Start the LLM processing loop
     chat_history: list[dict] = []
+    # input tokens per part of the request, output tokens per tool call, see ../common/token_accounting.py
+    account = RunAccount("agent_with_dynamic_tool_discovery_pattern_2", "discovery_execute")
 
     while True:
         rprint(Panel("Waiting for LLM Output", style="bold blue"))
+        messages = [
+            {
+                "role": "system",
+                "content": prompt,
+            },
+            {
+                "role": "user",
+                "content": "Can you use brave search to find top 5 results about aipolabs ACI? Then star the repo https://github.com/aipotheosis-labs/aci",
+            },
+        ] + chat_history
         response = openai.chat.completions.create(
             model="gpt-4.1",
-            messages=[
-                {
-                    "role": "system",
-                    "content": prompt,
-                },
-                {
-                    "role": "user",
-                    "content": "Can you use brave search to find top 5 results about aipolabs ACI? Then star the repo https://github.com/aipotheosis-labs/aci",
-                },
-            ]
-            + chat_history,
+            messages=messages,
             tools=tools_meta,
             # tool_choice="required",  # force the model to generate a tool call
             parallel_tool_calls=False,
         )
+        turn = account.record_turn(
+            messages,
+            tools_meta,
+            response.usage,
+            response.choices[0].message.content,
+            [
+                (tool_call.function.name, tool_call.function.arguments)
+                for tool_call in response.choices[0].message.tool_calls or []
+            ],
+        )
+        rprint(
+            f"turn {turn.turn}: {turn.input_tokens} input tokens, {turn.output_tokens} output tokens "
+            f"({turn.tool_call_tokens} on tool calls)"
+        )
 
         # Process LLM response and potential function call (there can only be at most one function call)
         content = response.choices[0].message.content
@@ -79,13 +158,26 @@ def main() -> None:
             rprint(f"arguments: {tool_call.function.arguments}")
 
             chat_history.append({"role": "assistant", "tool_calls": [tool_call]})
-            result = aci.handle_function_call(
-                tool_call.function.name,
-                json.loads(tool_call.function.arguments),
-                linked_account_owner_id=LINKED_ACCOUNT_OWNER_ID,
-                allowed_apps_only=True,
-                format=FunctionDefinitionFormat.OPENAI,
+            arguments = json.loads(tool_call.function.arguments)
+            # arguments not matching the function's schema are rejected here, not after a round trip to ACI
+            error = (
+                prefetcher.check_execute_arguments(arguments)
+                if tool_call.function.name == ACIExecuteFunction.get_name()
+                else None
             )
+            if error:
+                rprint(Panel("Function Call Rejected Locally", style="bold red"))
+                result = {"success": False, "error": error}
+            else:
+                result = aci.handle_function_call(
+                    tool_call.function.name,
+                    arguments,
+                    linked_account_owner_id=LINKED_ACCOUNT_OWNER_ID,
+                    allowed_apps_only=True,
+                    format=FunctionDefinitionFormat.OPENAI,
+                )
+                if tool_call.function.name == ACISearchFunctions.get_name() and isinstance(result, list):
+                    prefetcher.prefetch(result)
 
             rprint(Panel("Function Call Result", style="bold magenta"))
             rprint(result)
@@ -102,6 +194,12 @@ def main() -> None:
             rprint(Panel("Task Completed", style="bold green"))
             break
 
+    rprint(Panel("Token Usage", style="bold blue"))
+    rprint(account.summary())
+    rprint(f"output tokens per tool: {account.tool_calls}")
+
+    prefetcher.close()
+
 
 if __name__ == "__main__":
     main()
@@ -1,25 +1,32 @@
 import json
 import os
+import sys
+from pathlib import Path
 
 from aci import ACI
 from aci.types.functions import FunctionDefinitionFormat
 from dotenv import load_dotenv
-from openai import OpenAI
-from rich import print as rprint
-from rich.panel import Panel
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common"))
+from token_accounting import RunAccount  # noqa: E402
 
 load_dotenv()
 LINKED_ACCOUNT_OWNER_ID = os.getenv("LINKED_ACCOUNT_OWNER_ID", "")
 if not LINKED_ACCOUNT_OWNER_ID:
     raise ValueError("LINKED_ACCOUNT_OWNER_ID is not set")
 
-# gets OPENAI_API_KEY from your environment variables
-openai = OpenAI()
-# gets ACI_API_KEY from your environment variables
-aci = ACI()
-
 
 def main() -> None:
+    from openai import OpenAI
+    from rich import print as rprint
+    from rich.panel import Panel
+
+    # gets OPENAI_API_KEY from your environment variables
+    openai = OpenAI()
+    # gets ACI_API_KEY from your environment variables
+    aci = ACI()
+
     # For a list of all supported apps and functions, please go to the platform.aci.dev
     brave_search_function_definition = aci.functions.get_definition(
         "BRAVE_SEARCH__WEB_SEARCH"
@@ -43,6 +50,9 @@ def main() -> None:
                 "content": "Star the repo https://github.com/aipotheosis-labs/aci, then search information about ACI.dev.",
             },
     ]
+    tools = [brave_search_function_definition, github_star_repository_function_definition]
+    # input tokens per part of the request, output tokens per tool call, see ../common/token_accounting.py
+    account = RunAccount("agent_with_pre_planned_tools", "pre_planned")
     # Loop until no tool_call (with max iterations for safety)
     max_iterations = 10
     iteration_count = 0
@@ -53,9 +63,23 @@ def main() -> None:
             response = openai.chat.completions.create(
                 model="gpt-4o",
                 messages=messages,
-                tools=[brave_search_function_definition, github_star_repository_function_definition],
+                tools=tools,
                 tool_choice="auto",  # let the model decide when to use tools
             )
+            turn = account.record_turn(
+                messages,
+                tools,
+                response.usage,
+                response.choices[0].message.content,
+                [
+                    (tool_call.function.name, tool_call.function.arguments)
+                    for tool_call in response.choices[0].message.tool_calls or []
+                ],
+            )
+            rprint(
+                f"turn {turn.turn}: {turn.input_tokens} input tokens, {turn.output_tokens} output tokens "
+                f"({turn.tool_call_tokens} on tool calls)"
+            )
             # Convert ChatCompletionMessage to dictionary format
             assistant_message = {
                 "role": "assistant",
@@ -114,5 +138,10 @@ def main() -> None:
             rprint(messages[-1]["content"])
             break
 
+    rprint(Panel("Token Usage", style="bold blue"))
+    rprint(account.summary())
+    rprint(f"output tokens per tool: {account.tool_calls}")
+
+
 if __name__ == "__main__":
     main()
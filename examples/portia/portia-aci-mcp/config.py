@@ -1,35 +1,52 @@
 import os
+import time
 from dotenv import load_dotenv
 from portia import Config, LLMProvider, McpToolRegistry, DefaultToolRegistry
+from mcp_daemon import DAEMON_URL, MCP_SERVER_ARGS, is_running
 
 load_dotenv() 
 
-#configure aci api key and check for missing exceptions
-aci_api_key_value = os.getenv("ACI_API_KEY")
-process_env = os.environ.copy()
-if aci_api_key_value:
-    process_env["ACI_API_KEY"] = aci_api_key_value
-else:
-    print("Warning: ACI_API_KEY was not found in the environment. The aci-mcp tool might fail.")
 
-# config for gemini api
-config = Config.from_default(
-    llm_provider=LLMProvider.GOOGLE_GENERATIVE_AI,
-    google_api_key=os.getenv("GOOGLE_API_KEY"),
-    default_model="google/gemini-2.5-pro-preview-05-06",
-)
+def create_config() -> Config:
+    """Config for the gemini api"""
+    return Config.from_default(
+        llm_provider=LLMProvider.GOOGLE_GENERATIVE_AI,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        default_model="google/gemini-2.5-pro-preview-05-06",
+    )
 
-# config for mcp tools via portia's mcp tool registry, refer to env.example for setup
-mcp_registry = McpToolRegistry.from_stdio_connection(
-    server_name="aci-apps-stdio",
-    command="uvx",
-    args=[
-        "aci-mcp", "apps-server",
-        "--apps=SLACK,GITHUB,SEARCH,WEATHER,GMAIL",
-        "--linked-account-owner-id= <your-linked-account-owner-id> ", # you can setup your linked acc owner ID at - https://platform.aci.dev/apps
-    ],
-    env=process_env
-)
 
-#  combine ACI's MCP tools with Portia's built-in tools
-tool_registry = mcp_registry + DefaultToolRegistry(config)
+def create_tool_registry(config: Config):
+    """
+    ACI's MCP tools via portia's mcp tool registry combined with Portia's built-in tools, refer to
+    env.example for setup. Connects to (or spawns) the MCP server, so it is only called by main().
+    """
+    #configure aci api key and check for missing exceptions
+    aci_api_key_value = os.getenv("ACI_API_KEY")
+    process_env = os.environ.copy()
+    if aci_api_key_value:
+        process_env["ACI_API_KEY"] = aci_api_key_value
+    else:
+        print("Warning: ACI_API_KEY was not found in the environment. The aci-mcp tool might fail.")
+
+    # if the long-lived daemon is running (python mcp_daemon.py start), connect to it over the local socket
+    # instead of spawning `uvx aci-mcp apps-server` for this run. The server args live in mcp_daemon.py.
+    registry_started_at = time.perf_counter()
+    if is_running():
+        mcp_connection = "daemon"
+        mcp_registry = McpToolRegistry.from_sse_connection(
+            server_name="aci-apps-sse",
+            url=DAEMON_URL,
+        )
+    else:
+        mcp_connection = "stdio"
+        mcp_registry = McpToolRegistry.from_stdio_connection(
+            server_name="aci-apps-stdio",
+            command="uvx",
+            args=MCP_SERVER_ARGS,
+            env=process_env
+        )
+    print(f"MCP tool registry ready via {mcp_connection} in {(time.perf_counter() - registry_started_at) * 1000:.0f} ms")
+
+    #  combine ACI's MCP tools with Portia's built-in tools
+    return mcp_registry + DefaultToolRegistry(config)
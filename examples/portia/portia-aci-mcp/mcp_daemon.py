@@ -0,0 +1,140 @@
+"""
+Long-lived local ACI MCP server for the Portia examples.
+
+By default config.py starts `uvx aci-mcp apps-server` over stdio, so every script run (and
+every MCP connection portia opens) pays for uvx resolution and a fresh process spawn.
+This script starts the apps server once in the background over SSE on a local port;
+config.py detects it and connects to it instead, so subsequent runs start in milliseconds.
+
+Usage:
+    python mcp_daemon.py start    # start the server in the background (no-op if already running)
+    python mcp_daemon.py status   # check whether the server is running and reachable
+    python mcp_daemon.py stop     # stop the background server
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# the apps exposed by the MCP server, shared by the stdio and the daemon connections
+MCP_SERVER_ARGS = [
+    "aci-mcp", "apps-server",
+    "--apps=SLACK,GITHUB,SEARCH,WEATHER,GMAIL",
+    "--linked-account-owner-id= <your-linked-account-owner-id> ", # you can setup your linked acc owner ID at - https://platform.aci.dev/apps
+]
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = int(os.getenv("ACI_MCP_DAEMON_PORT", "8765"))
+DAEMON_URL = f"http://{DAEMON_HOST}:{DAEMON_PORT}/sse"
+PID_FILE = Path(__file__).parent / ".aci_mcp_daemon.pid"
+LOG_FILE = Path(__file__).parent / ".aci_mcp_daemon.log"
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def daemon_pid() -> int | None:
+    """The pid in the pid file if that process is still alive, the stale pid file is removed otherwise."""
+    try:
+        pid = int(PID_FILE.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        PID_FILE.unlink(missing_ok=True)
+        return None
+    except PermissionError:
+        # alive, but owned by another user
+        pass
+    # the pid may have been reused by an unrelated process since the daemon exited
+    cmdline = Path(f"/proc/{pid}/cmdline")
+    if cmdline.exists() and b"aci-mcp" not in cmdline.read_bytes():
+        PID_FILE.unlink(missing_ok=True)
+        return None
+    return pid
+
+
+def port_in_use(timeout: float = 0.05) -> bool:
+    """Return True if something is accepting connections on the daemon port."""
+    try:
+        with socket.create_connection((DAEMON_HOST, DAEMON_PORT), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def is_running(timeout: float = 0.05) -> bool:
+    """Return True if the daemon started by this script is alive and accepting connections on its port."""
+    return daemon_pid() is not None and port_in_use(timeout)
+
+
+def start() -> None:
+    if is_running():
+        print(f"ACI MCP daemon already running at {DAEMON_URL}")
+        return
+    if port_in_use():
+        raise RuntimeError(
+            f"port {DAEMON_PORT} is used by another process, set ACI_MCP_DAEMON_PORT to start the daemon on another port"
+        )
+
+    env = os.environ.copy()
+    if not env.get("ACI_API_KEY"):
+        print("Warning: ACI_API_KEY was not found in the environment. The aci-mcp tool might fail.")
+
+    started_at = time.perf_counter()
+    with open(LOG_FILE, "ab") as log:
+        process = subprocess.Popen(
+            ["uvx", *MCP_SERVER_ARGS, "--transport", "sse", "--port", str(DAEMON_PORT)],
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,  # keep running after this script exits
+        )
+    PID_FILE.write_text(str(process.pid))
+
+    while not port_in_use():
+        if process.poll() is not None:
+            raise RuntimeError(f"ACI MCP daemon exited with code {process.returncode}, see {LOG_FILE}")
+        if time.perf_counter() - started_at > STARTUP_TIMEOUT_SECONDS:
+            raise TimeoutError(f"ACI MCP daemon did not start within {STARTUP_TIMEOUT_SECONDS}s, see {LOG_FILE}")
+        time.sleep(0.2)
+
+    print(f"ACI MCP daemon (pid {process.pid}) listening at {DAEMON_URL}, "
+          f"started in {time.perf_counter() - started_at:.2f}s")
+
+
+def stop() -> None:
+    pid = daemon_pid()
+    if pid is None:
+        print("ACI MCP daemon is not running")
+        return
+    try:
+        os.killpg(pid, signal.SIGTERM)
+        print(f"Stopped ACI MCP daemon (pid {pid})")
+    except ProcessLookupError:
+        print(f"ACI MCP daemon (pid {pid}) was not running")
+    PID_FILE.unlink(missing_ok=True)
+
+
+def status() -> None:
+    if is_running():
+        print(f"ACI MCP daemon (pid {daemon_pid()}) is running at {DAEMON_URL}")
+    elif port_in_use():
+        print(f"ACI MCP daemon is not running, but another process is listening on port {DAEMON_PORT}")
+    else:
+        print("ACI MCP daemon is not running")
+
+
+if __name__ == "__main__":
+    commands = {"start": start, "stop": stop, "status": status}
+    command = sys.argv[1] if len(sys.argv) > 1 else "start"
+    if command not in commands:
+        sys.exit(f"Usage: python {Path(__file__).name} [{'|'.join(commands)}]")
+    commands[command]()
@@ -1,11 +1,18 @@
 import os
+import sys
+from pathlib import Path
+
 from dotenv import load_dotenv
 from rich import print as rprint 
 from portia import (
     Portia,
     PlanRunState
 )
-from config import config, tool_registry
+from config import create_config, create_tool_registry
+
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[2] / "common"))
+from plan_cache import PlanCache  # noqa: E402
 
 """
 Demonstration script for using Portia with ACI Multi-Capability Planner.
@@ -17,33 +24,44 @@ This script shows how to
 
 load_dotenv()
 
-# config tells the agent to chose and tools consists the mcp tools
-portia_instance = Portia(config=config, tools=tool_registry)
 
-prompt = "search the web for best indian restaurant in NYC"
+def main() -> None:
+    # config tells the agent to chose and tools consists the mcp tools
+    config = create_config()
+    # connects to the MCP daemon, or spawns the MCP server, see config.py
+    tool_registry = create_tool_registry(config)
+    portia_instance = Portia(config=config, tools=tool_registry)
+    # reuses previously generated plans for the same prompt and tools, skipping the planning LLM call
+    plan_cache = PlanCache(portia_instance, tool_registry)
+
+    prompt = "search the web for best indian restaurant in NYC"
+
+
+    try:
+        plan = plan_cache.get_or_plan(prompt)
+        rprint(plan.model_dump_json(indent=2)) # prints out the json object of the plan to run 
 
+        plan_run = portia_instance.run_plan(plan)
 
-try:
-    plan = portia_instance.plan(prompt)
-    rprint(plan.model_dump_json(indent=2)) # prints out the json object of the plan to run 
+        # basic check for clarification
+        if plan_run.state == PlanRunState.NEED_CLARIFICATION:
+            rprint("\n[yellow]--- Plan Needs Clarification ---[/yellow]")
+            rprint("[yellow]The plan requires clarification. Please run a script with interactive clarification handling (like simple_portia_cli.py or the enhanced demo_stdio.py) to resolve.[/yellow]")
 
-    plan_run = portia_instance.run_plan(plan)
+        rprint(f"Run status (State): [bold]{plan_run.state}[/bold]")
 
-    # basic check for clarification
-    if plan_run.state == PlanRunState.NEED_CLARIFICATION:
-        rprint("\n[yellow]--- Plan Needs Clarification ---[/yellow]")
-        rprint("[yellow]The plan requires clarification. Please run a script with interactive clarification handling (like simple_portia_cli.py or the enhanced demo_stdio.py) to resolve.[/yellow]")
+        if plan_run.outputs and plan_run.outputs.final_output:
+            rprint(f"Final Output Value: [green]{plan_run.outputs.final_output.value}[/green]")
+        elif plan_run.state == PlanRunState.COMPLETE:
+            rprint("[green]Plan completed successfully.[/green]")
+        else:
+            rprint(f"[red]Plan run ended with state: {plan_run.state}. No specific final_output or not completed.[/red]")
 
-    rprint(f"Run status (State): [bold]{plan_run.state}[/bold]")
+    except Exception as e:
+        rprint(f"[red]An error occurred: {e}[/red]")
+        import traceback
+        traceback.print_exc()
 
-    if plan_run.outputs and plan_run.outputs.final_output:
-        rprint(f"Final Output Value: [green]{plan_run.outputs.final_output.value}[/green]")
-    elif plan_run.state == PlanRunState.COMPLETE:
-        rprint("[green]Plan completed successfully.[/green]")
-    else:
-        rprint(f"[red]Plan run ended with state: {plan_run.state}. No specific final_output or not completed.[/red]")
 
-except Exception as e:
-    rprint(f"[red]An error occurred: {e}[/red]")
-    import traceback
-    traceback.print_exc() 
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import os
+import sys
+from pathlib import Path
 
 from dotenv import load_dotenv
 from portia import (
@@ -10,6 +12,10 @@ from portia import (
 )
 from custom_tools.registry import custom_tool_registry
 
+# modules shared by several examples, see examples/common
+sys.path.append(str(Path(__file__).resolve().parents[2] / "common"))
+from plan_cache import PlanCache  # noqa: E402
+
 
 load_dotenv(override=True)
 
@@ -25,8 +31,15 @@ if not EMAIL_RECIPIENT:
 # define the task
 task_description = f'This is the GitHub project URL: {GITHUB_PROJECT_URL}, please obtain detailed information for this project on GitHub, then search the web for more information about this project, ACI.dev, last, generate a comprehensive report based on all the collected data, and send the summary to {EMAIL_RECIPIENT} via Gmail, with the sender being "me".'
 
+# plan it, reusing a cached plan when the same task was planned before with the same tools
+plan_cache = PlanCache(portia, custom_tool_registry)
+plan = plan_cache.get_or_plan(
+    task_description,
+    params={"GITHUB_PROJECT_URL": GITHUB_PROJECT_URL, "EMAIL_RECIPIENT": EMAIL_RECIPIENT},
+)
+
 # run it
-plan_run = portia.run(task_description)
+plan_run = portia.run_plan(plan)
 
 # Check if the plan run was paused due to raised clarifications
 while plan_run.state == PlanRunState.NEED_CLARIFICATION:
@@ -0,0 +1,116 @@
+"""
+Import-time budget of the example entry points.
+
+Imports every entry point in a fresh interpreter with `python -X importtime` (from its own directory,
+as when it is run), reports the time spent importing it and its heaviest imports, and exits with an
+error when an entry point exceeds its budget, so a heavy import added at module level is caught
+before it slows down the CLI and worker cold starts. The budgets are enforced by the test suite
+(tests/test_import_time_budget.py, part of `uv run pytest`), this script shows where the time goes.
+
+Entry points must not build clients or do any work at import time (the LINKED_ACCOUNT_OWNER_ID check
+is satisfied with a placeholder), see the examples' main() functions.
+
+Usage:
+    python scripts/import_time_budget.py                 # all entry points
+    python scripts/import_time_budget.py --scale 2       # on a machine twice as slow
+    python scripts/import_time_budget.py examples/batch-runner/batch_runner.py --top 10
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# entry point -> import-time budget in milliseconds, about twice the median measured with the locked
+# dependencies installed with compiled bytecode (`uv sync --locked --compile-bytecode`), without it
+# the first imports are several times slower
+BUDGETS_MS = {
+    "examples/anthropic/anthropic_with_pre_planned_tool.py": 800,
+    "examples/batch-runner/batch_runner.py": 1200,
+    "examples/camel-ai/aci_toolkit_camel.py": 250,
+    "examples/camel-ai-mcp/aci_mcp_camel.py": 250,
+    "examples/camel-ai-mcp/mcp_worker.py": 300,
+    "examples/cognee/bulk_ingest.py": 250,
+    "examples/cognee/agent_with_dynamic_tool_discovery_pattern1.py": 900,
+    "examples/llamaindex/llamaindex_with_pre_planned_tool.py": 800,
+    "examples/mcp/mcp_gateway.py": 1400,
+    "examples/mistral/agent_with_dynamic_tool_discovery_pattern_1.py": 1000,
+    "examples/openai/agent_with_dynamic_tool_discovery_pattern_1.py": 800,
+    "examples/openai/agent_with_dynamic_tool_discovery_pattern_2.py": 800,
+    "examples/openai/agent_with_pre_planned_tools.py": 800,
+}
+
+# "import time: <self us> | <cumulative us> | <indentation><module>"
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(entry_point: Path) -> tuple[float, list[tuple[str, float]]]:
+    """Milliseconds spent importing the entry point, and its direct imports with their milliseconds"""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("LINKED_ACCOUNT_OWNER_ID", "import-time-budget")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry_point.stem}"],
+        cwd=entry_point.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    # the dependencies are listed (indented one level) before the module importing them
+    children: list[tuple[str, float]] = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        level = (len(match.group(3)) - 1) // 2
+        module, milliseconds = match.group(4), int(match.group(2)) / 1000
+        if level == 1:
+            children.append((module, milliseconds))
+        elif level == 0:
+            if module == entry_point.stem:
+                return milliseconds, sorted(children, key=lambda child: child[1], reverse=True)
+            # imported by the interpreter startup, not by the entry point
+            children = []
+    raise RuntimeError("no import time reported")
+
+
+def median_measure(entry_point: Path, repeat: int = 3) -> tuple[float, list[tuple[str, float]]]:
+    """measure() repeated, the run with the median import time"""
+    runs = [measure(entry_point) for _ in range(repeat)]
+    return sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the import time of the example entry points")
+    parser.add_argument("entry_points", nargs="*", help="entry points to check (defaults to all with a budget)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the budgets, e.g. on a slow machine")
+    parser.add_argument("--repeat", type=int, default=3, help="imports per entry point, the median is kept")
+    parser.add_argument("--top", type=int, default=3, help="heaviest imports shown per entry point")
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.entry_points or BUDGETS_MS:
+        name = str(Path(name).resolve().relative_to(REPO_ROOT)) if Path(name).exists() else name
+        budget = BUDGETS_MS.get(name, 1000) * args.scale
+        try:
+            total, imports = median_measure(REPO_ROOT / name, args.repeat)
+        except RuntimeError as e:
+            print(f"ERROR {name}: {e}")
+            failed = True
+            continue
+        status = "ok  " if total <= budget else "OVER"
+        failed |= total > budget
+        print(f"{status} {name}: {total:.0f} ms (budget {budget:.0f} ms)")
+        for module, ms in imports[: args.top]:
+            print(f"       {module}: {ms:.0f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
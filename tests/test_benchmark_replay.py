@@ -0,0 +1,75 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "examples" / "batch-runner"))
+
+from agent_loops import FunctionExecutor, Model, Task, run_task  # noqa: E402
+from benchmark import DEFAULT_CATALOG, RecordingClient, ReplayClient, StubACI  # noqa: E402
+
+TASK = Task(id="web-search", prompt="Search the web for ACI.dev", pattern="pre_planned", functions=["BRAVE_SEARCH__WEB_SEARCH"])
+
+
+def completion(index: int, message: dict, prompt_tokens: int) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": f"chatcmpl-{index}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", **message}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 20, "total_tokens": prompt_tokens + 20},
+        }
+    )
+
+
+class LiveClient:
+    """Stands in for OpenAI: a search, then the answer"""
+
+    def __init__(self):
+        self.responses = [
+            completion(
+                0,
+                {
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": "call_0",
+                            "type": "function",
+                            "function": {"name": "BRAVE_SEARCH__WEB_SEARCH", "arguments": '{"query": {"q": "ACI.dev"}}'},
+                        }
+                    ],
+                },
+                300,
+            ),
+            completion(1, {"content": "ACI.dev is a tool calling platform."}, 500),
+        ]
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        return self.responses.pop(0)
+
+
+def run(client, task: Task = TASK):
+    return asyncio.run(run_task(Model(client), FunctionExecutor(StubACI(DEFAULT_CATALOG, latency_ms=0)), task))
+
+
+def test_recorded_runs_are_replayed(tmp_path):
+    recording = tmp_path / "responses.jsonl"
+    recorded = run(RecordingClient(LiveClient(), recording))
+    replayed = run(ReplayClient(recording))
+
+    assert recorded.error is None and recorded.turns == 2
+    for name in ("answer", "turns", "tool_calls", "input_tokens", "output_tokens"):
+        assert getattr(replayed, name) == getattr(recorded, name)
+
+
+def test_turns_that_were_not_recorded_fail_the_run(tmp_path):
+    recording = tmp_path / "responses.jsonl"
+    run(RecordingClient(LiveClient(), recording))
+
+    replayed = run(ReplayClient(recording), Task(id="other", prompt="Star the ACI repo", pattern="pre_planned"))
+    assert replayed.error.startswith("LookupError: no recorded response for turn 1 of the pre_planned run")
@@ -0,0 +1,29 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "examples" / "cognee"))
+
+from bulk_ingest import RejectedRecords, read_jsonl  # noqa: E402
+
+
+def test_bad_records_are_skipped_and_written_to_the_rejected_file(tmp_path):
+    source = tmp_path / "profiles.jsonl"
+    source.write_text(
+        '{"id": "a", "text": "first"}\n'
+        "not json\n"
+        "[1, 2]\n"
+        '{"id": "b"}\n'
+        "\n"
+        '{"text": "second"}\n',
+        encoding="utf-8",
+    )
+    rejected = RejectedRecords(tmp_path / "rejected.jsonl")
+
+    documents = list(read_jsonl(source, "id", "text", rejected))
+
+    assert documents == [("a", "first"), ("profiles.jsonl:6", "second")]
+    assert rejected.count == 3
+    lines = [json.loads(line) for line in rejected.path.read_text(encoding="utf-8").splitlines()]
+    assert [line["location"] for line in lines] == [f"{source}:2", f"{source}:3", f"{source}:4"]
+    assert lines[2]["line"] == '{"id": "b"}'
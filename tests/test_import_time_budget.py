@@ -0,0 +1,26 @@
+"""
+The import-time budgets of scripts/import_time_budget.py. Set IMPORT_TIME_BUDGET_SCALE to multiply
+the budgets on a slower machine, e.g. IMPORT_TIME_BUDGET_SCALE=2 uv run pytest.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from import_time_budget import BUDGETS_MS, median_measure  # noqa: E402
+
+SCALE = float(os.getenv("IMPORT_TIME_BUDGET_SCALE", "1"))
+
+
+@pytest.mark.parametrize("entry_point", sorted(BUDGETS_MS))
+def test_entry_point_imports_within_budget(entry_point):
+    total, imports = median_measure(REPO_ROOT / entry_point)
+
+    budget = BUDGETS_MS[entry_point] * SCALE
+    heaviest = ", ".join(f"{module} {ms:.0f} ms" for module, ms in imports[:3])
+    assert total <= budget, f"{entry_point} imports in {total:.0f} ms (budget {budget:.0f} ms), heaviest: {heaviest}"
@@ -0,0 +1,53 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from mcp import StdioServerParameters
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "examples" / "mcp"))
+
+from mcp_gateway import MCPGateway  # noqa: E402
+
+
+def gateway(**options) -> MCPGateway:
+    # the owners are tracked without any session, start() is never called
+    return MCPGateway(StdioServerParameters(command="aci-mcp"), **options)
+
+
+def test_least_recently_used_owners_beyond_the_cap_are_dropped():
+    mcp_gateway = gateway(max_owners=2)
+
+    async def admit_and_release():
+        for owner_id in ("a", "b", "a", "c"):
+            mcp_gateway._admit(owner_id).pending -= 1
+
+    asyncio.run(admit_and_release())
+    assert list(mcp_gateway.owners) == ["a", "c"]
+    assert mcp_gateway.evicted_owners == 1
+
+
+def test_owners_with_pending_calls_are_kept():
+    mcp_gateway = gateway(max_owners=1)
+
+    async def run():
+        busy = mcp_gateway._admit("busy")
+        mcp_gateway._admit("other").pending -= 1
+        assert list(mcp_gateway.owners) == ["busy", "other"]
+
+        busy.pending -= 1
+        mcp_gateway._admit("next").pending -= 1
+        assert list(mcp_gateway.owners) == ["next"]
+
+    asyncio.run(run())
+
+
+def test_idle_owners_are_dropped():
+    mcp_gateway = gateway(owner_idle_timeout=0.01, max_calls_per_second_per_owner=1000.0)
+
+    async def run():
+        mcp_gateway._admit("idle").pending -= 1
+        await asyncio.sleep(0.02)
+        mcp_gateway._admit("active").pending -= 1
+
+    asyncio.run(run())
+    assert list(mcp_gateway.owners) == ["active"]
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "examples" / "cognee"))
+
+from memory_retrieval import build_query  # noqa: E402
+
+TASK = "1. Get information about David Kim 2. Create a new google doc"
+
+
+def tool_call(name: str, arguments: str) -> dict:
+    return {"role": "assistant", "tool_calls": [SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments))]}
+
+
+def test_query_ignores_the_wording_and_the_arguments_of_the_turns():
+    history = [tool_call("ACI_SEARCH_FUNCTIONS", '{"intent": "create a google doc"}')]
+    retried = history + [
+        {"role": "assistant", "content": "Let me search again."},
+        tool_call("ACI_SEARCH_FUNCTIONS", '{"intent": "google docs", "limit": 3}'),
+    ]
+
+    assert build_query(TASK, []) == TASK
+    assert build_query(TASK, history) == build_query(TASK, retried)
+    assert "google docs" not in build_query(TASK, retried)
+
+
+def test_query_follows_the_progress_of_the_task():
+    history = [
+        tool_call("ACI_SEARCH_FUNCTIONS", '{"intent": "create a google doc"}'),
+        tool_call("GOOGLE_DOCS__CREATE_DOCUMENT", '{"title": "David Kim"}'),
+    ]
+
+    assert build_query(TASK, history[:1]) != build_query(TASK, history)
+    assert build_query(TASK, history).endswith("ACI_SEARCH_FUNCTIONS, GOOGLE_DOCS__CREATE_DOCUMENT")
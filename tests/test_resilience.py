@@ -0,0 +1,129 @@
+"""
+ResilientExecutor against the real ACI SDK, talking to the mock ACI server over HTTP, so the errors
+are the exceptions the SDK raises (ServerError, RateLimitError, ValidationError) and not look-alikes.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+sys.path[:0] = [str(EXAMPLES / "batch-runner"), str(EXAMPLES / "mock-aci")]
+
+from aci import ACI  # noqa: E402
+from aci._exceptions import RateLimitError, ServerError, ValidationError  # noqa: E402
+from agent_loops import FunctionExecutor  # noqa: E402
+from mock_aci_server import DEFAULT_CATALOG, MockACI, start_server  # noqa: E402
+from resilience import TRIAL, CircuitBreaker, CircuitOpenError, ResilientExecutor, is_transient, never_sent  # noqa: E402
+
+FUNCTION = "BRAVE_SEARCH__WEB_SEARCH"
+
+
+@pytest.fixture
+def mock_aci():
+    def serve(**options):
+        mock = MockACI.from_file(DEFAULT_CATALOG, seed=0, **options)
+        servers.append(start_server(mock))
+        return mock, ACI(api_key="test", base_url=servers[-1].base_url)
+
+    servers = []
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def resilient(aci: ACI, **options) -> ResilientExecutor:
+    return ResilientExecutor(FunctionExecutor(aci), idempotent_functions=set(), backoff_base=0.001, **options)
+
+
+def execute(executor: ResilientExecutor, arguments: dict | None = None):
+    return asyncio.run(executor.execute(FUNCTION, arguments or {"query": {"q": "aci"}}, "owner"))
+
+
+def sdk_error(aci: ACI, arguments: dict | None = None) -> Exception:
+    with pytest.raises(Exception) as raised:
+        FunctionExecutor(aci, sdk_retries=False)._handle_function_call(FUNCTION, arguments or {}, "owner")
+    return raised.value
+
+
+def test_sdk_errors_are_classified(mock_aci):
+    _, failing = mock_aci(error_rate=1.0, error_status=503)
+    _, limited = mock_aci(error_rate=1.0, error_status=429)
+    _, healthy = mock_aci()
+
+    server_error, rate_limit_error, validation_error = sdk_error(failing), sdk_error(limited), sdk_error(healthy)
+    assert isinstance(server_error, ServerError) and is_transient(server_error)
+    assert not never_sent(server_error)
+    assert isinstance(rate_limit_error, RateLimitError) and is_transient(rate_limit_error)
+    assert never_sent(rate_limit_error)
+    assert isinstance(validation_error, ValidationError) and not is_transient(validation_error)
+
+
+def test_server_errors_of_writes_are_not_retried(mock_aci):
+    mock, aci = mock_aci(error_rate=1.0, error_status=503)
+    executor = resilient(aci, max_retries=3)
+
+    with pytest.raises(ServerError):
+        execute(executor)
+    # one request: neither this executor nor the SDK retried the non-idempotent call
+    assert mock.requests["execute"] == 1
+    assert executor.outcomes["transient_error"] == 1
+
+
+def test_server_errors_of_idempotent_functions_are_retried_once_per_attempt(mock_aci):
+    mock, aci = mock_aci(error_rate=1.0, error_status=503)
+    executor = resilient(aci, max_retries=2)
+    executor.idempotent_functions = {FUNCTION}
+
+    with pytest.raises(ServerError):
+        execute(executor)
+    assert mock.requests["execute"] == 3
+    assert executor.outcomes["retried"] == 2
+
+
+def test_rate_limited_writes_are_retried(mock_aci):
+    mock, aci = mock_aci(error_rate=1.0, error_status=429)
+    executor = resilient(aci, max_retries=2)
+
+    with pytest.raises(RateLimitError):
+        execute(executor)
+    assert mock.requests["execute"] == 3
+
+
+def test_server_errors_open_the_circuit(mock_aci):
+    mock, aci = mock_aci(error_rate=1.0, error_status=503)
+    executor = resilient(aci, max_retries=0, failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(ServerError):
+            execute(executor)
+    with pytest.raises(CircuitOpenError):
+        execute(executor)
+    assert mock.requests["execute"] == 2
+
+
+def test_invalid_arguments_are_not_retried(mock_aci):
+    mock, aci = mock_aci()
+    executor = resilient(aci, max_retries=3)
+    executor.idempotent_functions = {FUNCTION}
+
+    with pytest.raises(ValidationError):
+        execute(executor, {"unknown": 1})
+    assert mock.requests["execute"] == 1
+    assert executor.breakers[FUNCTION].failures == 0
+
+
+def test_only_the_trial_call_ends_the_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    assert breaker.allow() is not None
+    breaker.record_failure()
+
+    assert breaker.allow() == TRIAL
+    # a call admitted while the breaker was closed fails during the trial: still one trial at a time
+    breaker.record_failure()
+    assert breaker.allow() is None
+    breaker.end_trial()
+    assert breaker.allow() == TRIAL
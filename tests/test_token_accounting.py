@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+from anthropic.types import Usage
+from openai.types import CompletionUsage
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "examples" / "common"))
+
+from token_accounting import PARTS, RunAccount, TokenLedger  # noqa: E402
+
+OPENAI_TOOL = {"type": "function", "function": {"name": "BRAVE_SEARCH__WEB_SEARCH", "parameters": {}}}
+ANTHROPIC_TOOL = {"name": "GITHUB__GET_USER", "input_schema": {}}
+
+
+def test_openai_turn_is_split_between_the_parts_and_the_tool_calls():
+    account = RunAccount("run", "pre_planned")
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "Search the web for ACI.dev"},
+        {"role": "tool", "tool_call_id": "call_0", "content": "result " * 100},
+    ]
+    usage = CompletionUsage(prompt_tokens=1000, completion_tokens=40, total_tokens=1040)
+
+    turn = account.record_turn(
+        messages, [OPENAI_TOOL], usage, "", [("BRAVE_SEARCH__WEB_SEARCH", '{"query": {"q": "ACI.dev"}}')]
+    )
+
+    assert sum(getattr(turn, part) for part in PARTS) == 1000
+    assert turn.tool_results > turn.history
+    # no text in the response, all the output went into the tool call
+    assert turn.tool_call_tokens == 40
+    assert account.tool_calls == {"BRAVE_SEARCH__WEB_SEARCH": {"calls": 1, "output_tokens": 40}}
+
+
+def test_anthropic_usage_and_content_blocks():
+    account = RunAccount("run", "pre_planned")
+    messages = [
+        {"role": "system", "content": [{"type": "text", "text": "You are a helpful assistant."}]},
+        {"role": "user", "content": [{"type": "text", "text": "Tell me about the owner of the repo."}]},
+        {"role": "assistant", "content": [{"type": "tool_use", "id": "1", "name": "GITHUB__GET_USER", "input": {}}]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": "1", "content": "user " * 200}]},
+    ]
+    usage = Usage(input_tokens=100, output_tokens=30, cache_read_input_tokens=800, cache_creation_input_tokens=100)
+
+    turn = account.record_turn(
+        messages, [ANTHROPIC_TOOL], usage, "The owner is " * 10, [("GITHUB__GET_USER", {"username": "aci"})]
+    )
+
+    assert (turn.input_tokens, turn.cached_tokens, turn.output_tokens) == (1000, 800, 30)
+    assert turn.tool_results > turn.history
+    assert 0 < turn.tool_call_tokens < 30
+    assert account.tool_schemas["GITHUB__GET_USER"]["requests"] == 1
+
+
+def test_ledger_ranks_the_tool_calls_by_output_tokens():
+    ledger = TokenLedger()
+    for run_id, arguments in (("a", '{"q": "short"}'), ("b", '{"q": "' + "long " * 50 + '"}')):
+        ledger.new_run(run_id, "discovery").record_turn(
+            [{"role": "user", "content": "task"}],
+            [],
+            CompletionUsage(prompt_tokens=10, completion_tokens=100, total_tokens=110),
+            "",
+            [("ACI_SEARCH_FUNCTIONS", '{"intent": "search"}'), ("BRAVE_SEARCH__WEB_SEARCH", arguments)],
+        )
+
+    costs = ledger.tool_call_costs()
+    assert list(costs) == ["BRAVE_SEARCH__WEB_SEARCH", "ACI_SEARCH_FUNCTIONS"]
+    assert sum(cost["output_tokens"] for cost in costs.values()) == ledger.totals()["tool_call_tokens"]
+    assert ledger.to_dict()["tool_calls"] == costs